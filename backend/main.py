@@ -6,6 +6,7 @@ This wrapper ensures the xplorer package can be imported correctly.
 
 import sys
 import os
+import multiprocessing
 
 # Ensure the parent directory is in the path for imports
 if getattr(sys, 'frozen', False):
@@ -24,4 +25,15 @@ from xplorer.server import main
 import asyncio
 
 if __name__ == "__main__":
+    # Thumbnail workers are spawned processes; frozen builds must hand them off here
+    multiprocessing.freeze_support()
+
+    # uvloop doesn't support Windows; there server.py installs the SelectorEventLoop policy
+    if sys.platform != "win32":
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
     asyncio.run(main())
@@ -34,6 +34,12 @@ extensions = [
         extra_link_args=extra_link_args,
         language="c",
     ),
+    Extension(
+        "xplorer.core.watch_parser",
+        sources=["xplorer/core/watch_parser.pyx"],
+        extra_compile_args=extra_compile_args,
+        language="c",
+    ),
     Extension(
         "xplorer.core.clipboard",
         sources=["xplorer/core/clipboard.pyx"],
@@ -55,6 +61,20 @@ extensions = [
         extra_link_args=extra_link_args,
         language="c",
     ),
+    # Request/response path: compiled straight from the .py sources, so an
+    # unbuilt tree keeps importing the pure-Python modules
+    Extension(
+        "xplorer.protocol",
+        sources=["xplorer/protocol.py"],
+        extra_compile_args=extra_compile_args,
+        language="c",
+    ),
+    Extension(
+        "xplorer.server",
+        sources=["xplorer/server.py"],
+        extra_compile_args=extra_compile_args,
+        language="c",
+    ),
 ]
 
 setup(
@@ -0,0 +1,190 @@
+import os
+
+import pytest
+
+from xplorer.services import file_service
+from xplorer.services.file_service import _get_file_info, _plan_transfers, _unique_name
+
+
+@pytest.mark.parametrize(
+    "name, extension, mime_type",
+    [
+        ("photo.JPG", ".JPG", "image/jpeg"),
+        ("notes.txt", ".txt", "text/plain"),
+        ("data.unknownext", ".unknownext", None),
+        ("Makefile", "", None),
+        (".gitignore", "", None),
+    ],
+)
+def test_file_info_mime_type(tmp_path, name, extension, mime_type):
+    path = tmp_path / name
+    path.write_bytes(b"")
+
+    info = _get_file_info(str(path))
+
+    assert info["extension"] == extension
+    assert info["mimeType"] == mime_type
+
+
+def test_directory_has_no_mime_type(tmp_path):
+    info = _get_file_info(str(tmp_path))
+
+    assert info["isDirectory"]
+    assert info["extension"] == ""
+    assert info["mimeType"] is None
+
+
+def test_scandir_entry_matches_path_lookup(tmp_path):
+    (tmp_path / "a.png").write_bytes(b"x")
+
+    with os.scandir(tmp_path) as entries:
+        entry = next(entries)
+        from_entry = _get_file_info(entry.path, entry)
+
+    assert from_entry == _get_file_info(entry.path)
+
+
+def test_unique_name_free():
+    existing = {"b.txt"}
+
+    assert _unique_name("a.txt", existing) == "a.txt"
+    assert "a.txt" in existing
+
+
+def test_unique_name_numbers_before_extension():
+    existing = {"a.txt", "a (1).txt"}
+
+    assert _unique_name("a.txt", existing) == "a (2).txt"
+    assert _unique_name("a.txt", existing) == "a (3).txt"
+
+
+def test_unique_name_without_ext_split():
+    assert _unique_name("archive.d", {"archive.d"}, split_ext=False) == "archive.d (1)"
+
+
+@pytest.fixture
+def layout(tmp_path):
+    src = tmp_path / "src"
+    dst = tmp_path / "dst"
+    src.mkdir()
+    dst.mkdir()
+    for name in ("a.txt", "b.txt"):
+        (src / name).write_text(name)
+    (dst / "a.txt").write_text("existing")
+    return [str(src / "a.txt"), str(src / "b.txt")], str(dst)
+
+
+def test_plan_rename(layout):
+    sources, dst = layout
+
+    calls, skipped, errors = _plan_transfers(sources, dst, "rename")
+
+    assert [target for _, target in calls] == [
+        os.path.join(dst, "a (1).txt"),
+        os.path.join(dst, "b.txt"),
+    ]
+    assert skipped == [] and errors == []
+
+
+def test_plan_rename_within_batch(layout, tmp_path):
+    sources, dst = layout
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "b.txt").write_text("other")
+
+    calls, _, _ = _plan_transfers(sources + [str(other / "b.txt")], dst, "rename")
+
+    assert [target for _, target in calls][1:] == [
+        os.path.join(dst, "b.txt"),
+        os.path.join(dst, "b (1).txt"),
+    ]
+
+
+def test_plan_skip(layout):
+    sources, dst = layout
+
+    calls, skipped, errors = _plan_transfers(sources, dst, "skip")
+
+    assert calls == [(sources[1], os.path.join(dst, "b.txt"))]
+    assert skipped == [sources[0]]
+    assert errors == []
+
+
+def test_plan_error(layout):
+    sources, dst = layout
+
+    calls, skipped, errors = _plan_transfers(sources, dst, "error")
+
+    assert calls == [(sources[1], os.path.join(dst, "b.txt"))]
+    assert skipped == []
+    assert [error["path"] for error in errors] == [sources[0]]
+
+
+def test_plan_overwrite(layout):
+    sources, dst = layout
+
+    calls, skipped, errors = _plan_transfers(sources, dst, "overwrite")
+
+    assert calls == [
+        (sources[0], os.path.join(dst, "a.txt")),
+        (sources[1], os.path.join(dst, "b.txt")),
+    ]
+    assert skipped == [] and errors == []
+
+
+def test_plan_unknown_policy(layout):
+    sources, dst = layout
+
+    with pytest.raises(ValueError):
+        _plan_transfers(sources, dst, "merge")
+
+
+def test_failed_recycle_batch_reports_missing_paths(tmp_path, monkeypatch):
+    recycled = tmp_path / "recycled.txt"
+    recycled.write_text("x")
+    missing = str(tmp_path / "missing.txt")
+
+    def recycle_then_fail(paths):
+        # The shell recycled part of the batch before failing
+        if len(paths) > 1:
+            recycled.unlink()
+        raise OSError("SHFileOperationW failed")
+
+    monkeypatch.setattr(file_service, "_recycle_paths", recycle_then_fail)
+
+    deleted, errors = file_service._delete_files_batch([str(recycled), missing], True)
+
+    assert deleted == [str(recycled)]
+    assert [error["path"] for error in errors] == [missing]
+
+
+def test_overwrite_move_merges_directories(tmp_path):
+    src = tmp_path / "src" / "photos"
+    dst = tmp_path / "dst" / "photos"
+    (src / "trip").mkdir(parents=True)
+    (dst / "trip").mkdir(parents=True)
+    (src / "a.jpg").write_text("new a")
+    (src / "trip" / "b.jpg").write_text("new b")
+    (dst / "a.jpg").write_text("old a")
+    (dst / "keep.jpg").write_text("keep")
+
+    file_service._move_or_rename(str(src), str(dst))
+
+    assert not src.exists()
+    assert sorted(os.listdir(dst)) == ["a.jpg", "keep.jpg", "trip"]
+    assert (dst / "a.jpg").read_text() == "new a"
+    assert (dst / "trip" / "b.jpg").read_text() == "new b"
+
+
+def test_overwrite_move_replaces_mismatched_types(tmp_path):
+    (tmp_path / "file").write_text("file")
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "old_dir").mkdir()
+    (tmp_path / "old_dir" / "x").write_text("x")
+    (tmp_path / "old_file").write_text("old")
+
+    file_service._move_or_rename(str(tmp_path / "file"), str(tmp_path / "old_dir"))
+    file_service._move_or_rename(str(tmp_path / "dir"), str(tmp_path / "old_file"))
+
+    assert (tmp_path / "old_dir").read_text() == "file"
+    assert (tmp_path / "old_file").is_dir()
@@ -0,0 +1,92 @@
+import struct
+import zlib
+
+from xplorer.utils import icons
+from xplorer.utils.icons import PNG_SIGNATURE, _encode_png_bgra
+
+
+def _chunks(png: bytes) -> list[tuple[bytes, bytes]]:
+    chunks = []
+    offset = len(PNG_SIGNATURE)
+    while offset < len(png):
+        length, tag = struct.unpack_from(">I4s", png, offset)
+        data = png[offset + 8 : offset + 8 + length]
+        (crc,) = struct.unpack_from(">I", png, offset + 8 + length)
+        assert crc == zlib.crc32(tag + data)
+        chunks.append((tag, data))
+        offset += 12 + length
+    return chunks
+
+
+def test_encode_png_bgra():
+    # 2x2, top-down BGRA: blue, green / red, half-transparent white
+    bits = bytes(
+        [
+            255,
+            0,
+            0,
+            255,
+            0,
+            255,
+            0,
+            255,
+            0,
+            0,
+            255,
+            255,
+            255,
+            255,
+            255,
+            128,
+        ]
+    )
+
+    png = _encode_png_bgra(2, 2, bits)
+
+    assert png.startswith(PNG_SIGNATURE)
+    chunks = _chunks(png)
+    assert [tag for tag, _ in chunks] == [b"IHDR", b"IDAT", b"IEND"]
+    # 8-bit RGBA, no interlace
+    assert struct.unpack(">IIBBBBB", chunks[0][1]) == (2, 2, 8, 6, 0, 0, 0)
+    assert zlib.decompress(chunks[1][1]) == bytes(
+        [
+            0,
+            0,
+            0,
+            255,
+            255,
+            0,
+            255,
+            0,
+            255,
+            0,
+            255,
+            0,
+            0,
+            255,
+            255,
+            255,
+            255,
+            128,
+        ]
+    )
+    assert chunks[2][1] == b""
+
+
+def test_encode_png_bgra_leaves_input_untouched():
+    bits = bytes(range(16))
+
+    _encode_png_bgra(2, 2, bits)
+
+    assert bits == bytes(range(16))
+
+
+def test_failed_extension_icon_is_not_cached(monkeypatch):
+    results = iter([None, "icon"])
+    monkeypatch.setattr(icons, "_shell_icon", lambda *args: next(results))
+    monkeypatch.setattr(icons, "GetFileAttributesW", lambda path: icons.FILE_ATTRIBUTE_NORMAL)
+    icons._get_icon_for_ext.cache_clear()
+
+    assert icons.get_system_icon("C:\\a.testext") is None
+    assert icons.get_system_icon("C:\\b.testext") == "icon"
+    assert icons.get_system_icon("C:\\c.testext") == "icon"
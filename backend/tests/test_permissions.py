@@ -0,0 +1,19 @@
+from xplorer.protocol import encoder
+from xplorer.utils import permissions
+
+
+def test_bulk_permissions_are_encodable_copies(monkeypatch):
+    monkeypatch.setattr(
+        permissions,
+        "iter_file_attributes",
+        lambda dir_path: iter([("a.txt", 0x20), ("b.txt", 0x20)]),
+    )
+
+    result = permissions.get_file_permissions_bulk("C:\\dir")
+
+    assert encoder.encode(result)
+    assert result["a.txt"] == result["b.txt"]
+    assert result["a.txt"]["archive"] and not result["a.txt"]["readonly"]
+
+    result["a.txt"]["readonly"] = True
+    assert not permissions.get_file_permissions_bulk("C:\\dir")["b.txt"]["readonly"]
@@ -0,0 +1,77 @@
+import msgspec
+import pytest
+
+from xplorer.protocol import (
+    ACTION_HANDLERS,
+    ACTIONS,
+    DECODE_ERROR_RESPONSE,
+    Action,
+    ErrorCode,
+    XPError,
+    XPRequest,
+    XPResponse,
+    _opcode_name,
+    encoder,
+    request_decoder,
+)
+
+
+def test_request_round_trip():
+    request = XPRequest(id="42", action="fs.list", params={"path": "C:\\", "size": 32})
+
+    assert request_decoder.decode(encoder.encode(request)) == request
+
+
+def test_request_defaults():
+    assert request_decoder.decode(encoder.encode({})) == XPRequest()
+
+
+def test_response_round_trip_omits_defaults():
+    payload = encoder.encode(XPResponse(id="1", success=True, data=[1, "two"]))
+
+    assert msgspec.msgpack.decode(payload) == {"id": "1", "success": True, "data": [1, "two"]}
+    assert msgspec.msgpack.decode(payload, type=XPResponse) == XPResponse(
+        id="1", success=True, data=[1, "two"]
+    )
+
+
+def test_decode_error_response():
+    response = msgspec.msgpack.decode(DECODE_ERROR_RESPONSE, type=XPResponse)
+
+    assert not response.success
+    assert response.error == XPError(
+        code=ErrorCode.INVALID_REQUEST, message="Failed to decode request"
+    )
+
+
+def test_response_splices_raw_data():
+    raw = msgspec.Raw(msgspec.msgpack.encode([{"name": "a.txt"}]))
+
+    payload = encoder.encode(XPResponse(id="1", success=True, data=raw))
+
+    assert msgspec.msgpack.decode(payload)["data"] == [{"name": "a.txt"}]
+
+
+@pytest.mark.parametrize("action", [Action.FS_LIST, int(Action.SHELL_THUMBNAILS)])
+def test_request_round_trip_op_code(action):
+    request = XPRequest(id="42", action=action)
+
+    decoded = request_decoder.decode(encoder.encode(request))
+
+    assert decoded.action == action
+    assert type(decoded.action) is int
+
+
+def test_op_codes_are_stable():
+    assert Action.FS_LIST == 0
+    assert Action.FS_WRITE_FILE == 7
+    assert Action.SHELL_THUMBNAIL == 19
+    assert Action.SHELL_ICON == 20
+    assert Action.CANCEL == 37
+    assert Action.SHELL_THUMBNAILS == 38
+
+
+def test_op_codes_index_handlers():
+    assert len(ACTION_HANDLERS) == len(ACTIONS)
+    for name, handler in ACTIONS.items():
+        assert ACTION_HANDLERS[Action[_opcode_name(name)]] == handler
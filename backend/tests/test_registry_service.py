@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("winreg")
+
+from xplorer.services.registry_service import RegistryService  # noqa: E402
+
+
+def test_build_reg_script_quotes_values(monkeypatch):
+    monkeypatch.setattr(
+        RegistryService,
+        "_shell_integration_values",
+        classmethod(
+            lambda cls, exe: [
+                ("Directory\\shell\\X", "", "Open with X"),
+                ("Directory\\shell\\X", "Icon", exe),
+                ("Directory\\shell\\X\\command", "", f'"{exe}" "%V"'),
+            ]
+        ),
+    )
+
+    script = RegistryService._build_reg_script("C:\\Program Files\\X\\x.exe")
+
+    assert (
+        script
+        == "\r\n".join(
+            [
+                "Windows Registry Editor Version 5.00",
+                "",
+                "[HKEY_CLASSES_ROOT\\Directory\\shell\\X]",
+                '@="Open with X"',
+                '"Icon"="C:\\\\Program Files\\\\X\\\\x.exe"',
+                "",
+                "[HKEY_CLASSES_ROOT\\Directory\\shell\\X\\command]",
+                '@="\\"C:\\\\Program Files\\\\X\\\\x.exe\\" \\"%V\\""',
+            ]
+        )
+        + "\r\n"
+    )
+
+
+def test_build_reg_script_covers_every_value():
+    exe = "C:\\X\\x.exe"
+
+    script = RegistryService._build_reg_script(exe)
+
+    values = RegistryService._shell_integration_values(exe)
+    assert script.count("\r\n[HKEY_CLASSES_ROOT\\") == len({key for key, _, _ in values})
+    assert script.count("=") == len(values)
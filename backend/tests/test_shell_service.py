@@ -0,0 +1,122 @@
+import struct
+
+from xplorer.services.shell_service import (
+    LNK_HAS_LINK_INFO,
+    LNK_HAS_TARGET_ID_LIST,
+    LNK_HEADER_SIZE,
+    LNK_INFO_COMMON_NETWORK_RELATIVE_LINK,
+    LNK_INFO_VOLUME_ID_AND_LOCAL_BASE_PATH,
+    _parse_lnk_target,
+)
+
+# Extended LinkInfo header, so the Unicode offsets are present
+LINK_INFO_HEADER_SIZE = 0x24
+
+
+def _wstr(value: str) -> bytes:
+    return value.encode("utf-16-le") + b"\0\0"
+
+
+def _link(link_flags: int, link_info: bytes, id_list: bytes | None = None) -> bytes:
+    header = struct.pack("<I16sI", LNK_HEADER_SIZE, b"\0" * 16, link_flags)
+    header += b"\0" * (LNK_HEADER_SIZE - len(header))
+    if id_list is not None:
+        header += struct.pack("<H", len(id_list)) + id_list
+    return header + link_info
+
+
+def _link_info(
+    info_flags: int, network_offset: int, base: bytes, suffix: bytes, tail: bytes = b""
+) -> bytes:
+    base_offset = LINK_INFO_HEADER_SIZE + len(tail)
+    suffix_offset = base_offset + len(base)
+    size = suffix_offset + len(suffix)
+    return (
+        struct.pack(
+            "<9I",
+            size,
+            LINK_INFO_HEADER_SIZE,
+            info_flags,
+            0,
+            0,
+            network_offset,
+            0,
+            base_offset if base else 0,
+            suffix_offset,
+        )
+        + tail
+        + base
+        + suffix
+    )
+
+
+def test_local_target(tmp_path):
+    lnk = tmp_path / "app.lnk"
+    lnk.write_bytes(
+        _link(
+            LNK_HAS_LINK_INFO,
+            _link_info(
+                LNK_INFO_VOLUME_ID_AND_LOCAL_BASE_PATH, 0, _wstr("C:\\Tools\\"), _wstr("app.exe")
+            ),
+        )
+    )
+
+    assert _parse_lnk_target(str(lnk)) == "C:\\Tools\\app.exe"
+
+
+def test_local_target_after_id_list(tmp_path):
+    lnk = tmp_path / "app.lnk"
+    lnk.write_bytes(
+        _link(
+            LNK_HAS_LINK_INFO | LNK_HAS_TARGET_ID_LIST,
+            _link_info(
+                LNK_INFO_VOLUME_ID_AND_LOCAL_BASE_PATH, 0, _wstr("C:\\Täst\\app.exe"), _wstr("")
+            ),
+            id_list=b"\x07" * 22,
+        )
+    )
+
+    assert _parse_lnk_target(str(lnk)) == "C:\\Täst\\app.exe"
+
+
+def test_network_target(tmp_path):
+    # CommonNetworkRelativeLink with NetNameOffset > 0x14, so the name is Unicode
+    net_name = _wstr("\\\\server\\share")
+    network = struct.pack("<7I", 0x1C + len(net_name), 0, 0x1C, 0, 0, 0x1C, 0) + net_name
+    lnk = tmp_path / "doc.lnk"
+    lnk.write_bytes(
+        _link(
+            LNK_HAS_LINK_INFO,
+            _link_info(
+                LNK_INFO_COMMON_NETWORK_RELATIVE_LINK,
+                LINK_INFO_HEADER_SIZE,
+                b"",
+                _wstr("docs\\a.txt"),
+                tail=network,
+            ),
+        )
+    )
+
+    assert _parse_lnk_target(str(lnk)) == "\\\\server\\share\\docs\\a.txt"
+
+
+def test_id_list_only(tmp_path):
+    lnk = tmp_path / "folder.lnk"
+    lnk.write_bytes(_link(LNK_HAS_TARGET_ID_LIST, b"", id_list=b"\0\0"))
+
+    assert _parse_lnk_target(str(lnk)) is None
+
+
+def test_not_a_link(tmp_path):
+    lnk = tmp_path / "fake.lnk"
+    lnk.write_bytes(b"not a shell link")
+
+    assert _parse_lnk_target(str(lnk)) is None
+    assert _parse_lnk_target(str(tmp_path / "missing.lnk")) is None
+
+
+def test_truncated_link_info(tmp_path):
+    lnk = tmp_path / "cut.lnk"
+    lnk.write_bytes(_link(LNK_HAS_LINK_INFO, b"\x10\0\0\0"))
+
+    assert _parse_lnk_target(str(lnk)) is None
@@ -0,0 +1,63 @@
+import ctypes
+import struct
+
+import pytest
+
+from xplorer.services.watch_service import (
+    FILE_ACTION_ADDED,
+    FILE_ACTION_RENAMED_NEW_NAME,
+    FILE_ACTION_RENAMED_OLD_NAME,
+    _parse_notifications,
+)
+
+# FILE_NOTIFY_INFORMATION names are UTF-16; ctypes.wstring_at reads wchar_t
+pytestmark = pytest.mark.skipif(
+    ctypes.sizeof(ctypes.c_wchar) != 2, reason="needs a 16-bit wchar_t (Windows)"
+)
+
+
+def _records(*records: tuple[int, str]) -> bytes:
+    """Pack FILE_NOTIFY_INFORMATION records, each DWORD-aligned."""
+    packed = []
+    for i, (action, name) in enumerate(records):
+        encoded = name.encode("utf-16-le")
+        entry = struct.pack("<III", 0, action, len(encoded)) + encoded
+        entry += b"\0" * (-len(entry) % 4)
+        if i < len(records) - 1:
+            entry = struct.pack("<I", len(entry)) + entry[4:]
+        packed.append(entry)
+    return b"".join(packed)
+
+
+def _parse(data: bytes, path_prefix: str) -> list[tuple[int, str]]:
+    buffer = ctypes.create_string_buffer(data, len(data))
+    return _parse_notifications(buffer, ctypes.addressof(buffer), len(data), path_prefix)
+
+
+def test_parse_notifications():
+    data = _records(
+        (FILE_ACTION_ADDED, "new.txt"),
+        (FILE_ACTION_RENAMED_OLD_NAME, "old name.txt"),
+        (FILE_ACTION_RENAMED_NEW_NAME, "sub\\nëw name.txt"),
+    )
+
+    assert _parse(data, "C:\\dir\\") == [
+        (FILE_ACTION_ADDED, "C:\\dir\\new.txt"),
+        (FILE_ACTION_RENAMED_OLD_NAME, "C:\\dir\\old name.txt"),
+        (FILE_ACTION_RENAMED_NEW_NAME, "C:\\dir\\sub\\nëw name.txt"),
+    ]
+
+
+def test_parse_notifications_stops_at_last_record():
+    data = _records((FILE_ACTION_ADDED, "a"))
+
+    # Trailing bytes past a zero NextEntryOffset are not records
+    assert _parse(data + b"\xff" * 16, "C:\\") == [(FILE_ACTION_ADDED, "C:\\a")]
+
+
+def test_cython_parser_matches():
+    watch_parser = pytest.importorskip("xplorer.core.watch_parser")
+    data = _records((FILE_ACTION_ADDED, "a.txt"), (FILE_ACTION_ADDED, "b.txt"))
+    buffer = ctypes.create_string_buffer(data, len(data))
+
+    assert watch_parser.parse(ctypes.addressof(buffer), len(data), "C:\\") == _parse(data, "C:\\")
@@ -7,6 +7,7 @@ These modules provide high-performance file system operations.
 try:
     from . import filesystem
     from . import watcher
+    from . import watch_parser
     from . import clipboard
     from . import thumbnail
     from . import shell
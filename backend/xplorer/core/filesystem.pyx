@@ -9,7 +9,11 @@ cimport cython
 from libc.stdlib cimport malloc, free
 from libc.string cimport memcpy
 from libc.stddef cimport wchar_t
-from cpython.mem cimport PyMem_Malloc, PyMem_Free
+from cpython.mem cimport PyMem_Malloc, PyMem_Realloc, PyMem_Free
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from cpython.unicode cimport (
+    PyUnicode_AsUTF8AndSize, PyUnicode_AsWideCharString, PyUnicode_FromWideChar
+)
 
 cdef extern from "windows.h":
     ctypedef unsigned long DWORD
@@ -33,7 +37,21 @@ cdef extern from "windows.h":
         wchar_t cFileName[260]
         wchar_t cAlternateFileName[14]
 
+    ctypedef enum FINDEX_INFO_LEVELS:
+        FindExInfoBasic
+
+    ctypedef enum FINDEX_SEARCH_OPS:
+        FindExSearchNameMatch
+
     HANDLE FindFirstFileW(wchar_t* lpFileName, WIN32_FIND_DATAW* lpFindFileData) nogil
+    HANDLE FindFirstFileExW(
+        wchar_t* lpFileName,
+        FINDEX_INFO_LEVELS fInfoLevelId,
+        void* lpFindFileData,
+        FINDEX_SEARCH_OPS fSearchOp,
+        void* lpSearchFilter,
+        DWORD dwAdditionalFlags
+    ) nogil
     BOOL FindNextFileW(HANDLE hFindFile, WIN32_FIND_DATAW* lpFindFileData) nogil
     BOOL FindClose(HANDLE hFindFile) nogil
     DWORD GetFileAttributesW(wchar_t* lpFileName) nogil
@@ -58,6 +76,47 @@ cdef extern from "windows.h":
         ULONGLONG* lpTotalNumberOfFreeBytes
     ) nogil
 
+    ctypedef struct LARGE_INTEGER:
+        long long QuadPart
+
+    ctypedef struct FILE_ID_BOTH_DIR_INFO:
+        DWORD NextEntryOffset
+        DWORD FileIndex
+        LARGE_INTEGER CreationTime
+        LARGE_INTEGER LastAccessTime
+        LARGE_INTEGER LastWriteTime
+        LARGE_INTEGER ChangeTime
+        LARGE_INTEGER EndOfFile
+        LARGE_INTEGER AllocationSize
+        DWORD FileAttributes
+        DWORD FileNameLength
+        DWORD EaSize
+        char ShortNameLength
+        wchar_t ShortName[12]
+        LARGE_INTEGER FileId
+        wchar_t FileName[1]
+
+    ctypedef enum FILE_INFO_BY_HANDLE_CLASS:
+        FileIdBothDirectoryInfo
+
+    HANDLE CreateFileW(
+        wchar_t* lpFileName,
+        DWORD dwDesiredAccess,
+        DWORD dwShareMode,
+        void* lpSecurityAttributes,
+        DWORD dwCreationDisposition,
+        DWORD dwFlagsAndAttributes,
+        HANDLE hTemplateFile
+    ) nogil
+
+    BOOL GetFileInformationByHandleEx(
+        HANDLE hFile,
+        FILE_INFO_BY_HANDLE_CLASS FileInformationClass,
+        void* lpFileInformation,
+        DWORD dwBufferSize
+    ) nogil
+
+    BOOL CloseHandle(HANDLE hObject) nogil
     DWORD GetLastError() nogil
 
 
@@ -69,6 +128,23 @@ cdef DWORD FILE_ATTRIBUTE_READONLY = 0x1
 cdef DWORD FILE_ATTRIBUTE_HIDDEN = 0x2
 cdef DWORD FILE_ATTRIBUTE_SYSTEM = 0x4
 cdef DWORD FILE_ATTRIBUTE_DIRECTORY = 0x10
+cdef DWORD FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+# Directory enumeration: skip 8.3 names, use larger kernel buffers
+cdef DWORD FIND_FIRST_EX_LARGE_FETCH = 0x2
+
+# Directory handles for GetFileInformationByHandleEx
+cdef DWORD FILE_LIST_DIRECTORY = 0x1
+cdef DWORD FILE_SHARE_ALL = 0x1 | 0x2 | 0x4  # READ | WRITE | DELETE
+cdef DWORD OPEN_EXISTING = 3
+cdef DWORD FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+cdef DWORD ERROR_NO_MORE_FILES = 18
+
+# One kernel call fills this many bytes of FILE_ID_BOTH_DIR_INFO records
+cdef DWORD DIR_INFO_BUFFER_SIZE = 64 * 1024
+
+# How many entries the recursive walkers scan between is_cancelled() calls
+cdef Py_ssize_t CANCEL_CHECK_INTERVAL = 500
 
 
 cdef inline long long filetime_to_unix(FILETIME ft) nogil:
@@ -78,6 +154,11 @@ cdef inline long long filetime_to_unix(FILETIME ft) nogil:
     return <long long>((time - 116444736000000000ULL) // 10000000)
 
 
+cdef inline long long ticks_to_unix(long long ticks) nogil:
+    """Convert a 100ns-since-1601 LARGE_INTEGER timestamp to Unix time."""
+    return (ticks - 116444736000000000LL) // 10000000
+
+
 cdef inline unsigned long long get_file_size(WIN32_FIND_DATAW* data) nogil:
     """Get file size from WIN32_FIND_DATAW."""
     return (<unsigned long long>data.nFileSizeHigh << 32) | data.nFileSizeLow
@@ -126,7 +207,10 @@ def list_directory(str path):
 
         # Find first file
         with nogil:
-            h_find = FindFirstFileW(search_wstr, &find_data)
+            h_find = FindFirstFileExW(
+                search_wstr, FindExInfoBasic, &find_data,
+                FindExSearchNameMatch, NULL, FIND_FIRST_EX_LARGE_FETCH
+            )
 
         if h_find == INVALID_HANDLE_VALUE:
             raise FileNotFoundError(f"Cannot access directory: {path}")
@@ -187,6 +271,261 @@ def list_directory(str path):
     return results
 
 
+cdef HANDLE open_directory(str path) except? NULL:
+    """Open a directory handle for GetFileInformationByHandleEx enumeration."""
+    cdef wchar_t* path_wstr = PyUnicode_AsWideCharString(path, NULL)
+    cdef HANDLE h_dir
+
+    try:
+        with nogil:
+            h_dir = CreateFileW(
+                path_wstr,
+                FILE_LIST_DIRECTORY,
+                FILE_SHARE_ALL,
+                NULL,
+                OPEN_EXISTING,
+                FILE_FLAG_BACKUP_SEMANTICS,
+                NULL
+            )
+    finally:
+        PyMem_Free(path_wstr)
+
+    return h_dir
+
+
+cdef int next_dir_info_batch(HANDLE h_dir, char* buffer) except -1:
+    """
+    Fill buffer with the next batch of FILE_ID_BOTH_DIR_INFO records.
+
+    Returns 1 if records were read, 0 once the directory is exhausted.
+    """
+    cdef BOOL ok
+    cdef DWORD error
+
+    with nogil:
+        ok = GetFileInformationByHandleEx(
+            h_dir, FileIdBothDirectoryInfo, buffer, DIR_INFO_BUFFER_SIZE
+        )
+
+    if ok:
+        return 1
+
+    error = GetLastError()
+    if error == ERROR_NO_MORE_FILES:
+        return 0
+    raise OSError(f"GetFileInformationByHandleEx failed with error {error}")
+
+
+cdef inline bint is_dot_info(FILE_ID_BOTH_DIR_INFO* info) nogil:
+    """True for the . and .. records."""
+    return info.FileName[0] == 46 and (
+        info.FileNameLength == sizeof(wchar_t)
+        or (info.FileNameLength == 2 * sizeof(wchar_t) and info.FileName[1] == 46)
+    )
+
+
+# Minimal msgpack writer used by list_directory_packed()
+cdef struct PackBuffer:
+    char* data
+    Py_ssize_t size
+    Py_ssize_t capacity
+
+
+cdef int buf_reserve(PackBuffer* buf, Py_ssize_t extra) except -1:
+    """Grow the buffer so at least `extra` more bytes fit."""
+    cdef Py_ssize_t needed = buf.size + extra
+    cdef Py_ssize_t new_capacity
+    cdef char* new_data
+
+    if needed <= buf.capacity:
+        return 0
+
+    new_capacity = buf.capacity * 2 if buf.capacity else 16384
+    while new_capacity < needed:
+        new_capacity *= 2
+
+    new_data = <char*>PyMem_Realloc(buf.data, new_capacity)
+    if new_data == NULL:
+        raise MemoryError("Failed to grow pack buffer")
+
+    buf.data = new_data
+    buf.capacity = new_capacity
+    return 0
+
+
+cdef inline int pack_byte(PackBuffer* buf, unsigned char value) except -1:
+    buf_reserve(buf, 1)
+    buf.data[buf.size] = <char>value
+    buf.size += 1
+    return 0
+
+
+cdef inline int pack_be(PackBuffer* buf, unsigned long long value, int nbytes) except -1:
+    """Write `value` as an `nbytes` big-endian integer."""
+    cdef int i
+    buf_reserve(buf, nbytes)
+    for i in range(nbytes):
+        buf.data[buf.size + i] = <char>((value >> (8 * (nbytes - 1 - i))) & 0xFF)
+    buf.size += nbytes
+    return 0
+
+
+cdef int pack_str(PackBuffer* buf, str value) except -1:
+    cdef Py_ssize_t length
+    cdef const char* utf8 = PyUnicode_AsUTF8AndSize(value, &length)
+
+    if length < 32:
+        pack_byte(buf, 0xA0 | <unsigned char>length)
+    elif length < 0x100:
+        pack_byte(buf, 0xD9)
+        pack_byte(buf, <unsigned char>length)
+    elif length < 0x10000:
+        pack_byte(buf, 0xDA)
+        pack_be(buf, length, 2)
+    else:
+        pack_byte(buf, 0xDB)
+        pack_be(buf, length, 4)
+
+    buf_reserve(buf, length)
+    memcpy(buf.data + buf.size, utf8, length)
+    buf.size += length
+    return 0
+
+
+cdef inline int pack_bool(PackBuffer* buf, bint value) except -1:
+    return pack_byte(buf, 0xC3 if value else 0xC2)
+
+
+cdef int pack_int(PackBuffer* buf, long long value) except -1:
+    if 0 <= value < 0x80:
+        pack_byte(buf, <unsigned char>value)
+    elif value >= 0:
+        if value < 0x100000000:
+            pack_byte(buf, 0xCE)
+            pack_be(buf, <unsigned long long>value, 4)
+        else:
+            pack_byte(buf, 0xCF)
+            pack_be(buf, <unsigned long long>value, 8)
+    elif value >= -32:
+        pack_byte(buf, <unsigned char>(value & 0xFF))
+    else:
+        pack_byte(buf, 0xD3)
+        pack_be(buf, <unsigned long long>value, 8)
+    return 0
+
+
+def list_directory_packed(str path):
+    """
+    List contents of a directory as a pre-encoded msgpack array.
+
+    Produces the same entries as list_directory() but writes them straight
+    into msgpack bytes, so no per-entry dicts are built and the server can
+    splice the payload into the response (msgspec.Raw) without re-encoding.
+    Entries are read with GetFileInformationByHandleEx, which returns a
+    whole buffer of records per kernel call.
+
+    Args:
+        path: Directory path to list
+
+    Returns:
+        msgpack-encoded array of file info maps
+    """
+    cdef:
+        HANDLE h_dir
+        PackBuffer buf
+        char* info_buffer
+        FILE_ID_BOTH_DIR_INFO* info
+        DWORD offset
+        DWORD attrs
+        str name
+        str prefix
+        str ext
+        bint is_dir
+        unsigned long long count = 0
+        Py_ssize_t dot_pos
+        Py_ssize_t i
+
+    prefix = path if path.endswith("\\") else path + "\\"
+
+    buf.data = NULL
+    buf.size = 0
+    buf.capacity = 0
+
+    h_dir = open_directory(path)
+    if h_dir == INVALID_HANDLE_VALUE:
+        raise FileNotFoundError(f"Cannot access directory: {path}")
+
+    info_buffer = <char*>PyMem_Malloc(DIR_INFO_BUFFER_SIZE)
+    if info_buffer == NULL:
+        with nogil:
+            CloseHandle(h_dir)
+        raise MemoryError("Failed to allocate directory buffer")
+
+    try:
+        # array32 header; the count is patched in once the listing is done
+        pack_byte(&buf, 0xDD)
+        pack_be(&buf, 0, 4)
+
+        while next_dir_info_batch(h_dir, info_buffer):
+            offset = 0
+            while True:
+                info = <FILE_ID_BOTH_DIR_INFO*>(info_buffer + offset)
+
+                # Skip . and ..
+                if not is_dot_info(info):
+                    name = PyUnicode_FromWideChar(info.FileName, info.FileNameLength // sizeof(wchar_t))
+                    attrs = info.FileAttributes
+                    is_dir = (attrs & FILE_ATTRIBUTE_DIRECTORY) != 0
+
+                    if is_dir:
+                        ext = ""
+                    else:
+                        dot_pos = name.rfind(".")
+                        ext = name[dot_pos:] if dot_pos > 0 else ""
+
+                    # fixmap with 11 entries, same keys/order as list_directory()
+                    pack_byte(&buf, 0x80 | 11)
+                    pack_str(&buf, "name")
+                    pack_str(&buf, name)
+                    pack_str(&buf, "path")
+                    pack_str(&buf, prefix + name)
+                    pack_str(&buf, "isDirectory")
+                    pack_bool(&buf, is_dir)
+                    pack_str(&buf, "isHidden")
+                    pack_bool(&buf, (attrs & FILE_ATTRIBUTE_HIDDEN) != 0)
+                    pack_str(&buf, "isSystem")
+                    pack_bool(&buf, (attrs & FILE_ATTRIBUTE_SYSTEM) != 0)
+                    pack_str(&buf, "isReadOnly")
+                    pack_bool(&buf, (attrs & FILE_ATTRIBUTE_READONLY) != 0)
+                    pack_str(&buf, "size")
+                    pack_int(&buf, 0 if is_dir else info.EndOfFile.QuadPart)
+                    pack_str(&buf, "createdAt")
+                    pack_int(&buf, ticks_to_unix(info.CreationTime.QuadPart))
+                    pack_str(&buf, "modifiedAt")
+                    pack_int(&buf, ticks_to_unix(info.LastWriteTime.QuadPart))
+                    pack_str(&buf, "accessedAt")
+                    pack_int(&buf, ticks_to_unix(info.LastAccessTime.QuadPart))
+                    pack_str(&buf, "extension")
+                    pack_str(&buf, ext)
+                    count += 1
+
+                if info.NextEntryOffset == 0:
+                    break
+                offset += info.NextEntryOffset
+
+        # Patch the element count into the array32 header
+        for i in range(4):
+            buf.data[1 + i] = <char>((count >> (8 * (3 - i))) & 0xFF)
+
+        return PyBytes_FromStringAndSize(buf.data, buf.size)
+
+    finally:
+        with nogil:
+            CloseHandle(h_dir)
+        PyMem_Free(info_buffer)
+        PyMem_Free(buf.data)
+
+
 def get_file_info(str path):
     """
     Get information about a single file or directory.
@@ -259,6 +598,237 @@ def get_file_info(str path):
         PyMem_Free(path_wstr)
 
 
+cdef dict find_data_info(str name, str full_path, WIN32_FIND_DATAW* data):
+    """Build a file info dict from a WIN32_FIND_DATAW entry."""
+    cdef bint is_dir = (data.dwFileAttributes & FILE_ATTRIBUTE_DIRECTORY) != 0
+    cdef Py_ssize_t dot_pos
+    cdef str ext = ""
+
+    if not is_dir:
+        dot_pos = name.rfind(".")
+        if dot_pos > 0:
+            ext = name[dot_pos:]
+
+    return {
+        "name": name,
+        "path": full_path,
+        "isDirectory": is_dir,
+        "isHidden": (data.dwFileAttributes & FILE_ATTRIBUTE_HIDDEN) != 0,
+        "isSystem": (data.dwFileAttributes & FILE_ATTRIBUTE_SYSTEM) != 0,
+        "isReadOnly": (data.dwFileAttributes & FILE_ATTRIBUTE_READONLY) != 0,
+        "size": 0 if is_dir else get_file_size(data),
+        "createdAt": filetime_to_unix(data.ftCreationTime),
+        "modifiedAt": filetime_to_unix(data.ftLastWriteTime),
+        "accessedAt": filetime_to_unix(data.ftLastAccessTime),
+        "extension": ext,
+    }
+
+
+cdef HANDLE find_first(str directory, WIN32_FIND_DATAW* data) except? NULL:
+    """Start a FindFirstFileExW enumeration of a directory's entries."""
+    cdef str pattern = directory + "*" if directory.endswith("\\") else directory + "\\*"
+    cdef wchar_t* pattern_wstr = PyUnicode_AsWideCharString(pattern, NULL)
+    cdef HANDLE h_find
+
+    try:
+        with nogil:
+            h_find = FindFirstFileExW(
+                pattern_wstr, FindExInfoBasic, data,
+                FindExSearchNameMatch, NULL, FIND_FIRST_EX_LARGE_FETCH
+            )
+    finally:
+        PyMem_Free(pattern_wstr)
+
+    return h_find
+
+
+cdef inline bint is_dot_entry(WIN32_FIND_DATAW* data) nogil:
+    """True for the . and .. entries."""
+    return data.cFileName[0] == 46 and (
+        data.cFileName[1] == 0 or (data.cFileName[1] == 46 and data.cFileName[2] == 0)
+    )
+
+
+def folder_size(str path, is_cancelled=None):
+    """
+    Get the total size of all files under a directory.
+
+    Directory reparse points (junctions, symlinks) are not followed.
+
+    Args:
+        path: Directory path
+        is_cancelled: Optional callable polled periodically
+
+    Returns:
+        Total size in bytes, or None if cancelled
+    """
+    cdef:
+        WIN32_FIND_DATAW find_data
+        HANDLE h_find
+        BOOL has_next
+        unsigned long long total = 0
+        Py_ssize_t count = 0
+        list stack = [path]
+        str directory
+
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            return None
+
+        directory = stack.pop()
+        h_find = find_first(directory, &find_data)
+        if h_find == INVALID_HANDLE_VALUE:
+            continue
+
+        if not directory.endswith("\\"):
+            directory += "\\"
+
+        try:
+            while True:
+                if not is_dot_entry(&find_data):
+                    if find_data.dwFileAttributes & FILE_ATTRIBUTE_DIRECTORY:
+                        if not (find_data.dwFileAttributes & FILE_ATTRIBUTE_REPARSE_POINT):
+                            stack.append(directory + PyUnicode_FromWideChar(find_data.cFileName, -1))
+                    else:
+                        total += get_file_size(&find_data)
+
+                    count += 1
+                    if count % CANCEL_CHECK_INTERVAL == 0:
+                        if is_cancelled is not None and is_cancelled():
+                            return None
+
+                with nogil:
+                    has_next = FindNextFileW(h_find, &find_data)
+
+                if not has_next:
+                    break
+
+        finally:
+            with nogil:
+                FindClose(h_find)
+
+    return total
+
+
+def folder_stats(str path):
+    """
+    Count the files and folders directly inside a directory.
+
+    Args:
+        path: Directory path
+
+    Returns:
+        Dictionary with fileCount and folderCount
+    """
+    cdef:
+        HANDLE h_dir
+        char* info_buffer
+        FILE_ID_BOTH_DIR_INFO* info
+        DWORD offset
+        Py_ssize_t file_count = 0
+        Py_ssize_t folder_count = 0
+
+    h_dir = open_directory(path)
+    if h_dir == INVALID_HANDLE_VALUE:
+        raise FileNotFoundError(f"Cannot access directory: {path}")
+
+    info_buffer = <char*>PyMem_Malloc(DIR_INFO_BUFFER_SIZE)
+    if info_buffer == NULL:
+        with nogil:
+            CloseHandle(h_dir)
+        raise MemoryError("Failed to allocate directory buffer")
+
+    try:
+        while next_dir_info_batch(h_dir, info_buffer):
+            offset = 0
+            with nogil:
+                while True:
+                    info = <FILE_ID_BOTH_DIR_INFO*>(info_buffer + offset)
+                    if not is_dot_info(info):
+                        if info.FileAttributes & FILE_ATTRIBUTE_DIRECTORY:
+                            folder_count += 1
+                        else:
+                            file_count += 1
+
+                    if info.NextEntryOffset == 0:
+                        break
+                    offset += info.NextEntryOffset
+
+    finally:
+        with nogil:
+            CloseHandle(h_dir)
+        PyMem_Free(info_buffer)
+
+    return {"fileCount": file_count, "folderCount": folder_count}
+
+
+def search(str path, str query, bint recursive=True, is_cancelled=None):
+    """
+    Find entries whose name contains query (case-insensitive).
+
+    Args:
+        path: Directory to search
+        query: Substring to match against names
+        recursive: Whether to descend into subdirectories
+        is_cancelled: Optional callable polled periodically
+
+    Returns:
+        List of file info dictionaries, or None if cancelled
+    """
+    cdef:
+        WIN32_FIND_DATAW find_data
+        HANDLE h_find
+        BOOL has_next
+        Py_ssize_t count = 0
+        list stack = [path]
+        list results = []
+        str query_lower = query.lower()
+        str directory
+        str name
+
+    while stack:
+        if is_cancelled is not None and is_cancelled():
+            return None
+
+        directory = stack.pop()
+        h_find = find_first(directory, &find_data)
+        if h_find == INVALID_HANDLE_VALUE:
+            continue
+
+        if not directory.endswith("\\"):
+            directory += "\\"
+
+        try:
+            while True:
+                if not is_dot_entry(&find_data):
+                    name = PyUnicode_FromWideChar(find_data.cFileName, -1)
+
+                    if query_lower in name.lower():
+                        results.append(find_data_info(name, directory + name, &find_data))
+
+                    if (recursive
+                            and find_data.dwFileAttributes & FILE_ATTRIBUTE_DIRECTORY
+                            and not (find_data.dwFileAttributes & FILE_ATTRIBUTE_REPARSE_POINT)):
+                        stack.append(directory + name)
+
+                    count += 1
+                    if count % CANCEL_CHECK_INTERVAL == 0:
+                        if is_cancelled is not None and is_cancelled():
+                            return None
+
+                with nogil:
+                    has_next = FindNextFileW(h_find, &find_data)
+
+                if not has_next:
+                    break
+
+        finally:
+            with nogil:
+                FindClose(h_find)
+
+    return results
+
+
 def get_drives():
     """
     Get list of available drives.
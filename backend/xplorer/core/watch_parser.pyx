@@ -0,0 +1,53 @@
+# cython: language_level=3
+# cython: boundscheck=False
+# cython: wraparound=False
+"""
+FILE_NOTIFY_INFORMATION record parser for ReadDirectoryChangesW buffers.
+"""
+
+cimport cython
+from libc.stdint cimport uint32_t, uintptr_t
+from libc.stddef cimport wchar_t
+from cpython.unicode cimport PyUnicode_FromWideChar
+
+# NextEntryOffset, Action and FileNameLength precede the name
+cdef Py_ssize_t HEADER_SIZE = 12
+
+
+cpdef list parse(uintptr_t buf_addr, uint32_t length, str path_prefix):
+    """
+    Parse a filled notification buffer.
+
+    Args:
+        buf_addr: Address of the buffer ReadDirectoryChangesW filled
+        length: Bytes returned by the read
+        path_prefix: Watched directory with a trailing separator
+
+    Returns:
+        List of (action, full path) tuples in buffer order.
+    """
+    cdef:
+        const char* p = <const char*>buf_addr
+        uint32_t offset = 0
+        uint32_t next_offset
+        uint32_t action
+        uint32_t name_bytes
+        list records = []
+
+    while offset + HEADER_SIZE <= length:
+        next_offset = (<const uint32_t*>(p + offset))[0]
+        action = (<const uint32_t*>(p + offset))[1]
+        name_bytes = (<const uint32_t*>(p + offset))[2]
+
+        records.append((
+            action,
+            path_prefix + PyUnicode_FromWideChar(
+                <const wchar_t*>(p + offset + HEADER_SIZE), name_bytes // sizeof(wchar_t)
+            ),
+        ))
+
+        if next_offset == 0:
+            break
+        offset += next_offset
+
+    return records
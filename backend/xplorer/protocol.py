@@ -1,12 +1,17 @@
+# cython: language_level=3
 """
 Message protocol definitions for ZeroMQ communication.
 """
 
-from dataclasses import dataclass, field
+from types import MappingProxyType
 from typing import Any, Literal
-from enum import Enum
+from enum import Enum, IntEnum
+import re
+import sys
 import time
 
+import msgspec
+
 
 class ErrorCode(str, Enum):
     """Error codes for IPC communication."""
@@ -33,113 +38,126 @@ class FSEventType(str, Enum):
     OVERFLOW = "overflow"
 
 
-@dataclass
-class XPRequest:
+class XPRequest(msgspec.Struct):
     """Request message format."""
-    id: str
-    action: str
-    params: dict[str, Any] = field(default_factory=dict)
+    id: str = ""
+    action: str | int = ""  # action name, or its Action op-code
+    params: dict[str, Any] = {}
 
 
-@dataclass
-class XPError:
+class XPError(msgspec.Struct, omit_defaults=True):
     """Error information."""
     code: str
     message: str
     details: Any = None
 
 
-@dataclass
-class XPResponse:
+class XPResponse(msgspec.Struct, omit_defaults=True):
     """Response message format."""
     id: str
     success: bool
     data: Any = None
     error: XPError | None = None
 
-    def to_dict(self) -> dict:
-        result = {
-            "id": self.id,
-            "success": self.success,
-        }
-        if self.data is not None:
-            result["data"] = self.data
-        if self.error is not None:
-            result["error"] = {
-                "code": self.error.code,
-                "message": self.error.message,
-            }
-            if self.error.details is not None:
-                result["error"]["details"] = self.error.details
-        return result
-
-
-@dataclass
-class XPEvent:
+
+class XPEvent(msgspec.Struct):
     """Event message format for pub/sub."""
     type: str
     path: str
     data: Any
-    timestamp: float = field(default_factory=time.time)
+    timestamp: float = msgspec.field(default_factory=time.time)
+
 
-    def to_dict(self) -> dict:
-        return {
-            "type": self.type,
-            "path": self.path,
-            "data": self.data,
-            "timestamp": self.timestamp,
-        }
+# Wire codecs - structs are encoded directly, without intermediate dicts
+request_decoder = msgspec.msgpack.Decoder(XPRequest)
+encoder = msgspec.msgpack.Encoder()
 
+# Pre-built replies for failures that don't depend on the request
+DECODE_ERROR_RESPONSE = encoder.encode(XPResponse(
+    id="",
+    success=False,
+    error=XPError(code=ErrorCode.INVALID_REQUEST, message="Failed to decode request"),
+))
+CANCELLED_ERROR = XPError(code=ErrorCode.OPERATION_CANCELLED, message="Operation cancelled")
 
-# Action handlers registry
-ACTIONS = {
+
+# Action table: name -> (op-code, handler). Op-codes are part of the wire
+# format, so existing numbers never change; new actions take the next free one.
+_ACTION_TABLE = {
     # File System
-    "fs.list": "handle_fs_list",
-    "fs.info": "handle_fs_info",
-    "fs.copy": "handle_fs_copy",
-    "fs.move": "handle_fs_move",
-    "fs.delete": "handle_fs_delete",
-    "fs.rename": "handle_fs_rename",
-    "fs.mkdir": "handle_fs_mkdir",
-    "fs.writeFile": "handle_fs_write_file",
-    "fs.folderStats": "handle_fs_folder_stats",
-    "fs.folderSize": "handle_fs_folder_size",
-    "fs.drives": "handle_fs_drives",
-    "fs.watch": "handle_fs_watch",
-    "fs.unwatch": "handle_fs_unwatch",
-    "fs.search": "handle_fs_search",
+    "fs.list": (0, "handle_fs_list"),
+    "fs.info": (1, "handle_fs_info"),
+    "fs.copy": (2, "handle_fs_copy"),
+    "fs.move": (3, "handle_fs_move"),
+    "fs.delete": (4, "handle_fs_delete"),
+    "fs.rename": (5, "handle_fs_rename"),
+    "fs.mkdir": (6, "handle_fs_mkdir"),
+    "fs.writeFile": (7, "handle_fs_write_file"),
+    "fs.folderStats": (8, "handle_fs_folder_stats"),
+    "fs.folderSize": (9, "handle_fs_folder_size"),
+    "fs.drives": (10, "handle_fs_drives"),
+    "fs.watch": (11, "handle_fs_watch"),
+    "fs.unwatch": (12, "handle_fs_unwatch"),
+    "fs.search": (13, "handle_fs_search"),
 
     # Clipboard
-    "clipboard.copy": "handle_clipboard_copy",
-    "clipboard.cut": "handle_clipboard_cut",
-    "clipboard.paste": "handle_clipboard_paste",
-    "clipboard.get": "handle_clipboard_get",
-    "clipboard.clear": "handle_clipboard_clear",
+    "clipboard.copy": (14, "handle_clipboard_copy"),
+    "clipboard.cut": (15, "handle_clipboard_cut"),
+    "clipboard.paste": (16, "handle_clipboard_paste"),
+    "clipboard.get": (17, "handle_clipboard_get"),
+    "clipboard.clear": (18, "handle_clipboard_clear"),
 
     # Shell
-    "shell.thumbnail": "handle_shell_thumbnail",
-    "shell.icon": "handle_shell_icon",
-    "shell.contextmenu": "handle_shell_contextmenu",
-    "shell.execute": "handle_shell_execute",
-    "shell.properties": "handle_shell_properties",
-    "shell.open": "handle_shell_open",
-    "shell.recent": "handle_shell_recent",
-    "shell.createShortcut": "handle_shell_create_shortcut",
-    "shell.knownFolders": "handle_shell_known_folders",
+    "shell.thumbnail": (19, "handle_shell_thumbnail"),
+    "shell.thumbnails": (38, "handle_shell_thumbnails"),
+    "shell.icon": (20, "handle_shell_icon"),
+    "shell.contextmenu": (21, "handle_shell_contextmenu"),
+    "shell.execute": (22, "handle_shell_execute"),
+    "shell.properties": (23, "handle_shell_properties"),
+    "shell.open": (24, "handle_shell_open"),
+    "shell.recent": (25, "handle_shell_recent"),
+    "shell.createShortcut": (26, "handle_shell_create_shortcut"),
+    "shell.knownFolders": (27, "handle_shell_known_folders"),
 
     # Theme
-    "theme.list": "handle_theme_list",
-    "theme.get": "handle_theme_get",
-    "theme.save": "handle_theme_save",
-    "theme.delete": "handle_theme_delete",
+    "theme.list": (28, "handle_theme_list"),
+    "theme.get": (29, "handle_theme_get"),
+    "theme.save": (30, "handle_theme_save"),
+    "theme.delete": (31, "handle_theme_delete"),
 
     # 7-Zip
-    "sevenzip.check": "handle_sevenzip_check",
-    "sevenzip.addToArchive": "handle_sevenzip_add",
-    "sevenzip.addToArchiveDialog": "handle_sevenzip_add_dialog",
-    "sevenzip.openArchive": "handle_sevenzip_open",
-    "sevenzip.extract": "handle_sevenzip_extract",
+    "sevenzip.check": (32, "handle_sevenzip_check"),
+    "sevenzip.addToArchive": (33, "handle_sevenzip_add"),
+    "sevenzip.addToArchiveDialog": (34, "handle_sevenzip_add_dialog"),
+    "sevenzip.openArchive": (35, "handle_sevenzip_open"),
+    "sevenzip.extract": (36, "handle_sevenzip_extract"),
 
     # Operation Control
-    "cancel": "handle_cancel",
+    "cancel": (37, "handle_cancel"),
 }
+
+
+# Action handlers registry (keys interned so lookups with interned actions
+# compare by identity; dotted names aren't interned automatically)
+ACTIONS = MappingProxyType(
+    {sys.intern(action): handler for action, (_, handler) in _ACTION_TABLE.items()}
+)
+
+
+def _opcode_name(action: str) -> str:
+    """Map an action name to its op-code name ("fs.writeFile" -> "FS_WRITE_FILE")."""
+    return re.sub(r"(?<=[a-z])(?=[A-Z])|\.", "_", action).upper()
+
+
+# Integer op-codes from the table. Clients may send these instead of action
+# names to skip string hashing in dispatch.
+Action = IntEnum(
+    "Action", [(_opcode_name(action), code) for action, (code, _) in _ACTION_TABLE.items()]
+)
+
+# Handler names indexed by op-code
+ACTION_HANDLERS = tuple(handler for _, handler in sorted(_ACTION_TABLE.values()))
+assert [code for code, _ in sorted(_ACTION_TABLE.values())] == list(range(len(ACTION_HANDLERS))), (
+    "op-codes in _ACTION_TABLE must be unique and contiguous"
+)
+
@@ -1,69 +1,146 @@
+# cython: language_level=3
 """
 ZeroMQ server for X-Plorer backend.
 Handles requests from Electron frontend and publishes file system events.
 """
 
 import asyncio
+import os
 import sys
 import signal
 import logging
+from functools import lru_cache
 from typing import Callable, Any
 
 import zmq
 import zmq.asyncio
-import msgpack
+import msgspec
 
 # Fix for Windows: ZeroMQ needs SelectorEventLoop, not ProactorEventLoop
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-from .protocol import XPRequest, XPResponse, XPError, XPEvent, ErrorCode, ACTIONS
-from .services.file_service import FileService
-from .services.watch_service import WatchService
-from .services.theme_service import ThemeService
+from .protocol import (
+    XPRequest, XPResponse, XPError, XPEvent, ErrorCode, ACTIONS, ACTION_HANDLERS, Action,
+    request_decoder, encoder, DECODE_ERROR_RESPONSE, CANCELLED_ERROR,
+)
+from .services import (
+    FileService,
+    WatchService,
+    ThemeService,
+    ClipboardService,
+    ShellService,
+    SevenZipService,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-DEALER_ENDPOINT = "tcp://127.0.0.1:5555"
-PUB_ENDPOINT = "tcp://127.0.0.1:5556"
+# Unix domain sockets on POSIX; Windows keeps loopback TCP. Both sides can be
+# overridden via XPLORER_DEALER / XPLORER_PUB (the Electron bridge reads the same vars).
+if sys.platform == "win32":
+    DEALER_ENDPOINT = os.environ.get("XPLORER_DEALER", "tcp://127.0.0.1:5555")
+    PUB_ENDPOINT = os.environ.get("XPLORER_PUB", "tcp://127.0.0.1:5556")
+else:
+    DEALER_ENDPOINT = os.environ.get("XPLORER_DEALER", "ipc:///tmp/xplorer.dealer")
+    PUB_ENDPOINT = os.environ.get("XPLORER_PUB", "ipc:///tmp/xplorer.pub")
+
+# Socket tuning for the local Electron link. The default HWM (1000) can stall
+# the publisher during watch bursts. libzmq already disables Nagle on TCP.
+ZMQ_IO_THREADS = 2
+ZMQ_HWM = 100_000
+
+# Request worker pool: bounds concurrent handlers; a full queue backpressures the router.
+# Handlers mostly wait on disk or the shell, so size it like an I/O-bound thread pool.
+REQUEST_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+REQUEST_QUEUE_SIZE = 1024
+
+# Handlers that can run for seconds to minutes. They get their own task instead
+# of a worker, so a few of them can't stall fs.list/fs.info behind them.
+LONG_RUNNING_HANDLERS = frozenset({
+    "handle_fs_copy",
+    "handle_fs_move",
+    "handle_fs_delete",
+    "handle_fs_folder_stats",
+    "handle_fs_folder_size",
+    "handle_fs_search",
+    "handle_sevenzip_add",
+    "handle_sevenzip_add_dialog",
+    "handle_sevenzip_open",
+    "handle_sevenzip_extract",
+})
+
+
+@lru_cache(maxsize=4096)
+def _encode_topic(path: str) -> bytes:
+    """Encode an event path as a PUB topic (watch bursts repeat the same paths)."""
+    return path.encode("utf-8")
 
 
 class XPServer:
     """Main server class for X-Plorer backend."""
 
     def __init__(self):
-        self.context = zmq.asyncio.Context()
+        self.context = zmq.asyncio.Context(io_threads=ZMQ_IO_THREADS)
+        # Events get their own context/I/O thread so watch bursts on PUB don't
+        # contend with request/response traffic on ROUTER
+        self.pub_context = zmq.asyncio.Context(io_threads=1)
         self.router: zmq.asyncio.Socket | None = None
         self.publisher: zmq.asyncio.Socket | None = None
         self.running = False
 
-        # Cancellation token registry: {operation_id: asyncio.Event}
-        self._cancellation_tokens: dict[str, asyncio.Event] = {}
+        # Cancellable operations: {operation_id: task running the handler}
+        self._operations: dict[str, asyncio.Task] = {}
+
+        # Request worker pool (created in start())
+        self._req_queue: asyncio.Queue[tuple[zmq.Frame, XPRequest]] | None = None
+        self._workers: list[asyncio.Task] = []
+        # Long-running requests handled outside the pool (kept referenced until done)
+        self._long_requests: set[asyncio.Task] = set()
 
         # Services
         self.file_service = FileService()
-        self.watch_service = WatchService(self._publish_event)
+        self.watch_service = WatchService(self._publish_events)
         self.theme_service = ThemeService()
 
-    def _create_cancellation_token(self, operation_id: str) -> asyncio.Event:
-        """Create a cancellation token for an operation."""
-        token = asyncio.Event()
-        self._cancellation_tokens[operation_id] = token
-        return token
+        # Dispatch table: action -> bound handler, built once
+        self._dispatch: dict[str, Callable[[dict], Any]] = {
+            action: getattr(self, name)
+            for action, name in ACTIONS.items()
+            if hasattr(self, name)
+        }
+        # Same handlers indexed by Action op-code
+        self._handlers: list[Callable[[dict], Any] | None] = [
+            getattr(self, name, None) for name in ACTION_HANDLERS
+        ]
 
     def _cancel_operation(self, operation_id: str) -> bool:
         """Cancel an operation by ID."""
-        token = self._cancellation_tokens.pop(operation_id, None)
-        if token:
-            token.set()  # Signal cancellation
+        task = self._operations.pop(operation_id, None)
+        if task and not task.done():
+            task.cancel()
             logger.debug(f"Cancelled operation: {operation_id}")
             return True
         return False
 
-    def _cleanup_token(self, operation_id: str):
-        """Remove token after operation completes."""
-        self._cancellation_tokens.pop(operation_id, None)
+    async def _run_operation(self, operation_id: str, handler: Callable, params: dict) -> Any:
+        """Run a handler as its own task so a cancel request can cancel it."""
+        task = asyncio.create_task(handler(params))
+        self._operations[operation_id] = task
+        try:
+            return await task
+        finally:
+            if self._operations.get(operation_id) is task:
+                del self._operations[operation_id]
+
+    @staticmethod
+    def _configure_socket(socket: zmq.asyncio.Socket):
+        """Apply buffering/shutdown options before binding a socket."""
+        socket.setsockopt(zmq.SNDHWM, ZMQ_HWM)
+        socket.setsockopt(zmq.RCVHWM, ZMQ_HWM)
+        socket.setsockopt(zmq.TCP_KEEPALIVE, 1)
+        socket.setsockopt(zmq.LINGER, 0)
+        socket.setsockopt(zmq.IMMEDIATE, 1)
 
     async def start(self):
         """Start the server."""
@@ -71,17 +148,25 @@ class XPServer:
 
         # Create ROUTER socket for request/response
         self.router = self.context.socket(zmq.ROUTER)
+        self._configure_socket(self.router)
         self.router.bind(DEALER_ENDPOINT)
         logger.info(f"ROUTER socket bound to {DEALER_ENDPOINT}")
 
         # Create PUB socket for events
-        self.publisher = self.context.socket(zmq.PUB)
+        self.publisher = self.pub_context.socket(zmq.PUB)
+        self._configure_socket(self.publisher)
         self.publisher.bind(PUB_ENDPOINT)
         logger.info(f"PUB socket bound to {PUB_ENDPOINT}")
 
         # Start watch service
         await self.watch_service.start()
 
+        # Start request workers
+        self._req_queue = asyncio.Queue(maxsize=REQUEST_QUEUE_SIZE)
+        self._workers = [
+            asyncio.create_task(self._request_worker()) for _ in range(REQUEST_WORKERS)
+        ]
+
         self.running = True
         logger.info("Server started successfully")
 
@@ -95,12 +180,19 @@ class XPServer:
 
         await self.watch_service.stop()
 
+        workers, self._workers = self._workers, []
+        workers += self._long_requests
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
         if self.router:
             self.router.close()
         if self.publisher:
             self.publisher.close()
 
         self.context.term()
+        self.pub_context.term()
         logger.info("Server stopped")
 
     async def _receive_loop(self):
@@ -109,16 +201,19 @@ class XPServer:
             try:
                 # Wait for message with timeout to allow checking running flag
                 if await self.router.poll(timeout=100):
-                    frames = await self.router.recv_multipart()
-
-                    if len(frames) >= 2:
-                        identity = frames[0]
-                        message = frames[-1]
-
-                        # Process in background task
-                        asyncio.create_task(
-                            self._handle_request(identity, message)
-                        )
+                    # Drain everything already queued before polling again
+                    while True:
+                        try:
+                            frames = await self.router.recv_multipart(
+                                flags=zmq.NOBLOCK, copy=False
+                            )
+                        except zmq.Again:
+                            break
+
+                        if len(frames) >= 2:
+                            identity = frames[0]
+                            message = frames[-1].buffer
+                            await self._submit_request(identity, message)
 
             except zmq.ZMQError as e:
                 if self.running:
@@ -126,38 +221,64 @@ class XPServer:
             except Exception as e:
                 logger.error(f"Error in receive loop: {e}")
 
-    async def _handle_request(self, identity: bytes, message: bytes):
+    async def _submit_request(self, identity: zmq.Frame, message: memoryview):
+        """Decode a request and queue it for the worker pool."""
+        try:
+            request = request_decoder.decode(message)
+        except msgspec.ValidationError as e:
+            # Well-formed msgpack with bad fields: echo the id so the client
+            # can fail the request instead of waiting for its timeout
+            logger.error(f"Invalid request: {e}")
+            try:
+                raw = msgspec.msgpack.decode(message)
+            except msgspec.DecodeError:
+                raw = None
+            request_id = raw.get("id") if isinstance(raw, dict) else None
+            await self._send_response(identity, XPResponse(
+                id=request_id if isinstance(request_id, str) else "",
+                success=False,
+                error=XPError(code=ErrorCode.INVALID_REQUEST, message=f"Invalid request: {e}"),
+            ))
+            return
+        except msgspec.DecodeError as e:
+            logger.error(f"Failed to decode request: {e}")
+            await self._send_response(identity, DECODE_ERROR_RESPONSE)
+            return
+
+        if isinstance(request.action, str):
+            request.action = sys.intern(request.action)
+        logger.debug(f"Received request: {request.action}")
+
+        if request.action in ("cancel", Action.CANCEL):
+            # Never queue cancellations behind the operations they target
+            await self._handle_request(identity, request)
+        elif self._is_long_running(request.action):
+            task = asyncio.create_task(self._handle_request(identity, request))
+            self._long_requests.add(task)
+            task.add_done_callback(self._long_requests.discard)
+        else:
+            await self._req_queue.put((identity, request))
+
+    async def _request_worker(self):
+        """Worker task: handle queued requests one at a time."""
+        while True:
+            identity, request = await self._req_queue.get()
+            try:
+                await self._handle_request(identity, request)
+            finally:
+                self._req_queue.task_done()
+
+    async def _handle_request(self, identity: zmq.Frame, request: XPRequest):
         """Handle a single request."""
         response: XPResponse
 
         try:
-            # Decode request
-            data = msgpack.unpackb(message, raw=False)
-            request = XPRequest(
-                id=data.get("id", ""),
-                action=data.get("action", ""),
-                params=data.get("params", {}),
-            )
-
-            logger.debug(f"Received request: {request.action}")
-
             # Route to handler
             response = await self._route_request(request)
-
-        except msgpack.UnpackException as e:
-            logger.error(f"Failed to decode request: {e}")
-            response = XPResponse(
-                id="",
-                success=False,
-                error=XPError(
-                    code=ErrorCode.INVALID_REQUEST,
-                    message="Failed to decode request",
-                ),
-            )
         except Exception as e:
             logger.error(f"Error handling request: {e}")
             response = XPResponse(
-                id=data.get("id", "") if "data" in dir() else "",
+                id=request.id,
                 success=False,
                 error=XPError(
                     code=ErrorCode.UNKNOWN,
@@ -165,42 +286,64 @@ class XPServer:
                 ),
             )
 
-        # Send response
+        await self._send_response(identity, response)
+
+    async def _send_response(self, identity: zmq.Frame, response: XPResponse | bytes):
+        """Encode (unless pre-packed) and send a response to the requesting peer."""
         try:
-            response_data = msgpack.packb(response.to_dict())
-            await self.router.send_multipart([identity, response_data])
+            if isinstance(response, bytes):
+                response_data = response
+            else:
+                response_data = encoder.encode(response)
+            await self.router.send_multipart(
+                [identity, zmq.Frame(response_data, copy=False)], copy=False, track=False
+            )
         except Exception as e:
             logger.error(f"Failed to send response: {e}")
 
+    def _is_long_running(self, action: str | int) -> bool:
+        """True for actions whose handler is in LONG_RUNNING_HANDLERS."""
+        handler = self._lookup_handler(action)
+        return handler is not None and handler.__name__ in LONG_RUNNING_HANDLERS
+
+    def _lookup_handler(self, action: str | int) -> Callable[[dict], Any] | None:
+        """Bound handler for an action name or op-code, or None."""
+        if type(action) is int:
+            return self._handlers[action] if 0 <= action < len(self._handlers) else None
+        return self._dispatch.get(action)
+
     async def _route_request(self, request: XPRequest) -> XPResponse:
         """Route request to appropriate handler."""
-        handler_name = ACTIONS.get(request.action)
+        handler = self._lookup_handler(request.action)
 
-        if not handler_name:
-            return XPResponse(
-                id=request.id,
-                success=False,
-                error=XPError(
-                    code=ErrorCode.INVALID_REQUEST,
-                    message=f"Unknown action: {request.action}",
-                ),
-            )
-
-        # Get handler method
-        handler = getattr(self, handler_name, None)
         if not handler:
+            handler_name = ACTIONS.get(request.action)
             return XPResponse(
                 id=request.id,
                 success=False,
                 error=XPError(
                     code=ErrorCode.INVALID_REQUEST,
-                    message=f"Handler not implemented: {handler_name}",
+                    message=(
+                        f"Handler not implemented: {handler_name}" if handler_name
+                        else f"Unknown action: {request.action}"
+                    ),
                 ),
             )
 
         try:
-            result = await handler(request.params)
+            # Requests tagged with an operation_id can be cancelled ("cancel" itself
+            # carries the id of its target)
+            operation_id = request.params.get("operation_id")
+            if operation_id and request.action not in ("cancel", Action.CANCEL):
+                result = await self._run_operation(operation_id, handler, request.params)
+            else:
+                result = await handler(request.params)
             return XPResponse(id=request.id, success=True, data=result)
+        except asyncio.CancelledError:
+            # Re-raise if we are being cancelled ourselves (shutdown), not the operation
+            if asyncio.current_task().cancelling():
+                raise
+            return XPResponse(id=request.id, success=False, error=CANCELLED_ERROR)
         except FileNotFoundError as e:
             return XPResponse(
                 id=request.id,
@@ -214,7 +357,7 @@ class XPServer:
                 error=XPError(code=ErrorCode.ACCESS_DENIED, message=str(e)),
             )
         except Exception as e:
-            logger.error(f"Error in handler {handler_name}: {e}")
+            logger.error(f"Error in handler {handler.__name__}: {e}")
             return XPResponse(
                 id=request.id,
                 success=False,
@@ -225,12 +368,27 @@ class XPServer:
         """Publish an event to subscribers."""
         if self.publisher:
             try:
-                topic = event.path.encode("utf-8")
-                data = msgpack.packb(event.to_dict())
-                await self.publisher.send_multipart([topic, data])
+                topic = _encode_topic(event.path)
+                data = encoder.encode(event)
+                await self.publisher.send_multipart(
+                    [topic, zmq.Frame(data, copy=False)], copy=False, track=False
+                )
             except Exception as e:
                 logger.error(f"Failed to publish event: {e}")
 
+    async def _publish_events(self, events: list[XPEvent]):
+        """Publish a batch of events, collapsing repeats of the same change."""
+        # Keep the last event per (path, type), at the position it last occurred;
+        # renames also key on the old path so distinct moves are all kept
+        latest: dict[tuple[str, Any, Any], XPEvent] = {}
+        for event in events:
+            key = (event.path, event.data.get("eventType"), event.data.get("oldPath"))
+            latest.pop(key, None)
+            latest[key] = event
+
+        for event in latest.values():
+            await self._publish_event(event)
+
     # Operation Control Handler
     async def handle_cancel(self, params: dict) -> dict:
         """Handle operation cancellation request."""
@@ -239,19 +397,8 @@ class XPServer:
         return {"cancelled": cancelled, "operation_id": operation_id}
 
     # File System Handlers
-    async def handle_fs_list(self, params: dict) -> list[dict]:
-        path = params.get("path", "")
-        operation_id = params.get("operation_id")
-
-        cancel_token = None
-        if operation_id:
-            cancel_token = self._create_cancellation_token(operation_id)
-
-        try:
-            return await self.file_service.list_directory(path, cancel_token)
-        finally:
-            if operation_id:
-                self._cleanup_token(operation_id)
+    async def handle_fs_list(self, params: dict) -> list[dict] | msgspec.Raw:
+        return await self.file_service.list_directory(params.get("path", ""))
 
     async def handle_fs_info(self, params: dict) -> dict:
         return await self.file_service.get_file_info(params.get("path", ""))
@@ -260,12 +407,14 @@ class XPServer:
         return await self.file_service.copy_files(
             params.get("sources", []),
             params.get("destination", ""),
+            params.get("conflict_policy", "rename"),
         )
 
     async def handle_fs_move(self, params: dict) -> dict:
         return await self.file_service.move_files(
             params.get("sources", []),
             params.get("destination", ""),
+            params.get("conflict_policy", "rename"),
         )
 
     async def handle_fs_delete(self, params: dict) -> dict:
@@ -293,21 +442,10 @@ class XPServer:
         return await self.file_service.get_folder_stats(params.get("path", ""))
 
     async def handle_fs_folder_size(self, params: dict) -> dict:
-        path = params.get("path", "")
-        operation_id = params.get("operation_id")
-
-        cancel_token = None
-        if operation_id:
-            cancel_token = self._create_cancellation_token(operation_id)
-
-        try:
-            return await self.file_service.get_folder_size(path, cancel_token)
-        finally:
-            if operation_id:
-                self._cleanup_token(operation_id)
+        return await self.file_service.get_folder_size(params.get("path", ""))
 
     async def handle_fs_drives(self, params: dict) -> list[dict]:
-        return await self.file_service.get_drives()
+        return await self.file_service.get_drives(params.get("details", False))
 
     async def handle_fs_watch(self, params: dict) -> dict:
         path = params.get("path", "")
@@ -323,63 +461,53 @@ class XPServer:
         path = params.get("path", "")
         query = params.get("query", "")
         recursive = params.get("recursive", True)
-        operation_id = params.get("operation_id")
-
-        cancel_token = None
-        if operation_id:
-            cancel_token = self._create_cancellation_token(operation_id)
-
-        try:
-            return await self.file_service.search(path, query, recursive, cancel_token)
-        finally:
-            if operation_id:
-                self._cleanup_token(operation_id)
+        return await self.file_service.search(path, query, recursive)
 
     # Clipboard Handlers
     async def handle_clipboard_copy(self, params: dict) -> dict:
-        from .services.clipboard_service import ClipboardService
         return await ClipboardService.copy(
             params.get("paths", []),
             params.get("cut", False),
         )
 
     async def handle_clipboard_cut(self, params: dict) -> dict:
-        from .services.clipboard_service import ClipboardService
         return await ClipboardService.copy(params.get("paths", []), cut=True)
 
     async def handle_clipboard_paste(self, params: dict) -> dict:
-        from .services.clipboard_service import ClipboardService
-        return await ClipboardService.paste(params.get("destination", ""))
+        return await ClipboardService.paste(
+            params.get("destination", ""),
+            params.get("conflict_policy", "rename"),
+        )
 
     async def handle_clipboard_get(self, params: dict) -> list[str]:
-        from .services.clipboard_service import ClipboardService
         return await ClipboardService.get_files()
 
     async def handle_clipboard_clear(self, params: dict) -> dict:
-        from .services.clipboard_service import ClipboardService
         return await ClipboardService.clear()
 
     # Shell Handlers
     async def handle_shell_thumbnail(self, params: dict) -> str:
-        from .services.shell_service import ShellService
         return await ShellService.get_thumbnail(
             params.get("path", ""),
             params.get("size", 96),
         )
 
+    async def handle_shell_thumbnails(self, params: dict) -> dict[str, str]:
+        return await ShellService.get_thumbnails_batch(
+            params.get("paths", []),
+            params.get("size", 96),
+        )
+
     async def handle_shell_icon(self, params: dict) -> str:
-        from .services.shell_service import ShellService
         return await ShellService.get_icon(
             params.get("path", ""),
             params.get("size", 16),
         )
 
     async def handle_shell_contextmenu(self, params: dict) -> list[dict]:
-        from .services.shell_service import ShellService
         return await ShellService.get_context_menu(params.get("paths", []))
 
     async def handle_shell_execute(self, params: dict) -> dict:
-        from .services.shell_service import ShellService
         return await ShellService.execute(
             params.get("path", ""),
             params.get("verb", "open"),
@@ -388,26 +516,21 @@ class XPServer:
         )
 
     async def handle_shell_properties(self, params: dict) -> dict:
-        from .services.shell_service import ShellService
         return await ShellService.show_properties(params.get("path", ""))
 
     async def handle_shell_open(self, params: dict) -> dict:
-        from .services.shell_service import ShellService
         return await ShellService.open_file(params.get("path", ""))
 
     async def handle_shell_recent(self, params: dict) -> list[dict]:
-        from .services.shell_service import ShellService
         return await ShellService.get_recent_files(params.get("limit", 20))
 
     async def handle_shell_create_shortcut(self, params: dict) -> dict:
-        from .services.shell_service import ShellService
         return await ShellService.create_shortcut(
             params.get("targetPath", ""),
             params.get("shortcutPath", ""),
         )
 
     async def handle_shell_known_folders(self, params: dict) -> dict:
-        from .services.shell_service import ShellService
         return await ShellService.get_known_folder_paths()
 
     # Theme Handlers
@@ -425,11 +548,9 @@ class XPServer:
 
     # 7-Zip Handlers
     async def handle_sevenzip_check(self, params: dict) -> dict:
-        from .services.sevenzip_service import SevenZipService
         return await SevenZipService.is_installed()
 
     async def handle_sevenzip_add(self, params: dict) -> dict:
-        from .services.sevenzip_service import SevenZipService
         return await SevenZipService.add_to_archive(
             params.get("paths", []),
             params.get("archivePath", ""),
@@ -437,17 +558,14 @@ class XPServer:
         )
 
     async def handle_sevenzip_add_dialog(self, params: dict) -> dict:
-        from .services.sevenzip_service import SevenZipService
         return await SevenZipService.show_add_to_archive_dialog(
             params.get("paths", []),
         )
 
     async def handle_sevenzip_open(self, params: dict) -> dict:
-        from .services.sevenzip_service import SevenZipService
         return await SevenZipService.open_archive(params.get("path", ""))
 
     async def handle_sevenzip_extract(self, params: dict) -> dict:
-        from .services.sevenzip_service import SevenZipService
         return await SevenZipService.extract_archive(
             params.get("archivePath", ""),
             params.get("destination"),
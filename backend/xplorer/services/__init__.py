@@ -5,5 +5,15 @@ X-Plorer backend services.
 from .file_service import FileService
 from .watch_service import WatchService
 from .theme_service import ThemeService
+from .clipboard_service import ClipboardService
+from .shell_service import ShellService
+from .sevenzip_service import SevenZipService
 
-__all__ = ["FileService", "WatchService", "ThemeService"]
+__all__ = [
+    "FileService",
+    "WatchService",
+    "ThemeService",
+    "ClipboardService",
+    "ShellService",
+    "SevenZipService",
+]
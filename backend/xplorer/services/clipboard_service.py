@@ -4,82 +4,198 @@ Windows clipboard service for file operations.
 
 import ctypes
 from ctypes import wintypes
-import os
+import sys
+import time
+import asyncio
 import logging
-from typing import Any
+from typing import Any, Callable, TypeVar
+
+from .file_service import ConflictPolicy, _copy_file, _move_or_rename, _plan_transfers
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Windows clipboard formats
 CF_HDROP = 15
 GMEM_MOVEABLE = 0x0002
 GMEM_ZEROINIT = 0x0040
 
+# Longest path Windows accepts (\\?\ prefixed, long paths enabled)
+MAX_LONG_PATH = 32768
+
 # Drop effect values
 DROPEFFECT_COPY = 1
 DROPEFFECT_MOVE = 2
 
+# OpenClipboard retry: exponential backoff under a total deadline (seconds)
+OPEN_RETRY_INITIAL_DELAY = 0.001
+OPEN_RETRY_MAX_DELAY = 0.05
+OPEN_RETRY_DEADLINE = 0.5
+
 # Set up proper Windows API function signatures
-kernel32 = ctypes.windll.kernel32
-user32 = ctypes.windll.user32
-shell32 = ctypes.windll.shell32
+if sys.platform == "win32":
+    kernel32 = ctypes.windll.kernel32
+    user32 = ctypes.windll.user32
+    shell32 = ctypes.windll.shell32
+
+    # GlobalAlloc
+    kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
+    kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+
+    # GlobalLock
+    kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalLock.restype = ctypes.c_void_p
+
+    # GlobalUnlock
+    kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalUnlock.restype = wintypes.BOOL
+
+    # GlobalFree
+    kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalFree.restype = wintypes.HGLOBAL
+
+    # GlobalSize
+    kernel32.GlobalSize.argtypes = [wintypes.HGLOBAL]
+    kernel32.GlobalSize.restype = ctypes.c_size_t
+
+    # OpenClipboard
+    user32.OpenClipboard.argtypes = [wintypes.HWND]
+    user32.OpenClipboard.restype = wintypes.BOOL
+
+    # CloseClipboard
+    user32.CloseClipboard.argtypes = []
+    user32.CloseClipboard.restype = wintypes.BOOL
+
+    # EmptyClipboard
+    user32.EmptyClipboard.argtypes = []
+    user32.EmptyClipboard.restype = wintypes.BOOL
+
+    # SetClipboardData
+    user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
+    user32.SetClipboardData.restype = wintypes.HANDLE
+
+    # GetClipboardData
+    user32.GetClipboardData.argtypes = [wintypes.UINT]
+    user32.GetClipboardData.restype = wintypes.HANDLE
+
+    # RegisterClipboardFormatW
+    user32.RegisterClipboardFormatW.argtypes = [wintypes.LPCWSTR]
+    user32.RegisterClipboardFormatW.restype = wintypes.UINT
+
+    # DragQueryFileW - for getting files from HDROP
+    shell32.DragQueryFileW.argtypes = [
+        wintypes.HANDLE, wintypes.UINT, wintypes.LPWSTR, wintypes.UINT,
+    ]
+    shell32.DragQueryFileW.restype = wintypes.UINT
 
-# GlobalAlloc
-kernel32.GlobalAlloc.argtypes = [wintypes.UINT, ctypes.c_size_t]
-kernel32.GlobalAlloc.restype = wintypes.HGLOBAL
+    # Registered once; the ID is stable for the session
+    CF_PREFERRED_DROPEFFECT = user32.RegisterClipboardFormatW("Preferred DropEffect")
 
-# GlobalLock
-kernel32.GlobalLock.argtypes = [wintypes.HGLOBAL]
-kernel32.GlobalLock.restype = ctypes.c_void_p
 
-# GlobalUnlock
-kernel32.GlobalUnlock.argtypes = [wintypes.HGLOBAL]
-kernel32.GlobalUnlock.restype = wintypes.BOOL
+class DROPFILES(ctypes.Structure):
+    _fields_ = [
+        ("pFiles", wintypes.DWORD),
+        ("pt", wintypes.POINT),
+        ("fNC", wintypes.BOOL),
+        ("fWide", wintypes.BOOL),
+    ]
 
-# GlobalFree
-kernel32.GlobalFree.argtypes = [wintypes.HGLOBAL]
-kernel32.GlobalFree.restype = wintypes.HGLOBAL
 
-# GlobalSize
-kernel32.GlobalSize.argtypes = [wintypes.HGLOBAL]
-kernel32.GlobalSize.restype = ctypes.c_size_t
+# The CF_HDROP header never changes: wide file list right after the struct
+DROPFILES_HEADER = bytes(DROPFILES(pFiles=ctypes.sizeof(DROPFILES), fWide=True))
 
-# OpenClipboard
-user32.OpenClipboard.argtypes = [wintypes.HWND]
-user32.OpenClipboard.restype = wintypes.BOOL
+# Preferred DropEffect payload for cut
+DROPEFFECT_MOVE_BYTES = bytes(wintypes.DWORD(DROPEFFECT_MOVE))
 
-# CloseClipboard
-user32.CloseClipboard.argtypes = []
-user32.CloseClipboard.restype = wintypes.BOOL
 
-# EmptyClipboard
-user32.EmptyClipboard.argtypes = []
-user32.EmptyClipboard.restype = wintypes.BOOL
+def _wchar_len(text: str) -> int:
+    """Length of text in UTF-16 code units (astral characters take two)."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
 
-# SetClipboardData
-user32.SetClipboardData.argtypes = [wintypes.UINT, wintypes.HANDLE]
-user32.SetClipboardData.restype = wintypes.HANDLE
 
-# GetClipboardData
-user32.GetClipboardData.argtypes = [wintypes.UINT]
-user32.GetClipboardData.restype = wintypes.HANDLE
+async def _open_clipboard() -> bool:
+    """
+    Open the clipboard, retrying while another process holds it.
 
-# RegisterClipboardFormatW
-user32.RegisterClipboardFormatW.argtypes = [wintypes.LPCWSTR]
-user32.RegisterClipboardFormatW.restype = wintypes.UINT
+    Other apps (Explorer, Office) open the clipboard briefly to peek at new
+    data, so back off from 1ms up to 50ms until the deadline passes.
+    """
+    deadline = time.perf_counter() + OPEN_RETRY_DEADLINE
+    delay = OPEN_RETRY_INITIAL_DELAY
 
-# DragQueryFileW - for getting files from HDROP
-shell32.DragQueryFileW.argtypes = [wintypes.HANDLE, wintypes.UINT, wintypes.LPWSTR, wintypes.UINT]
-shell32.DragQueryFileW.restype = wintypes.UINT
+    while True:
+        if user32.OpenClipboard(None):
+            return True
+        if time.perf_counter() + delay > deadline:
+            return False
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, OPEN_RETRY_MAX_DELAY)
 
 
-class DROPFILES(ctypes.Structure):
-    _fields_ = [
-        ("pFiles", wintypes.DWORD),
-        ("pt", wintypes.POINT),
-        ("fNC", wintypes.BOOL),
-        ("fWide", wintypes.BOOL),
-    ]
+def _query_drop_files() -> list[str]:
+    """Read the CF_HDROP file list. The clipboard must already be open."""
+    h_drop = user32.GetClipboardData(CF_HDROP)
+    if not h_drop:
+        return []
+
+    # Get number of files (0xFFFFFFFF = -1 as UINT means get count)
+    count = shell32.DragQueryFileW(h_drop, 0xFFFFFFFF, None, 0)
+    files = [None] * count
+
+    # One buffer big enough for any path, so MAX_PATH never truncates
+    buffer = ctypes.create_unicode_buffer(MAX_LONG_PATH)
+    for i in range(count):
+        length = shell32.DragQueryFileW(h_drop, i, buffer, MAX_LONG_PATH)
+        if length >= MAX_LONG_PATH - 1:
+            # Possibly truncated; ask for the exact size
+            length = shell32.DragQueryFileW(h_drop, i, None, 0)
+            long_buffer = ctypes.create_unicode_buffer(length + 1)
+            length = shell32.DragQueryFileW(h_drop, i, long_buffer, length + 1)
+            files[i] = long_buffer.value if length > 0 else None
+        elif length > 0:
+            files[i] = buffer.value
+
+    return [path for path in files if path]
+
+
+def _query_is_cut() -> bool:
+    """Check the Preferred DropEffect for a cut. The clipboard must already be open."""
+    if not CF_PREFERRED_DROPEFFECT:
+        return False
+
+    h_data = user32.GetClipboardData(CF_PREFERRED_DROPEFFECT)
+    if not h_data:
+        return False
+
+    p_data = kernel32.GlobalLock(h_data)
+    if not p_data:
+        return False
+
+    try:
+        effect = wintypes.DWORD.from_address(p_data).value
+        return (effect & DROPEFFECT_MOVE) != 0
+    finally:
+        kernel32.GlobalUnlock(h_data)
+
+
+def _read_clipboard_locked() -> tuple[list[str], bool]:
+    """Read the file list and whether it was cut. The clipboard must already be open."""
+    files = _query_drop_files()
+    return files, bool(files) and _query_is_cut()
+
+
+async def _with_clipboard(fn: Callable[[], T]) -> T:
+    """Run fn with the clipboard open (retrying while it's busy), then close it."""
+    if not await _open_clipboard():
+        raise OSError("Failed to open clipboard - it may be in use by another application")
+
+    try:
+        return fn()
+    finally:
+        user32.CloseClipboard()
 
 
 class ClipboardService:
@@ -96,12 +212,7 @@ class ClipboardService:
 
         try:
             # Open clipboard with retries (clipboard may be temporarily locked)
-            for _ in range(3):
-                if user32.OpenClipboard(None):
-                    clipboard_opened = True
-                    break
-                import time
-                time.sleep(0.1)
+            clipboard_opened = await _open_clipboard()
 
             if not clipboard_opened:
                 raise OSError("Failed to open clipboard - it may be in use by another application")
@@ -109,12 +220,9 @@ class ClipboardService:
             # Empty clipboard
             user32.EmptyClipboard()
 
-            # Build file list (double-null terminated)
-            file_list = "\0".join(paths) + "\0\0"
-            file_list_bytes = file_list.encode("utf-16-le")
-
-            # Calculate buffer size
-            buffer_size = ctypes.sizeof(DROPFILES) + len(file_list_bytes)
+            # DROPFILES header + file list (each null terminated, plus a final null)
+            path_sizes = [(_wchar_len(path) + 1) * 2 for path in paths]
+            buffer_size = len(DROPFILES_HEADER) + sum(path_sizes) + 2
 
             # Allocate global memory
             h_global = kernel32.GlobalAlloc(GMEM_MOVEABLE | GMEM_ZEROINIT, buffer_size)
@@ -129,21 +237,12 @@ class ClipboardService:
                 raise OSError(f"Failed to lock global memory (error {error_code})")
 
             try:
-                # Write DROPFILES structure
-                drop_files = DROPFILES.from_address(p_global)
-                drop_files.pFiles = ctypes.sizeof(DROPFILES)
-                drop_files.fWide = True
-                drop_files.fNC = False
-                drop_files.pt.x = 0
-                drop_files.pt.y = 0
-
-                # Write file list after structure
-                ctypes.memmove(
-                    p_global + ctypes.sizeof(DROPFILES),
-                    file_list_bytes,
-                    len(file_list_bytes),
-                )
-
+                # Paths go straight into the block; GMEM_ZEROINIT supplies the nulls
+                ctypes.memmove(p_global, DROPFILES_HEADER, len(DROPFILES_HEADER))
+                offset = p_global + len(DROPFILES_HEADER)
+                for path, size in zip(paths, path_sizes):
+                    ctypes.memmove(offset, path, size - 2)
+                    offset += size
             finally:
                 kernel32.GlobalUnlock(h_global)
 
@@ -158,20 +257,18 @@ class ClipboardService:
 
             # Set drop effect for cut operation
             if cut:
-                # Register and set drop effect format
-                cf_preferred = user32.RegisterClipboardFormatW("Preferred DropEffect")
-                if cf_preferred:
-                    effect_size = ctypes.sizeof(wintypes.DWORD)
+                # Set drop effect format
+                if CF_PREFERRED_DROPEFFECT:
+                    effect_size = len(DROPEFFECT_MOVE_BYTES)
                     h_effect = kernel32.GlobalAlloc(GMEM_MOVEABLE, effect_size)
                     if h_effect:
                         p_effect = kernel32.GlobalLock(h_effect)
                         if p_effect:
                             try:
-                                effect = wintypes.DWORD.from_address(p_effect)
-                                effect.value = DROPEFFECT_MOVE
+                                ctypes.memmove(p_effect, DROPEFFECT_MOVE_BYTES, effect_size)
                             finally:
                                 kernel32.GlobalUnlock(h_effect)
-                            if not user32.SetClipboardData(cf_preferred, h_effect):
+                            if not user32.SetClipboardData(CF_PREFERRED_DROPEFFECT, h_effect):
                                 kernel32.GlobalFree(h_effect)
 
             return {
@@ -192,61 +289,30 @@ class ClipboardService:
                 user32.CloseClipboard()
 
     @staticmethod
-    async def paste(destination: str) -> dict[str, Any]:
+    async def paste(destination: str, conflict_policy: ConflictPolicy = "rename") -> dict[str, Any]:
         """Paste files from clipboard to destination."""
         if not destination:
             return {"success": False, "error": "No destination provided"}
 
         try:
-            files = await ClipboardService.get_files()
+            # File list and cut flag in one clipboard session
+            files, is_cut = await _with_clipboard(_read_clipboard_locked)
             if not files:
                 return {"success": False, "error": "No files in clipboard"}
 
-            # Check if it's a cut operation
-            is_cut = False
-            try:
-                if user32.OpenClipboard(None):
-                    try:
-                        cf_preferred = user32.RegisterClipboardFormatW(
-                            "Preferred DropEffect"
-                        )
-                        if cf_preferred:
-                            h_data = user32.GetClipboardData(cf_preferred)
-                            if h_data:
-                                p_data = kernel32.GlobalLock(h_data)
-                                if p_data:
-                                    effect = wintypes.DWORD.from_address(p_data).value
-                                    is_cut = (effect & DROPEFFECT_MOVE) != 0
-                                    kernel32.GlobalUnlock(h_data)
-                    finally:
-                        user32.CloseClipboard()
-            except Exception:
-                pass
+            # Handle conflicts
+            calls, skipped, errors = _plan_transfers(files, destination, conflict_policy)
 
             # Perform file operations
-            import shutil
-            results = {"copied": [], "moved": [], "errors": []}
+            results = {"copied": [], "moved": [], "skipped": skipped, "errors": errors}
 
-            for src in files:
+            for src, dst in calls:
                 try:
-                    name = os.path.basename(src)
-                    dst = os.path.join(destination, name)
-
-                    # Handle conflicts
-                    counter = 1
-                    base, ext = os.path.splitext(name)
-                    while os.path.exists(dst):
-                        dst = os.path.join(destination, f"{base} ({counter}){ext}")
-                        counter += 1
-
                     if is_cut:
-                        shutil.move(src, dst)
+                        _move_or_rename(src, dst)
                         results["moved"].append({"source": src, "destination": dst})
                     else:
-                        if os.path.isdir(src):
-                            shutil.copytree(src, dst)
-                        else:
-                            shutil.copy2(src, dst)
+                        _copy_file(src, dst)
                         results["copied"].append({"source": src, "destination": dst})
 
                 except Exception as e:
@@ -265,47 +331,17 @@ class ClipboardService:
     @staticmethod
     async def get_files() -> list[str]:
         """Get list of files from clipboard."""
-        files = []
-
         try:
-            if not user32.OpenClipboard(None):
-                return files
-
-            try:
-                h_drop = user32.GetClipboardData(CF_HDROP)
-                if not h_drop:
-                    return files
-
-                # Get number of files (0xFFFFFFFF = -1 as UINT means get count)
-                count = shell32.DragQueryFileW(h_drop, 0xFFFFFFFF, None, 0)
-
-                # Get each file path
-                buffer = ctypes.create_unicode_buffer(260)
-                for i in range(count):
-                    length = shell32.DragQueryFileW(h_drop, i, buffer, 260)
-                    if length > 0:
-                        files.append(buffer.value)
-
-            finally:
-                user32.CloseClipboard()
-
+            return await _with_clipboard(_query_drop_files)
         except Exception as e:
             logger.error(f"Error getting files from clipboard: {e}")
-
-        return files
+            return []
 
     @staticmethod
     async def clear() -> dict[str, Any]:
         """Clear the clipboard."""
         try:
-            if not user32.OpenClipboard(None):
-                raise OSError("Failed to open clipboard")
-
-            try:
-                user32.EmptyClipboard()
-            finally:
-                user32.CloseClipboard()
-
+            await _with_clipboard(user32.EmptyClipboard)
             return {"success": True}
 
         except Exception as e:
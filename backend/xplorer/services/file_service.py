@@ -4,15 +4,21 @@ Provides file operations with fallback to pure Python when Cython modules aren't
 """
 
 import os
+import sys
+import atexit
+import functools
 import stat
 import asyncio
 import shutil
 import mimetypes
+import threading
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, Callable, Literal
 from concurrent.futures import ThreadPoolExecutor
 import logging
 
+import msgspec
+
 logger = logging.getLogger(__name__)
 
 # Try to import Cython modules, fall back to pure Python
@@ -24,31 +30,209 @@ except ImportError:
     USE_CYTHON = False
     logger.info("Cython modules not available, using pure Python")
 
-# Thread pool for blocking operations
-_executor = ThreadPoolExecutor(max_workers=4)
+
+@functools.cache
+def _get_executor() -> ThreadPoolExecutor:
+    """Thread pool for blocking operations, created on first use."""
+    # IO-bound, so oversubscribe the CPUs
+    executor = ThreadPoolExecutor(
+        max_workers=min(32, (os.cpu_count() or 4) * 4),
+        thread_name_prefix="xplorer-fs",
+    )
+    atexit.register(executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+
+# Extension -> MIME type, built once instead of guess_type() per entry
+mimetypes.init()
+_EXT_MIME = {ext.lower(): mime for ext, mime in mimetypes.types_map.items()}
+
+# MoveFileExW flags
+MOVEFILE_REPLACE_EXISTING = 0x1
+MOVEFILE_COPY_ALLOWED = 0x2
+MOVEFILE_WRITE_THROUGH = 0x8
+ERROR_NOT_SAME_DEVICE = 17
+
+# File attributes
+FILE_ATTRIBUTE_READONLY = 0x1
+FILE_ATTRIBUTE_HIDDEN = 0x2
+FILE_ATTRIBUTE_SYSTEM = 0x4
+
+# What copy/move/paste do when the destination name is taken
+ConflictPolicy = Literal["rename", "overwrite", "skip", "error"]
+CONFLICT_POLICIES = ("rename", "overwrite", "skip", "error")
+
+# Drive types whose volume queries can block (no media, SMB roundtrips)
+DRIVE_REMOVABLE = 2
+DRIVE_REMOTE = 4
+DRIVE_CDROM = 5
+SLOW_DRIVE_TYPES = frozenset((DRIVE_REMOVABLE, DRIVE_REMOTE, DRIVE_CDROM))
+
+# Fallback when drive enumeration fails
+DEFAULT_DRIVES = [{
+    "letter": "C:",
+    "name": "Local Disk",
+    "type": 3,
+    "totalSize": 0,
+    "freeSpace": 0,
+    "fileSystem": "NTFS",
+    "isReady": True,
+}]
+
+# Shell file operations
+FO_DELETE = 3
+FOF_SILENT = 0x4
+FOF_NOCONFIRMATION = 0x10
+FOF_ALLOWUNDO = 0x40
+FOF_NOERRORUI = 0x400
+
+# Win32 bindings, resolved once at import
+if sys.platform == "win32":
+    import ctypes
+    from ctypes import wintypes
+
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _shell32 = ctypes.WinDLL("shell32")
+
+    # No "insert a disk" dialogs when probing empty removable drives
+    SEM_FAILCRITICALERRORS = 0x1
+    _kernel32.SetErrorMode(SEM_FAILCRITICALERRORS)
+
+    # SHFILEOPSTRUCT requires pFrom to be a buffer (not a pointer to string)
+    # with double null termination
+    class SHFILEOPSTRUCTW(ctypes.Structure):
+        _fields_ = [
+            ("hwnd", wintypes.HWND),
+            ("wFunc", ctypes.c_uint),
+            ("pFrom", ctypes.c_wchar_p),
+            ("pTo", ctypes.c_wchar_p),
+            ("fFlags", wintypes.WORD),
+            ("fAnyOperationsAborted", wintypes.BOOL),
+            ("hNameMappings", ctypes.c_void_p),
+            ("lpszProgressTitle", ctypes.c_wchar_p),
+        ]
+
+    _SHFileOperationW = _shell32.SHFileOperationW
+    _SHFileOperationW.argtypes = [ctypes.POINTER(SHFILEOPSTRUCTW)]
+    _SHFileOperationW.restype = ctypes.c_int
+
+    _GetLogicalDrives = _kernel32.GetLogicalDrives
+    _GetLogicalDrives.argtypes = []
+    _GetLogicalDrives.restype = wintypes.DWORD
+
+    _GetDriveTypeW = _kernel32.GetDriveTypeW
+    _GetDriveTypeW.argtypes = [wintypes.LPCWSTR]
+    _GetDriveTypeW.restype = wintypes.UINT
+
+    _GetVolumeInformationW = _kernel32.GetVolumeInformationW
+    _GetVolumeInformationW.argtypes = [
+        wintypes.LPCWSTR,               # lpRootPathName
+        wintypes.LPWSTR,                # lpVolumeNameBuffer
+        wintypes.DWORD,                 # nVolumeNameSize
+        wintypes.LPDWORD,               # lpVolumeSerialNumber
+        wintypes.LPDWORD,               # lpMaximumComponentLength
+        wintypes.LPDWORD,               # lpFileSystemFlags
+        wintypes.LPWSTR,                # lpFileSystemNameBuffer
+        wintypes.DWORD,                 # nFileSystemNameSize
+    ]
+    _GetVolumeInformationW.restype = wintypes.BOOL
+
+    _GetDiskFreeSpaceExW = _kernel32.GetDiskFreeSpaceExW
+    _GetDiskFreeSpaceExW.argtypes = [
+        wintypes.LPCWSTR,
+        ctypes.POINTER(ctypes.c_ulonglong),
+        ctypes.POINTER(ctypes.c_ulonglong),
+        ctypes.POINTER(ctypes.c_ulonglong),
+    ]
+    _GetDiskFreeSpaceExW.restype = wintypes.BOOL
+
+    _CopyFileExW = _kernel32.CopyFileExW
+    _CopyFileExW.argtypes = [
+        wintypes.LPCWSTR,   # lpExistingFileName
+        wintypes.LPCWSTR,   # lpNewFileName
+        ctypes.c_void_p,    # lpProgressRoutine
+        wintypes.LPVOID,    # lpData
+        wintypes.LPBOOL,    # pbCancel
+        wintypes.DWORD,     # dwCopyFlags
+    ]
+    _CopyFileExW.restype = wintypes.BOOL
+
+    _MoveFileExW = _kernel32.MoveFileExW
+    _MoveFileExW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD]
+    _MoveFileExW.restype = wintypes.BOOL
+
+
+async def _run_cancellable(func: Callable[[Callable[[], bool]], Any]) -> Any:
+    """
+    Run func(is_cancelled) in the thread pool.
+
+    Cancelling the awaiting task can't interrupt the worker thread, so it
+    also sets the flag the worker polls through is_cancelled().
+    """
+    cancelled = threading.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), func, cancelled.is_set)
+    except asyncio.CancelledError:
+        cancelled.set()
+        raise
+
+
+async def _run_batch(func: Callable[..., Any], calls: list[tuple]) -> list[Any]:
+    """
+    Run func(*args) for each args tuple concurrently in the thread pool.
+
+    Results come back in order; a failed call yields its exception instead.
+    """
+    loop = asyncio.get_running_loop()
+    if len(calls) == 1:
+        try:
+            return [await loop.run_in_executor(_get_executor(), func, *calls[0])]
+        except Exception as e:
+            return [e]
+
+    return await asyncio.gather(
+        *(loop.run_in_executor(_get_executor(), func, *args) for args in calls),
+        return_exceptions=True,
+    )
 
 
-def _get_file_info(path: str) -> dict[str, Any]:
-    """Get file information for a single file."""
+def _get_file_info(path: str, entry: os.DirEntry | None = None) -> dict[str, Any]:
+    """
+    Get file information for a single file.
+
+    When a DirEntry from os.scandir is given, its cached stat is used, which
+    on Windows comes from the directory enumeration with no extra syscall.
+    """
     try:
-        stat_result = os.stat(path)
+        if entry is not None:
+            stat_result = entry.stat()
+            name = entry.name
+        else:
+            stat_result = os.stat(path)
+            name = os.path.basename(path)
         is_dir = stat.S_ISDIR(stat_result.st_mode)
-        name = os.path.basename(path)
-        extension = "" if is_dir else os.path.splitext(name)[1]
+        dot = name.rfind(".")
+        extension = "" if is_dir or dot <= 0 else name[dot:]
+        if is_dir:
+            mime_type = None
+        else:
+            mime_type = _EXT_MIME.get(extension.lower())
+            if mime_type is None and extension:
+                # Rare types and compound suffixes (.tar.gz)
+                mime_type = mimetypes.guess_type(path)[0]
 
         # Check file attributes on Windows
         is_hidden = False
         is_system = False
         is_readonly = False
 
-        try:
-            import ctypes
-            attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
-            if attrs != -1:
-                is_hidden = bool(attrs & 0x2)  # FILE_ATTRIBUTE_HIDDEN
-                is_system = bool(attrs & 0x4)  # FILE_ATTRIBUTE_SYSTEM
-                is_readonly = bool(attrs & 0x1)  # FILE_ATTRIBUTE_READONLY
-        except Exception:
+        if sys.platform == "win32":
+            attrs = stat_result.st_file_attributes
+            is_hidden = bool(attrs & FILE_ATTRIBUTE_HIDDEN)
+            is_system = bool(attrs & FILE_ATTRIBUTE_SYSTEM)
+            is_readonly = bool(attrs & FILE_ATTRIBUTE_READONLY)
+        else:
             # Fall back to name-based hidden detection
             is_hidden = name.startswith(".")
 
@@ -64,7 +248,7 @@ def _get_file_info(path: str) -> dict[str, Any]:
             "modifiedAt": int(stat_result.st_mtime),
             "accessedAt": int(stat_result.st_atime),
             "extension": extension,
-            "mimeType": mimetypes.guess_type(path)[0] if not is_dir else None,
+            "mimeType": mime_type,
         }
     except OSError as e:
         logger.error(f"Error getting file info for {path}: {e}")
@@ -84,7 +268,7 @@ def _list_directory(path: str, cancel_check: Callable[[], bool] | None = None) -
                     return []
 
                 try:
-                    result.append(_get_file_info(entry.path))
+                    result.append(_get_file_info(entry.path, entry))
                 except (OSError, PermissionError) as e:
                     logger.warning(f"Skipping {entry.path}: {e}")
                     continue
@@ -95,149 +279,201 @@ def _list_directory(path: str, cancel_check: Callable[[], bool] | None = None) -
     return result
 
 
-def _get_drives() -> list[dict[str, Any]]:
-    """Get list of available drives (Windows)."""
-    drives = []
-
+def _entry_info(entry: os.DirEntry) -> dict[str, Any] | None:
+    """File info for a DirEntry, or None if it vanished or is inaccessible."""
     try:
-        import ctypes
-        from ctypes import wintypes
-
-        kernel32 = ctypes.windll.kernel32
-
-        # Get logical drives bitmask
-        bitmask = kernel32.GetLogicalDrives()
-
-        for i in range(26):
-            if bitmask & (1 << i):
-                letter = chr(ord("A") + i) + ":"
-                drive_path = letter + "\\"
-
-                # Get drive type
-                drive_type = kernel32.GetDriveTypeW(drive_path)
-
-                # Get volume information
-                name_buffer = ctypes.create_unicode_buffer(256)
-                fs_buffer = ctypes.create_unicode_buffer(256)
-
-                success = kernel32.GetVolumeInformationW(
-                    drive_path,
-                    name_buffer,
-                    256,
-                    None,
-                    None,
-                    None,
-                    fs_buffer,
-                    256,
-                )
+        return _get_file_info(entry.path, entry)
+    except OSError:
+        return None
+
+
+def _folder_size(path: str, is_cancelled: Callable[[], bool]) -> int | None:
+    """Total size of all files under path, or None if cancelled."""
+    total_size = 0
+    check_interval = 500  # Check cancellation every N entries
+    count = 0
+    stack = [path]
 
-                # Get disk space
-                free_bytes = ctypes.c_ulonglong()
-                total_bytes = ctypes.c_ulonglong()
+    while stack:
+        # Check cancellation at each directory
+        if is_cancelled():
+            return None
+
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                count += 1
+                # Check cancellation periodically
+                if count % check_interval == 0 and is_cancelled():
+                    return None
 
                 try:
-                    kernel32.GetDiskFreeSpaceExW(
-                        drive_path,
-                        None,
-                        ctypes.byref(total_bytes),
-                        ctypes.byref(free_bytes),
-                    )
-                except Exception:
-                    pass
-
-                drives.append({
-                    "letter": letter,
-                    "name": name_buffer.value if success else "",
-                    "type": drive_type,
-                    "totalSize": total_bytes.value,
-                    "freeSpace": free_bytes.value,
-                    "fileSystem": fs_buffer.value if success else "",
-                    "isReady": success,
-                })
-
-    except Exception as e:
-        logger.error(f"Error getting drives: {e}")
-        # Fallback
-        drives = [{"letter": "C:", "name": "Local Disk", "type": 3, "totalSize": 0, "freeSpace": 0, "fileSystem": "NTFS", "isReady": True}]
+                    if entry.is_dir():
+                        # Like os.walk, don't descend into directory links
+                        if not entry.is_symlink():
+                            stack.append(entry.path)
+                    else:
+                        total_size += entry.stat().st_size
+                except OSError:
+                    continue
+
+    return total_size
+
+
+def _enumerate_drives() -> list[tuple[str, int]]:
+    """Get (letter, drive type) for each logical drive. Doesn't touch the volumes."""
+    drives = []
+
+    # Get logical drives bitmask
+    bitmask = _GetLogicalDrives()
+
+    for i in range(26):
+        if bitmask & (1 << i):
+            letter = chr(ord("A") + i) + ":"
+            drives.append((letter, _GetDriveTypeW(letter + "\\")))
 
     return drives
 
 
+def _get_drive_details(letter: str, drive_type: int, probe: bool = True) -> dict[str, Any]:
+    """Get label, filesystem and space for a drive. Skips the volume queries if not probe."""
+    drive_path = letter + "\\"
+    name_buffer = ctypes.create_unicode_buffer(256)
+    fs_buffer = ctypes.create_unicode_buffer(256)
+    free_bytes = ctypes.c_ulonglong()
+    total_bytes = ctypes.c_ulonglong()
+    success = False
+
+    if probe:
+        # Get volume information
+        success = bool(_GetVolumeInformationW(
+            drive_path,
+            name_buffer,
+            256,
+            None,
+            None,
+            None,
+            fs_buffer,
+            256,
+        ))
+
+        # Get disk space
+        _GetDiskFreeSpaceExW(
+            drive_path,
+            None,
+            ctypes.byref(total_bytes),
+            ctypes.byref(free_bytes),
+        )
+
+    return {
+        "letter": letter,
+        "name": name_buffer.value if success else "",
+        "type": drive_type,
+        "totalSize": total_bytes.value,
+        "freeSpace": free_bytes.value,
+        "fileSystem": fs_buffer.value if success else "",
+        "isReady": success,
+    }
+
+
 def _copy_file(src: str, dst: str) -> None:
     """Copy a single file or directory."""
     if os.path.isdir(src):
-        shutil.copytree(src, dst)
+        # Only an "overwrite" conflict policy hands us an existing target
+        shutil.copytree(src, dst, dirs_exist_ok=True)
+    elif sys.platform == "win32":
+        # Like copy2, CopyFileExW preserves attributes and timestamps
+        if not _CopyFileExW(src, dst, None, None, None, 0):
+            raise ctypes.WinError(ctypes.get_last_error())
     else:
         shutil.copy2(src, dst)
 
 
-def _move_file(src: str, dst: str) -> None:
-    """Move a single file or directory."""
-    shutil.move(src, dst)
+def _move_or_rename(src: str, dst: str, replace: bool = True) -> None:
+    """
+    Move or rename a single file or directory.
+
+    Same-volume moves are a directory-entry update; across volumes MoveFileExW
+    copies. With replace=False an existing dst is an error, like os.rename.
+    With replace=True a directory is merged into an existing directory, and
+    any other existing dst is removed first, matching _copy_file.
+    """
+    if replace and os.path.isdir(dst) and not os.path.islink(dst):
+        if os.path.isdir(src):
+            _merge_move(src, dst)
+            return
+        # Neither shutil.move nor MoveFileExW replaces a directory with a file
+        shutil.rmtree(dst)
+    elif replace and os.path.isdir(src) and os.path.lexists(dst):
+        os.remove(dst)
+
+    if sys.platform != "win32":
+        if replace:
+            shutil.move(src, dst)
+        else:
+            os.rename(src, dst)
+        return
+
+    flags = MOVEFILE_COPY_ALLOWED | MOVEFILE_WRITE_THROUGH
+    if replace:
+        flags |= MOVEFILE_REPLACE_EXISTING
+    if not _MoveFileExW(src, dst, flags):
+        error = ctypes.get_last_error()
+        # MOVEFILE_COPY_ALLOWED does not cover directories across volumes
+        if error == ERROR_NOT_SAME_DEVICE and os.path.isdir(src):
+            shutil.move(src, dst)
+        else:
+            raise ctypes.WinError(error)
+
+
+def _merge_move(src: str, dst: str) -> None:
+    """Move a directory's entries into an existing directory, replacing clashes."""
+    with os.scandir(src) as entries:
+        names = [entry.name for entry in entries]
+    for name in names:
+        _move_or_rename(os.path.join(src, name), os.path.join(dst, name))
+    os.rmdir(src)
+
+
+def _recycle_paths(paths: list[str]) -> None:
+    """Move paths to the recycle bin with a single shell operation."""
+    # Null-separated list; the buffer adds the final terminator
+    from_buffer = ctypes.create_unicode_buffer("\0".join(paths) + "\0")
+
+    fileop = SHFILEOPSTRUCTW()
+    fileop.hwnd = None
+    fileop.wFunc = FO_DELETE
+    fileop.pFrom = ctypes.cast(from_buffer, ctypes.c_wchar_p)
+    fileop.pTo = None
+    fileop.fFlags = FOF_ALLOWUNDO | FOF_NOCONFIRMATION | FOF_SILENT | FOF_NOERRORUI
+    fileop.fAnyOperationsAborted = False
+    fileop.hNameMappings = None
+    fileop.lpszProgressTitle = None
+
+    result = _SHFileOperationW(ctypes.byref(fileop))
+    if result != 0:
+        # Common error codes:
+        # 2 = File not found
+        # 5 = Access denied
+        # 113 = Path too long
+        # 120 = API not implemented (structure problem)
+        # 1026 = Source and destination are the same
+        raise OSError(f"SHFileOperation failed with code {result}")
+
+    if fileop.fAnyOperationsAborted:
+        raise OSError("Operation was aborted")
 
 
 def _delete_file(path: str, recycle: bool = True) -> None:
     """Delete a file or directory."""
     if recycle:
         try:
-            # Use Windows Shell to move to recycle bin
-            import ctypes
-            from ctypes import wintypes
-
-            # SHFILEOPSTRUCT requires pFrom to be a buffer (not a pointer to string)
-            # with double null termination
-            class SHFILEOPSTRUCTW(ctypes.Structure):
-                _fields_ = [
-                    ("hwnd", wintypes.HWND),
-                    ("wFunc", ctypes.c_uint),
-                    ("pFrom", ctypes.c_wchar_p),
-                    ("pTo", ctypes.c_wchar_p),
-                    ("fFlags", wintypes.WORD),
-                    ("fAnyOperationsAborted", wintypes.BOOL),
-                    ("hNameMappings", ctypes.c_void_p),
-                    ("lpszProgressTitle", ctypes.c_wchar_p),
-                ]
-
-            FO_DELETE = 3
-            FOF_ALLOWUNDO = 0x40
-            FOF_NOCONFIRMATION = 0x10
-            FOF_SILENT = 0x4
-            FOF_NOERRORUI = 0x400
-
-            # Create double-null terminated string
-            # The path must end with double null characters
-            from_path = path + "\0"
-
-            fileop = SHFILEOPSTRUCTW()
-            fileop.hwnd = None
-            fileop.wFunc = FO_DELETE
-            fileop.pFrom = from_path
-            fileop.pTo = None
-            fileop.fFlags = FOF_ALLOWUNDO | FOF_NOCONFIRMATION | FOF_SILENT | FOF_NOERRORUI
-            fileop.fAnyOperationsAborted = False
-            fileop.hNameMappings = None
-            fileop.lpszProgressTitle = None
-
-            # Set up proper function signature
-            shell32 = ctypes.windll.shell32
-            shell32.SHFileOperationW.argtypes = [ctypes.POINTER(SHFILEOPSTRUCTW)]
-            shell32.SHFileOperationW.restype = ctypes.c_int
-
-            result = shell32.SHFileOperationW(ctypes.byref(fileop))
-            if result != 0:
-                # Common error codes:
-                # 2 = File not found
-                # 5 = Access denied
-                # 113 = Path too long
-                # 120 = API not implemented (structure problem)
-                # 1026 = Source and destination are the same
-                raise OSError(f"SHFileOperation failed with code {result}")
-
-            if fileop.fAnyOperationsAborted:
-                raise OSError("Operation was aborted")
-
+            _recycle_paths([path])
             return
-
         except Exception as e:
             logger.warning(f"Failed to use recycle bin, falling back to permanent delete: {e}")
 
@@ -248,14 +484,112 @@ def _delete_file(path: str, recycle: bool = True) -> None:
         os.remove(path)
 
 
+def _delete_files_batch(paths: list[str], recycle: bool) -> tuple[list[str], list[dict]]:
+    """Delete paths, recycling them in one shell call when possible."""
+    existed = set()
+    if recycle:
+        # Only paths present before the batch can have been recycled by it
+        existed = {path for path in paths if os.path.lexists(path)}
+        try:
+            _recycle_paths(paths)
+            return list(paths), []
+        except Exception as e:
+            logger.warning(f"Batch recycle failed, retrying per path: {e}")
+
+    deleted = []
+    errors = []
+    for path in paths:
+        # Part of a failed batch may already be in the recycle bin
+        if path in existed and not os.path.lexists(path):
+            deleted.append(path)
+            continue
+        try:
+            _delete_file(path, recycle)
+            deleted.append(path)
+        except Exception as e:
+            errors.append({"path": path, "error": str(e)})
+
+    return deleted, errors
+
+
 def _rename_file(path: str, new_name: str) -> str:
     """Rename a file or directory."""
     parent = os.path.dirname(path)
     new_path = os.path.join(parent, new_name)
-    os.rename(path, new_path)
+    # Never clobber an existing entry on rename
+    _move_or_rename(path, new_path, replace=False)
     return new_path
 
 
+def _dir_prefix(directory: str) -> str:
+    """Directory with a trailing separator, so batch loops can build paths by concatenation."""
+    return directory if directory.endswith(("\\", "/")) else directory + os.sep
+
+
+def _existing_names(directory: str) -> set[str]:
+    """Snapshot the names in a directory, normalized for case-insensitive filesystems."""
+    try:
+        return {os.path.normcase(name) for name in os.listdir(directory)}
+    except OSError:
+        return set()
+
+
+def _unique_name(name: str, existing: set[str], split_ext: bool = True) -> str:
+    """
+    Pick name, or "name (N)" with the first free N, against an existing-names set.
+
+    The chosen name is added to the set so later picks in the batch skip it.
+    """
+    base, ext = os.path.splitext(name) if split_ext else (name, "")
+    candidate = name
+    counter = 1
+    while os.path.normcase(candidate) in existing:
+        candidate = f"{base} ({counter}){ext}"
+        counter += 1
+
+    existing.add(os.path.normcase(candidate))
+    return candidate
+
+
+def _plan_transfers(
+    sources: list[str], destination: str, policy: ConflictPolicy
+) -> tuple[list[tuple[str, str]], list[str], list[dict]]:
+    """
+    Pair each source with its destination path under a conflict policy.
+
+    Returns (calls, skipped, errors). "overwrite" never probes the destination
+    and lets the copy/move replace it; the others check one directory snapshot.
+    """
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy: {policy}")
+
+    prefix = _dir_prefix(destination)
+    if policy == "overwrite":
+        return [(src, prefix + os.path.basename(src)) for src in sources], [], []
+
+    existing = _existing_names(destination)
+    calls = []
+    skipped = []
+    errors = []
+
+    for src in sources:
+        name = os.path.basename(src)
+        if policy == "rename":
+            calls.append((src, prefix + _unique_name(name, existing)))
+        elif os.path.normcase(name) in existing:
+            if policy == "skip":
+                skipped.append(src)
+            else:
+                errors.append(
+                    {"path": src, "error": f"Destination already exists: {prefix + name}"}
+                )
+        else:
+            existing.add(os.path.normcase(name))
+            calls.append((src, prefix + name))
+
+    return calls, skipped, errors
+
+
 def _create_directory(path: str) -> None:
     """Create a directory."""
     os.makedirs(path, exist_ok=False)
@@ -264,31 +598,23 @@ def _create_directory(path: str) -> None:
 class FileService:
     """Service for file system operations."""
 
-    async def list_directory(
-        self,
-        path: str,
-        cancel_token: asyncio.Event | None = None
-    ) -> list[dict[str, Any]]:
-        """List contents of a directory with optional cancellation."""
+    async def list_directory(self, path: str) -> list[dict[str, Any]] | msgspec.Raw:
+        """
+        List contents of a directory (stops early if the task is cancelled).
+
+        With the Cython module the listing comes back pre-encoded as msgpack
+        and is wrapped in msgspec.Raw, which the response encoder splices in as-is.
+        """
         if not path:
             raise ValueError("Path is required")
 
-        loop = asyncio.get_event_loop()
-
-        # Create thread-safe cancellation check
-        def is_cancelled() -> bool:
-            return cancel_token.is_set() if cancel_token else False
-
         if USE_CYTHON:
-            return await loop.run_in_executor(
-                _executor,
-                lambda: fs_core.list_directory(path)  # Cython doesn't support cancel yet
+            # Cython doesn't support cancel yet
+            return await _run_cancellable(
+                lambda is_cancelled: msgspec.Raw(fs_core.list_directory_packed(path))
             )
         else:
-            return await loop.run_in_executor(
-                _executor,
-                lambda: _list_directory(path, is_cancelled)
-            )
+            return await _run_cancellable(lambda is_cancelled: _list_directory(path, is_cancelled))
 
     async def get_file_info(self, path: str) -> dict[str, Any]:
         """Get information about a file or directory."""
@@ -298,73 +624,77 @@ class FileService:
         loop = asyncio.get_event_loop()
 
         if USE_CYTHON:
-            return await loop.run_in_executor(_executor, fs_core.get_file_info, path)
+            return await loop.run_in_executor(_get_executor(), fs_core.get_file_info, path)
         else:
-            return await loop.run_in_executor(_executor, _get_file_info, path)
+            return await loop.run_in_executor(_get_executor(), _get_file_info, path)
 
-    async def copy_files(self, sources: list[str], destination: str) -> dict[str, Any]:
+    async def copy_files(
+        self, sources: list[str], destination: str, conflict_policy: ConflictPolicy = "rename"
+    ) -> dict[str, Any]:
         """Copy files to destination."""
         if not sources or not destination:
             raise ValueError("Sources and destination are required")
 
         loop = asyncio.get_event_loop()
         copied = []
-        errors = []
-
-        for src in sources:
-            try:
-                name = os.path.basename(src)
-                dst = os.path.join(destination, name)
 
-                # Handle name conflicts
-                counter = 1
-                base, ext = os.path.splitext(name)
-                while os.path.exists(dst):
-                    dst = os.path.join(destination, f"{base} ({counter}){ext}")
-                    counter += 1
+        # Pick destinations up front so parallel copies can't claim the same name
+        calls, skipped, errors = await loop.run_in_executor(
+            _get_executor(), _plan_transfers, sources, destination, conflict_policy
+        )
 
-                await loop.run_in_executor(_executor, _copy_file, src, dst)
+        for (src, dst), result in zip(calls, await _run_batch(_copy_file, calls)):
+            if isinstance(result, Exception):
+                errors.append({"path": src, "error": str(result)})
+            else:
                 copied.append({"source": src, "destination": dst})
-            except Exception as e:
-                errors.append({"path": src, "error": str(e)})
 
-        return {"copied": copied, "errors": errors}
+        return {"copied": copied, "skipped": skipped, "errors": errors}
 
-    async def move_files(self, sources: list[str], destination: str) -> dict[str, Any]:
+    async def move_files(
+        self, sources: list[str], destination: str, conflict_policy: ConflictPolicy = "rename"
+    ) -> dict[str, Any]:
         """Move files to destination."""
         if not sources or not destination:
             raise ValueError("Sources and destination are required")
 
         loop = asyncio.get_event_loop()
         moved = []
-        errors = []
 
-        for src in sources:
-            try:
-                name = os.path.basename(src)
-                dst = os.path.join(destination, name)
-                await loop.run_in_executor(_executor, _move_file, src, dst)
+        calls, skipped, errors = await loop.run_in_executor(
+            _get_executor(), _plan_transfers, sources, destination, conflict_policy
+        )
+
+        for (src, dst), result in zip(calls, await _run_batch(_move_or_rename, calls)):
+            if isinstance(result, Exception):
+                errors.append({"path": src, "error": str(result)})
+            else:
                 moved.append({"source": src, "destination": dst})
-            except Exception as e:
-                errors.append({"path": src, "error": str(e)})
 
-        return {"moved": moved, "errors": errors}
+        return {"moved": moved, "skipped": skipped, "errors": errors}
 
     async def delete_files(self, paths: list[str], recycle_bin: bool = True) -> dict[str, Any]:
         """Delete files."""
         if not paths:
             raise ValueError("Paths are required")
 
-        loop = asyncio.get_event_loop()
+        if recycle_bin:
+            # One shell operation for the whole batch
+            loop = asyncio.get_event_loop()
+            deleted, errors = await loop.run_in_executor(
+                _get_executor(), _delete_files_batch, paths, True
+            )
+            return {"deleted": deleted, "errors": errors}
+
         deleted = []
         errors = []
 
-        for path in paths:
-            try:
-                await loop.run_in_executor(_executor, _delete_file, path, recycle_bin)
+        results = await _run_batch(_delete_file, [(path, False) for path in paths])
+        for path, result in zip(paths, results):
+            if isinstance(result, Exception):
+                errors.append({"path": path, "error": str(result)})
+            else:
                 deleted.append(path)
-            except Exception as e:
-                errors.append({"path": path, "error": str(e)})
 
         return {"deleted": deleted, "errors": errors}
 
@@ -374,7 +704,7 @@ class FileService:
             raise ValueError("Path and new name are required")
 
         loop = asyncio.get_event_loop()
-        new_path = await loop.run_in_executor(_executor, _rename_file, path, new_name)
+        new_path = await loop.run_in_executor(_get_executor(), _rename_file, path, new_name)
 
         return {"oldPath": path, "newPath": new_path}
 
@@ -385,16 +715,15 @@ class FileService:
 
         loop = asyncio.get_event_loop()
 
-        # Handle name conflicts
-        base_path = path
-        counter = 1
-        while os.path.exists(path):
-            path = f"{base_path} ({counter})"
-            counter += 1
+        def do_create():
+            # Handle name conflicts
+            parent, name = os.path.split(path)
+            unique_name = _unique_name(name, _existing_names(parent), split_ext=False)
+            unique_path = os.path.join(parent, unique_name)
+            _create_directory(unique_path)
+            return unique_path
 
-        await loop.run_in_executor(_executor, _create_directory, path)
-
-        return {"path": path}
+        return {"path": await loop.run_in_executor(_get_executor(), do_create)}
 
     async def write_file(self, path: str, content: str = "") -> dict[str, Any]:
         """Create a new file with optional content."""
@@ -403,21 +732,15 @@ class FileService:
 
         loop = asyncio.get_event_loop()
 
-        # Handle name conflicts
-        base_path = path
-        base, ext = os.path.splitext(path)
-        counter = 1
-        while os.path.exists(path):
-            path = f"{base} ({counter}){ext}"
-            counter += 1
-
         def do_write():
-            with open(path, 'w', encoding='utf-8') as f:
+            # Handle name conflicts
+            parent, name = os.path.split(path)
+            unique_path = os.path.join(parent, _unique_name(name, _existing_names(parent)))
+            with open(unique_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            return unique_path
 
-        await loop.run_in_executor(_executor, do_write)
-
-        return {"path": path}
+        return {"path": await loop.run_in_executor(_get_executor(), do_write)}
 
     async def get_folder_stats(self, path: str) -> dict[str, Any]:
         """Get folder statistics (file count and folder count)."""
@@ -426,6 +749,13 @@ class FileService:
 
         loop = asyncio.get_event_loop()
 
+        if USE_CYTHON:
+            try:
+                return await loop.run_in_executor(_get_executor(), fs_core.folder_stats, path)
+            except OSError as e:
+                logger.error(f"Error counting folder contents for {path}: {e}")
+                return {"fileCount": 0, "folderCount": 0}
+
         def do_count():
             file_count = 0
             folder_count = 0
@@ -445,119 +775,109 @@ class FileService:
 
             return {"fileCount": file_count, "folderCount": folder_count}
 
-        return await loop.run_in_executor(_executor, do_count)
+        return await loop.run_in_executor(_get_executor(), do_count)
 
-    async def get_folder_size(
-        self,
-        path: str,
-        cancel_token: asyncio.Event | None = None
-    ) -> dict[str, Any]:
+    async def get_folder_size(self, path: str) -> dict[str, Any]:
         """Get recursive folder size (total size of all contents) with cancellation."""
         if not path:
             raise ValueError("Path is required")
 
-        loop = asyncio.get_event_loop()
+        folder_size = fs_core.folder_size if USE_CYTHON else _folder_size
 
-        # Create thread-safe cancellation check
-        def is_cancelled() -> bool:
-            return cancel_token.is_set() if cancel_token else False
+        def do_calculate(is_cancelled: Callable[[], bool]):
+            total_size = folder_size(path, is_cancelled)
+            if total_size is None:
+                logger.debug(f"Folder size calculation cancelled for {path}")
+                return {"path": path, "size": 0, "cancelled": True}
 
-        def do_calculate():
-            total_size = 0
-            check_interval = 500  # Check cancellation every N files
-            count = 0
+            return {"path": path, "size": total_size}
 
-            try:
-                for root, dirs, files in os.walk(path):
-                    # Check cancellation at each directory
-                    if is_cancelled():
-                        logger.debug(f"Folder size calculation cancelled for {path}")
-                        return {"path": path, "size": 0, "cancelled": True}
+        return await _run_cancellable(do_calculate)
 
-                    for file in files:
-                        count += 1
-                        # Check cancellation periodically
-                        if count % check_interval == 0 and is_cancelled():
-                            logger.debug(f"Folder size calculation cancelled for {path}")
-                            return {"path": path, "size": 0, "cancelled": True}
+    async def get_drives(self, details: bool = False) -> list[dict[str, Any]]:
+        """
+        Get list of available drives.
 
-                        try:
-                            file_path = os.path.join(root, file)
-                            total_size += os.path.getsize(file_path)
-                        except (OSError, PermissionError):
-                            continue
-            except (OSError, PermissionError) as e:
-                logger.error(f"Error calculating folder size for {path}: {e}")
+        Volume queries run in parallel. Removable, network and optical drives
+        are only probed when details is set, since they can block for seconds.
+        """
+        loop = asyncio.get_event_loop()
 
-            return {"path": path, "size": total_size}
+        try:
+            letters = await loop.run_in_executor(_get_executor(), _enumerate_drives)
+        except Exception as e:
+            logger.error(f"Error getting drives: {e}")
+            return DEFAULT_DRIVES
 
-        return await loop.run_in_executor(_executor, do_calculate)
+        results = await _run_batch(_get_drive_details, [
+            (letter, drive_type, details or drive_type not in SLOW_DRIVE_TYPES)
+            for letter, drive_type in letters
+        ])
 
-    async def get_drives(self) -> list[dict[str, Any]]:
-        """Get list of available drives."""
-        loop = asyncio.get_event_loop()
+        drives = []
+        for (letter, drive_type), result in zip(letters, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Error getting details for drive {letter}: {result}")
+                result = _get_drive_details(letter, drive_type, probe=False)
+            drives.append(result)
 
-        if USE_CYTHON:
-            return await loop.run_in_executor(_executor, fs_core.get_drives)
-        else:
-            return await loop.run_in_executor(_executor, _get_drives)
+        return drives
 
     async def search(
         self,
         path: str,
         query: str,
         recursive: bool = True,
-        cancel_token: asyncio.Event | None = None
     ) -> list[dict[str, Any]]:
         """Search for files with cancellation support."""
         if not path or not query:
             raise ValueError("Path and query are required")
 
-        loop = asyncio.get_event_loop()
-
-        # Create thread-safe cancellation check
-        def is_cancelled() -> bool:
-            return cancel_token.is_set() if cancel_token else False
+        if USE_CYTHON:
+            results = await _run_cancellable(
+                lambda is_cancelled: fs_core.search(path, query, recursive, is_cancelled)
+            )
+            if results is None:
+                logger.debug(f"Search cancelled for query '{query}' in {path}")
+                return []
+            return results
 
-        def do_search():
-            results = []
+        def do_search(is_cancelled: Callable[[], bool]):
+            matches = []
             query_lower = query.lower()
             check_interval = 100  # Check cancellation every N items
             count = 0
+            stack = [path]
 
-            if recursive:
-                for root, dirs, files in os.walk(path):
-                    # Check cancellation at each directory
-                    if is_cancelled():
-                        logger.debug(f"Search cancelled for query '{query}' in {path}")
-                        return []
+            while stack:
+                # Check cancellation at each directory
+                if is_cancelled():
+                    logger.debug(f"Search cancelled for query '{query}' in {path}")
+                    return []
 
-                    for name in dirs + files:
+                try:
+                    entries = os.scandir(stack.pop())
+                except OSError:
+                    continue
+
+                with entries:
+                    for entry in entries:
                         count += 1
                         # Check cancellation periodically
                         if count % check_interval == 0 and is_cancelled():
                             logger.debug(f"Search cancelled for query '{query}' in {path}")
-                            return results  # Return partial results
+                            return []
 
-                        if query_lower in name.lower():
-                            full_path = os.path.join(root, name)
+                        if query_lower in entry.name.lower():
+                            matches.append(entry)
+                        if recursive:
                             try:
-                                results.append(_get_file_info(full_path))
-                            except Exception:
-                                continue
-            else:
-                for entry in os.scandir(path):
-                    # Check cancellation
-                    if is_cancelled():
-                        logger.debug(f"Search cancelled for query '{query}' in {path}")
-                        return results
+                                if entry.is_dir(follow_symlinks=False):
+                                    stack.append(entry.path)
+                            except OSError:
+                                pass
 
-                    if query_lower in entry.name.lower():
-                        try:
-                            results.append(_get_file_info(entry.path))
-                        except Exception:
-                            continue
-
-            return results
+            # DirEntry.stat() is served from the enumeration data on Windows
+            return [info for info in map(_entry_info, matches) if info is not None]
 
-        return await loop.run_in_executor(_executor, do_search)
+        return await _run_cancellable(do_search)
@@ -4,15 +4,130 @@ Windows Registry service for shell integration.
 
 import winreg
 import os
+import re
 import sys
+import ctypes
 import logging
+import tempfile
+import threading
+import subprocess
+from ctypes import wintypes
+from functools import lru_cache
+from itertools import groupby
 from typing import Any
 
-logger = logging.getLogger(__name__)
+from ..utils._win32 import INVALID_HANDLE_VALUE, CloseHandle, CreateEventW, WaitForSingleObject
 
+logger = logging.getLogger(__name__)
 
+INFINITE = 0xFFFFFFFF
+ERROR_FILE_NOT_FOUND = 2
+ERROR_MORE_DATA = 234
+ERROR_NO_MORE_ITEMS = 259
+
+# Registry key names are at most 255 characters
+MAX_KEY_NAME = 256
+WAIT_OBJECT_0 = 0
+
+# RegNotifyChangeKeyValue filters
+REG_NOTIFY_CHANGE_NAME = 0x1
+REG_NOTIFY_CHANGE_LAST_SET = 0x4
+
+# Standard DELETE access right (not exposed by winreg)
+DELETE = 0x00010000
+
+DEFAULT_HANDLER_KEY = r"Software\Classes\Folder\shell\open\command"
+
+# Transacted registry writes (KTM)
+_advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+
+_RegCreateKeyTransactedW = _advapi32.RegCreateKeyTransactedW
+_RegCreateKeyTransactedW.argtypes = [
+    wintypes.HKEY,                  # hKey
+    wintypes.LPCWSTR,               # lpSubKey
+    wintypes.DWORD,                 # Reserved
+    wintypes.LPWSTR,                # lpClass
+    wintypes.DWORD,                 # dwOptions
+    wintypes.DWORD,                 # samDesired
+    wintypes.LPVOID,                # lpSecurityAttributes
+    ctypes.POINTER(wintypes.HKEY),  # phkResult
+    wintypes.LPDWORD,               # lpdwDisposition
+    wintypes.HANDLE,                # hTransaction
+    wintypes.LPVOID,                # pExtendedParemeter
+]
+_RegCreateKeyTransactedW.restype = wintypes.LONG
+
+_RegSetValueExW = _advapi32.RegSetValueExW
+_RegSetValueExW.argtypes = [
+    wintypes.HKEY, wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, ctypes.c_char_p, wintypes.DWORD
+]
+_RegSetValueExW.restype = wintypes.LONG
+
+_RegEnumKeyExW = _advapi32.RegEnumKeyExW
+_RegEnumKeyExW.argtypes = [
+    wintypes.HKEY, wintypes.DWORD, wintypes.LPWSTR, wintypes.LPDWORD,
+    wintypes.LPDWORD, wintypes.LPWSTR, wintypes.LPDWORD, wintypes.LPVOID,
+]
+_RegEnumKeyExW.restype = wintypes.LONG
+
+class VALENTW(ctypes.Structure):
+    _fields_ = [
+        ("ve_valuename", wintypes.LPWSTR),
+        ("ve_valuelen", wintypes.DWORD),
+        ("ve_valueptr", ctypes.c_size_t),
+        ("ve_type", wintypes.DWORD),
+    ]
+
+
+_RegQueryMultipleValuesW = _advapi32.RegQueryMultipleValuesW
+_RegQueryMultipleValuesW.argtypes = [
+    wintypes.HKEY, ctypes.POINTER(VALENTW), wintypes.DWORD, ctypes.c_void_p, wintypes.LPDWORD
+]
+_RegQueryMultipleValuesW.restype = wintypes.LONG
+
+_RegCloseKey = _advapi32.RegCloseKey
+_RegCloseKey.argtypes = [wintypes.HKEY]
+_RegCloseKey.restype = wintypes.LONG
+
+# Whole-subtree delete in one call (Vista+)
+_RegDeleteTreeW = getattr(_advapi32, "RegDeleteTreeW", None)
+if _RegDeleteTreeW is not None:
+    _RegDeleteTreeW.argtypes = [wintypes.HKEY, wintypes.LPCWSTR]
+    _RegDeleteTreeW.restype = wintypes.LONG
+
+# Change notification for the cached default-handler check
+_RegNotifyChangeKeyValue = _advapi32.RegNotifyChangeKeyValue
+_RegNotifyChangeKeyValue.argtypes = [
+    wintypes.HKEY, wintypes.BOOL, wintypes.DWORD, wintypes.HANDLE, wintypes.BOOL,
+]
+_RegNotifyChangeKeyValue.restype = wintypes.LONG
+
+try:
+    _ktmw32 = ctypes.WinDLL("ktmw32", use_last_error=True)
+
+    _CreateTransaction = _ktmw32.CreateTransaction
+    _CreateTransaction.argtypes = [
+        wintypes.LPVOID, wintypes.LPVOID, wintypes.DWORD, wintypes.DWORD,
+        wintypes.DWORD, wintypes.DWORD, wintypes.LPWSTR,
+    ]
+    _CreateTransaction.restype = wintypes.HANDLE
+
+    _CommitTransaction = _ktmw32.CommitTransaction
+    _CommitTransaction.argtypes = [wintypes.HANDLE]
+    _CommitTransaction.restype = wintypes.BOOL
+
+    _RollbackTransaction = _ktmw32.RollbackTransaction
+    _RollbackTransaction.argtypes = [wintypes.HANDLE]
+    _RollbackTransaction.restype = wintypes.BOOL
+
+    HAS_KTM = True
+except OSError:
+    HAS_KTM = False
+
+
+@lru_cache(maxsize=1)
 def get_exe_path() -> str:
-    """Get the path to the X-Plorer executable."""
+    """Get the path to the X-Plorer executable (fixed for the life of the process)."""
     if getattr(sys, "frozen", False):
         # Running as compiled executable
         return sys.executable
@@ -21,12 +136,82 @@ def get_exe_path() -> str:
         return os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "X-Plorer.exe"))
 
 
+def _enum_subkeys(key) -> list[str]:
+    """
+    List the subkey names of an open key.
+
+    Calls RegEnumKeyExW directly (ctypes drops the GIL around it) with one
+    reused fixed-size name buffer.
+    """
+    names = []
+    buffer = ctypes.create_unicode_buffer(MAX_KEY_NAME)
+    length = wintypes.DWORD()
+    index = 0
+
+    while True:
+        length.value = MAX_KEY_NAME
+        rc = _RegEnumKeyExW(key.handle, index, buffer, ctypes.byref(length), None, None, None, None)
+        if rc == ERROR_NO_MORE_ITEMS:
+            return names
+        if rc:
+            raise ctypes.WinError(rc)
+
+        names.append(buffer.value[:length.value])
+        index += 1
+
+
+def _read_values(root, subkey: str, names: list[str]) -> dict[str, str]:
+    """
+    Read several string values under one key with a single RegQueryMultipleValuesW.
+
+    An empty name is the key's default value. Raises OSError if the key or
+    any of the values is missing.
+    """
+    with winreg.OpenKey(root, subkey) as key:
+        entries = (VALENTW * len(names))(*(VALENTW(ve_valuename=name) for name in names))
+        size = wintypes.DWORD(0)
+        buffer = None
+
+        while True:
+            rc = _RegQueryMultipleValuesW(
+                key.handle, entries, len(names), buffer, ctypes.byref(size)
+            )
+            if rc == 0 and buffer is not None:
+                break
+            if rc not in (0, ERROR_MORE_DATA):
+                raise ctypes.WinError(rc)
+            # First pass (or the values grew): size now holds what's needed
+            buffer = ctypes.create_string_buffer(size.value)
+
+    return {
+        name: ctypes.wstring_at(entry.ve_valueptr, entry.ve_valuelen // 2).rstrip("\0")
+        for name, entry in zip(names, entries)
+        if entry.ve_type in (winreg.REG_SZ, winreg.REG_EXPAND_SZ)
+    }
+
+
 class RegistryService:
     """Service for Windows Registry operations."""
 
     APP_NAME = "eX"
     PROG_ID = "eX.Folder"
 
+    # Case-insensitive match for our name in a command line
+    _APP_NAME_RE = re.compile(re.escape(APP_NAME), re.IGNORECASE)
+
+    # "Open with eX" menu keys under HKCR and the argument each command passes
+    _SHELL_KEYS: tuple[tuple[str, str], ...] = (
+        (f"Folder\\shell\\{APP_NAME}", "%1"),
+        (f"Directory\\Background\\shell\\{APP_NAME}", "%V"),
+        (f"Drive\\shell\\{APP_NAME}", "%1"),
+    )
+
+    # is_default_file_manager result as (value, generation); cleared on registry change
+    _default_cache: tuple[bool, int] | None = None
+    _default_generation = 0
+    _notify_thread: threading.Thread | None = None
+    _notify_lock = threading.Lock()
+
     @classmethod
     def register_shell_integration(cls) -> dict[str, Any]:
         """
@@ -39,17 +224,16 @@ class RegistryService:
         try:
             exe_path = get_exe_path()
 
-            # Register the ProgID
-            cls._register_prog_id(exe_path)
-
-            # Add "Open with X-Plorer" to folder context menu
-            cls._register_folder_context_menu(exe_path)
+            # Registration is written atomically, so one value tells us it's current
+            if cls._is_already_registered(exe_path):
+                return {"success": True, "skipped": True}
 
-            # Add "Open with X-Plorer" to directory background context menu
-            cls._register_directory_background_menu(exe_path)
-
-            # Add "Open with X-Plorer" to drive context menu
-            cls._register_drive_context_menu(exe_path)
+            if HAS_KTM:
+                # All keys commit together or not at all
+                cls._write_values_transacted(cls._shell_integration_values(exe_path))
+            else:
+                # One reg.exe import instead of a write per value
+                cls._import_reg_script(cls._build_reg_script(exe_path))
 
             logger.info("Shell integration registered successfully")
             return {"success": True}
@@ -67,26 +251,16 @@ class RegistryService:
             Result dictionary with success status
         """
         try:
-            # Remove ProgID
-            cls._delete_key_recursive(winreg.HKEY_CLASSES_ROOT, cls.PROG_ID)
+            # Nothing to remove if the ProgID was never written
+            if not cls._key_exists(winreg.HKEY_CLASSES_ROOT, cls.PROG_ID):
+                return {"success": True, "skipped": True}
 
-            # Remove folder context menu
-            cls._delete_key_recursive(
-                winreg.HKEY_CLASSES_ROOT,
-                f"Folder\\shell\\{cls.APP_NAME}"
-            )
-
-            # Remove directory background menu
-            cls._delete_key_recursive(
-                winreg.HKEY_CLASSES_ROOT,
-                f"Directory\\Background\\shell\\{cls.APP_NAME}"
-            )
+            # Remove ProgID
+            cls._delete_tree(winreg.HKEY_CLASSES_ROOT, cls.PROG_ID)
 
-            # Remove drive context menu
-            cls._delete_key_recursive(
-                winreg.HKEY_CLASSES_ROOT,
-                f"Drive\\shell\\{cls.APP_NAME}"
-            )
+            # Remove folder, directory background and drive context menus
+            for base_key, _ in cls._SHELL_KEYS:
+                cls._delete_tree(winreg.HKEY_CLASSES_ROOT, base_key)
 
             logger.info("Shell integration unregistered successfully")
             return {"success": True}
@@ -97,20 +271,104 @@ class RegistryService:
 
     @classmethod
     def is_default_file_manager(cls) -> bool:
-        """Check if X-Plorer is set as the default file manager."""
-        try:
-            key = winreg.OpenKey(
-                winreg.HKEY_CURRENT_USER,
-                r"Software\Classes\Folder\shell\open\command"
-            )
-            value, _ = winreg.QueryValueEx(key, "")
-            winreg.CloseKey(key)
+        """
+        Check if X-Plorer is set as the default file manager.
+
+        The answer is cached until the registry watcher sees a change.
+        """
+        cached = cls._default_cache
+        if cached is not None:
+            return cached[0]
+
+        watching = cls._start_default_watch()
+        generation = cls._default_generation
+        value = cls._read_is_default()
 
-            return cls.APP_NAME.lower() in value.lower()
+        # Don't cache if a change landed while reading or nothing will invalidate it
+        if watching and generation == cls._default_generation:
+            cls._default_cache = (value, generation)
+
+        return value
+
+    @classmethod
+    def _read_is_default(cls) -> bool:
+        """Read the per-user folder open command and look for our exe."""
+        try:
+            value = _read_values(winreg.HKEY_CURRENT_USER, DEFAULT_HANDLER_KEY, [""])[""]
+            return cls._APP_NAME_RE.search(value) is not None
 
         except Exception:
             return False
 
+    @classmethod
+    def _invalidate_default_cache(cls):
+        """Drop the cached default-handler check."""
+        cls._default_generation += 1
+        cls._default_cache = None
+
+    @classmethod
+    def _start_default_watch(cls) -> bool:
+        """
+        Start the thread that invalidates the default-handler cache.
+
+        Returns True once the watch is armed.
+        """
+        with cls._notify_lock:
+            if cls._notify_thread is not None:
+                return cls._notify_thread.is_alive()
+
+            armed = threading.Event()
+            cls._notify_thread = threading.Thread(
+                target=cls._watch_default_handler,
+                args=(armed,),
+                name="xplorer-registry-watch",
+                daemon=True,
+            )
+            cls._notify_thread.start()
+
+        armed.wait()
+        return cls._notify_thread.is_alive()
+
+    @classmethod
+    def _watch_default_handler(cls, armed: threading.Event):
+        """Wait for changes under HKCU\\Software\\Classes and invalidate the cache."""
+        event = CreateEventW(None, False, False, None)
+        if not event:
+            logger.warning(f"Could not create registry watch event: {ctypes.get_last_error()}")
+            armed.set()
+            return
+
+        try:
+            # The command key may not exist yet, so watch the whole classes subtree
+            with winreg.OpenKey(
+                winreg.HKEY_CURRENT_USER, r"Software\Classes", 0, winreg.KEY_NOTIFY
+            ) as key:
+                while True:
+                    rc = _RegNotifyChangeKeyValue(
+                        key.handle,
+                        True,
+                        REG_NOTIFY_CHANGE_NAME | REG_NOTIFY_CHANGE_LAST_SET,
+                        event,
+                        True,
+                    )
+                    armed.set()
+                    if rc:
+                        logger.warning(f"Registry watch failed: {ctypes.WinError(rc)}")
+                        break
+
+                    if WaitForSingleObject(event, INFINITE) != WAIT_OBJECT_0:
+                        break
+
+                    cls._invalidate_default_cache()
+
+        except OSError as e:
+            logger.warning(f"Could not watch registry: {e}")
+
+        finally:
+            armed.set()
+            CloseHandle(event)
+            cls._invalidate_default_cache()
+
     @classmethod
     def set_as_default_file_manager(cls) -> dict[str, Any]:
         """
@@ -127,12 +385,11 @@ class RegistryService:
             cls._backup_default_handler()
 
             # Set as default folder handler
-            key = winreg.CreateKey(
-                winreg.HKEY_CURRENT_USER,
-                r"Software\Classes\Folder\shell\open\command"
-            )
-            winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}" "%1"')
-            winreg.CloseKey(key)
+            with winreg.CreateKey(winreg.HKEY_CURRENT_USER, DEFAULT_HANDLER_KEY) as key:
+                winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}" "%1"')
+
+            # Don't wait for the watcher to notice our own write
+            cls._invalidate_default_cache()
 
             logger.info("Set as default file manager")
             return {"success": True}
@@ -151,10 +408,11 @@ class RegistryService:
         """
         try:
             # Delete our override
-            cls._delete_key_recursive(
+            cls._delete_tree(
                 winreg.HKEY_CURRENT_USER,
-                r"Software\Classes\Folder\shell\open\command"
+                DEFAULT_HANDLER_KEY
             )
+            cls._invalidate_default_cache()
 
             logger.info("Restored default file manager")
             return {"success": True}
@@ -164,104 +422,190 @@ class RegistryService:
             return {"success": False, "error": str(e)}
 
     @classmethod
-    def _register_prog_id(cls, exe_path: str):
-        """Register the application ProgID."""
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, cls.PROG_ID)
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, cls.APP_NAME)
-        winreg.CloseKey(key)
-
-        # Default icon
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, f"{cls.PROG_ID}\\DefaultIcon")
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}",0')
-        winreg.CloseKey(key)
-
-        # Shell open command
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, f"{cls.PROG_ID}\\shell\\open\\command")
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}" "%1"')
-        winreg.CloseKey(key)
+    def _is_already_registered(cls, exe_path: str) -> bool:
+        """Check whether the ProgID already opens this executable."""
+        try:
+            command_key = f"{cls.PROG_ID}\\shell\\open\\command"
+            with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, command_key) as key:
+                value, _ = winreg.QueryValueEx(key, "")
 
-    @classmethod
-    def _register_folder_context_menu(cls, exe_path: str):
-        """Add context menu entry for folders."""
-        base_key = f"Folder\\shell\\{cls.APP_NAME}"
+            return value == f'"{exe_path}" "%1"'
 
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, base_key)
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f"Open with {cls.APP_NAME}")
-        winreg.SetValueEx(key, "Icon", 0, winreg.REG_SZ, exe_path)
-        winreg.CloseKey(key)
+        except OSError:
+            return False
 
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, f"{base_key}\\command")
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}" "%1"')
-        winreg.CloseKey(key)
+    @staticmethod
+    def _key_exists(root, path: str) -> bool:
+        """Check whether a registry key exists."""
+        try:
+            winreg.OpenKey(root, path).Close()
+            return True
+        except OSError:
+            return False
 
     @classmethod
-    def _register_directory_background_menu(cls, exe_path: str):
-        """Add context menu entry for directory backgrounds."""
-        base_key = f"Directory\\Background\\shell\\{cls.APP_NAME}"
+    def _shell_integration_values(cls, exe_path: str) -> list[tuple[str, str, str]]:
+        """
+        Every value written by shell integration, as (HKCR subkey, name, data).
 
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, base_key)
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f"Open with {cls.APP_NAME}")
-        winreg.SetValueEx(key, "Icon", 0, winreg.REG_SZ, exe_path)
-        winreg.CloseKey(key)
+        An empty name is the key's default value.
+        """
+        open_label = f"Open with {cls.APP_NAME}"
+        values = [
+            # ProgID
+            (cls.PROG_ID, "", cls.APP_NAME),
+            (f"{cls.PROG_ID}\\DefaultIcon", "", f'"{exe_path}",0'),
+            (f"{cls.PROG_ID}\\shell\\open\\command", "", f'"{exe_path}" "%1"'),
+        ]
+
+        # "Open with X-Plorer" on folders, directory backgrounds and drives
+        for base_key, target in cls._SHELL_KEYS:
+            values += [
+                (base_key, "", open_label),
+                (base_key, "Icon", exe_path),
+                (f"{base_key}\\command", "", f'"{exe_path}" "{target}"'),
+            ]
+
+        return values
+
+    @staticmethod
+    def _write_values_transacted(values: list[tuple[str, str, str]]):
+        """
+        Write (HKCR subkey, name, data) string values in one KTM transaction.
 
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, f"{base_key}\\command")
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}" "%V"')
-        winreg.CloseKey(key)
+        Either every value lands or, on any failure, none do.
+        """
+        txn = _CreateTransaction(None, None, 0, 0, 0, 0, "eX shell integration")
+        if txn == INVALID_HANDLE_VALUE:
+            raise ctypes.WinError(ctypes.get_last_error())
 
-    @classmethod
-    def _register_drive_context_menu(cls, exe_path: str):
-        """Add context menu entry for drives."""
-        base_key = f"Drive\\shell\\{cls.APP_NAME}"
+        try:
+            # Values are grouped by key, so each key is opened once
+            for key_path, key_values in groupby(values, key=lambda v: v[0]):
+                hkey = wintypes.HKEY()
+                rc = _RegCreateKeyTransactedW(
+                    winreg.HKEY_CLASSES_ROOT, key_path, 0, None, 0,
+                    winreg.KEY_WRITE, None, ctypes.byref(hkey), None, txn, None,
+                )
+                if rc:
+                    raise ctypes.WinError(rc)
+
+                try:
+                    for _, name, value in key_values:
+                        data = (value + "\0").encode("utf-16-le")
+                        rc = _RegSetValueExW(hkey, name or None, 0, winreg.REG_SZ, data, len(data))
+                        if rc:
+                            raise ctypes.WinError(rc)
+                finally:
+                    _RegCloseKey(hkey)
 
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, base_key)
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f"Open with {cls.APP_NAME}")
-        winreg.SetValueEx(key, "Icon", 0, winreg.REG_SZ, exe_path)
-        winreg.CloseKey(key)
+            if not _CommitTransaction(txn):
+                raise ctypes.WinError(ctypes.get_last_error())
 
-        key = winreg.CreateKey(winreg.HKEY_CLASSES_ROOT, f"{base_key}\\command")
-        winreg.SetValueEx(key, "", 0, winreg.REG_SZ, f'"{exe_path}" "%1"')
-        winreg.CloseKey(key)
+        except BaseException:
+            _RollbackTransaction(txn)
+            raise
+
+        finally:
+            CloseHandle(txn)
+
+    @classmethod
+    def _build_reg_script(cls, exe_path: str) -> str:
+        """Render the shell integration values as a .reg script."""
+        def reg_string(value: str) -> str:
+            return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+        lines = ["Windows Registry Editor Version 5.00"]
+        current_key = None
+
+        for key, name, value in cls._shell_integration_values(exe_path):
+            if key != current_key:
+                lines += ["", f"[HKEY_CLASSES_ROOT\\{key}]"]
+                current_key = key
+            lines.append(f"{reg_string(name) if name else '@'}={reg_string(value)}")
+
+        return "\r\n".join(lines) + "\r\n"
+
+    @staticmethod
+    def _import_reg_script(script: str):
+        """Import a .reg script with a single reg.exe call."""
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".reg", encoding="utf-16", newline="", delete=False
+        ) as f:
+            f.write(script)
+
+        try:
+            subprocess.run(
+                ["reg.exe", "import", f.name],
+                check=True,
+                capture_output=True,
+                creationflags=subprocess.CREATE_NO_WINDOW,
+            )
+        finally:
+            os.unlink(f.name)
 
     @classmethod
     def _backup_default_handler(cls):
         """Backup the default folder handler."""
         try:
-            key = winreg.OpenKey(
-                winreg.HKEY_LOCAL_MACHINE,
-                r"Software\Classes\Folder\shell\open\command"
-            )
-            value, _ = winreg.QueryValueEx(key, "")
-            winreg.CloseKey(key)
+            value = _read_values(winreg.HKEY_LOCAL_MACHINE, DEFAULT_HANDLER_KEY, [""])[""]
 
             # Store backup
-            backup_key = winreg.CreateKey(
-                winreg.HKEY_CURRENT_USER,
-                f"Software\\{cls.APP_NAME}\\Backup"
-            )
-            winreg.SetValueEx(backup_key, "DefaultFolderHandler", 0, winreg.REG_SZ, value)
-            winreg.CloseKey(backup_key)
+            backup_path = f"Software\\{cls.APP_NAME}\\Backup"
+            with winreg.CreateKey(winreg.HKEY_CURRENT_USER, backup_path) as backup_key:
+                winreg.SetValueEx(backup_key, "DefaultFolderHandler", 0, winreg.REG_SZ, value)
 
         except Exception as e:
             logger.warning(f"Could not backup default handler: {e}")
 
     @classmethod
-    def _delete_key_recursive(cls, root, path: str):
-        """Recursively delete a registry key."""
+    def _delete_tree(cls, root, path: str):
+        """Delete a registry key and all of its subkeys."""
+        if _RegDeleteTreeW is None:
+            cls._delete_tree_walk(root, path)
+            return
+
+        rc = _RegDeleteTreeW(root, path)
+        if rc not in (0, ERROR_FILE_NOT_FOUND):
+            logger.error(f"Error deleting key {path}: {ctypes.WinError(rc)}")
+
+    @staticmethod
+    def _delete_tree_walk(root, path: str):
+        """
+        Delete a registry key tree without RegDeleteTreeW.
+
+        Walks the tree with an explicit stack. Each key is opened once and
+        its children are listed once, then keys are deleted bottom-up.
+        """
+        # Only what the walk needs: list children and delete the key
+        access = DELETE | winreg.KEY_ENUMERATE_SUB_KEYS
+
         try:
-            key = winreg.OpenKey(root, path, 0, winreg.KEY_ALL_ACCESS)
+            key = winreg.OpenKey(root, path, 0, access)
+        except FileNotFoundError:
+            return
 
-            # Delete subkeys first
-            while True:
-                try:
-                    subkey_name = winreg.EnumKey(key, 0)
-                    cls._delete_key_recursive(key, subkey_name)
-                except OSError:
-                    break
+        # Frames are [parent, name, open key, child names still to visit]
+        stack = [[root, path, key, None]]
+        try:
+            while stack:
+                frame = stack[-1]
+                parent, name, key, children = frame
 
-            winreg.CloseKey(key)
-            winreg.DeleteKey(root, path)
+                if children is None:
+                    children = frame[3] = _enum_subkeys(key)
+
+                if children:
+                    child = children.pop()
+                    stack.append([key, child, winreg.OpenKey(key, child, 0, access), None])
+                else:
+                    stack.pop()
+                    key.Close()
+                    winreg.DeleteKey(parent, name)
 
-        except FileNotFoundError:
-            pass
         except Exception as e:
             logger.error(f"Error deleting key {path}: {e}")
+
+        finally:
+            for _, _, key, _ in stack:
+                key.Close()
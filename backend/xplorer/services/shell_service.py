@@ -2,20 +2,87 @@
 Windows Shell integration service.
 """
 
+import asyncio
 import ctypes
 from ctypes import wintypes
 import os
+import sys
 import base64
 from io import BytesIO
 import logging
 import hashlib
+import mmap
+import struct
+import subprocess
+import tempfile
 from typing import Any
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import functools
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 import uuid
+import threading
 
 logger = logging.getLogger(__name__)
 
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# Optional libvips for shrink-on-load thumbnails
+try:
+    import pyvips
+    HAS_PYVIPS = True
+except (ImportError, OSError):
+    # OSError: the binding is installed but the libvips DLLs aren't
+    HAS_PYVIPS = False
+
+# Optional pywin32 (icon GDI fallback, WScript.Shell shortcuts)
+try:
+    import win32com.client
+    import pythoncom
+    import win32gui
+    import win32ui
+    import win32con
+    HAS_PYWIN32 = True
+except ImportError:
+    HAS_PYWIN32 = False
+
+# Optional mutagen for audio album art
+try:
+    from mutagen import File as MutagenFile
+    from mutagen.id3 import ID3
+    from mutagen.flac import FLAC
+    from mutagen.mp4 import MP4
+    HAS_MUTAGEN = True
+except ImportError:
+    HAS_MUTAGEN = False
+
+# Optional PyAV for in-process video frame grabs
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+# Thumbnail cache keys aren't security sensitive; use the fastest hash installed
+try:
+    from blake3 import blake3 as _cache_hash
+except ImportError:
+    try:
+        from xxhash import xxh3_128 as _cache_hash
+    except ImportError:
+        _cache_hash = hashlib.md5
+
+# SIMD base64 for PNG payloads when pybase64 is installed
+try:
+    from pybase64 import b64encode_as_string as _b64encode
+except ImportError:
+    def _b64encode(data: bytes) -> str:
+        return base64.b64encode(data).decode("ascii")
+
 # Known folder GUIDs for Windows libraries
 # https://docs.microsoft.com/en-us/windows/win32/shell/knownfolderid
 KNOWN_FOLDER_GUIDS = {
@@ -28,43 +95,405 @@ KNOWN_FOLDER_GUIDS = {
     "Profile": "{5E6C858F-0E22-4760-9AFE-EA3317B67173}",  # User's home folder
 }
 
+
+class GUID(ctypes.Structure):
+    _fields_ = [
+        ("Data1", ctypes.c_uint32),
+        ("Data2", ctypes.c_ushort),
+        ("Data3", ctypes.c_ushort),
+        ("Data4", ctypes.c_ubyte * 8),
+    ]
+
+
+# Known folder IDs as ready-made GUID structs (bytes_le is the Windows GUID layout)
+KNOWN_FOLDER_IDS = {
+    name: GUID.from_buffer_copy(uuid.UUID(guid_str).bytes_le)
+    for name, guid_str in KNOWN_FOLDER_GUIDS.items()
+}
+
+# SHGetFileInfoW flags
+SHGFI_ICON = 0x100
+SHGFI_SMALLICON = 0x1
+SHGFI_LARGEICON = 0x0
+
+# ShellExecuteW / SHObjectProperties
+SW_SHOWNORMAL = 1
+SHOP_FILEPATH = 0x2
+
+# IShellItemImageFactory::GetImage
+SIIGBF_ICONONLY = 0x4
+COINIT_APARTMENTTHREADED = 0x2
+COINIT_DISABLE_OLE1DDE = 0x4
+BI_RGB = 0
+DIB_RGB_COLORS = 0
+
+
+class SHFILEINFO(ctypes.Structure):
+    _fields_ = [
+        ("hIcon", wintypes.HICON),
+        ("iIcon", ctypes.c_int),
+        ("dwAttributes", wintypes.DWORD),
+        ("szDisplayName", wintypes.WCHAR * 260),
+        ("szTypeName", wintypes.WCHAR * 80),
+    ]
+
+
+class SIZE(ctypes.Structure):
+    _fields_ = [("cx", wintypes.LONG), ("cy", wintypes.LONG)]
+
+
+class BITMAP(ctypes.Structure):
+    _fields_ = [
+        ("bmType", wintypes.LONG),
+        ("bmWidth", wintypes.LONG),
+        ("bmHeight", wintypes.LONG),
+        ("bmWidthBytes", wintypes.LONG),
+        ("bmPlanes", wintypes.WORD),
+        ("bmBitsPixel", wintypes.WORD),
+        ("bmBits", ctypes.c_void_p),
+    ]
+
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ("biSize", wintypes.DWORD),
+        ("biWidth", wintypes.LONG),
+        ("biHeight", wintypes.LONG),
+        ("biPlanes", wintypes.WORD),
+        ("biBitCount", wintypes.WORD),
+        ("biCompression", wintypes.DWORD),
+        ("biSizeImage", wintypes.DWORD),
+        ("biXPelsPerMeter", wintypes.LONG),
+        ("biYPelsPerMeter", wintypes.LONG),
+        ("biClrUsed", wintypes.DWORD),
+        ("biClrImportant", wintypes.DWORD),
+    ]
+
+
+IID_IShellItemImageFactory = GUID.from_buffer_copy(
+    uuid.UUID("{BCC18B79-BA16-442F-80C4-8A59C30C463B}").bytes_le
+)
+
+# COM is initialised once per worker thread
+_com_state = threading.local()
+
+if sys.platform == "win32":
+    _shell32 = ctypes.WinDLL("shell32", use_last_error=True)
+    _ole32 = ctypes.WinDLL("ole32", use_last_error=True)
+    _user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+    _SHGetFileInfoW = _shell32.SHGetFileInfoW
+    _SHGetFileInfoW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, ctypes.POINTER(SHFILEINFO), wintypes.UINT, wintypes.UINT
+    ]
+    _SHGetFileInfoW.restype = ctypes.c_size_t  # DWORD_PTR
+
+    _ShellExecuteW = _shell32.ShellExecuteW
+    _ShellExecuteW.argtypes = [
+        wintypes.HWND, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.LPCWSTR,
+        ctypes.c_int,
+    ]
+    _ShellExecuteW.restype = ctypes.c_ssize_t  # HINSTANCE, compared against 32
+
+    _SHObjectProperties = _shell32.SHObjectProperties
+    _SHObjectProperties.argtypes = [
+        wintypes.HWND, wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR,
+    ]
+    _SHObjectProperties.restype = wintypes.BOOL
+
+    _DestroyIcon = _user32.DestroyIcon
+    _DestroyIcon.argtypes = [wintypes.HICON]
+    _DestroyIcon.restype = wintypes.BOOL
+
+    # Shell item images (raw COM through the vtable)
+    _gdi32 = ctypes.WinDLL("gdi32", use_last_error=True)
+
+    _CoInitializeEx = _ole32.CoInitializeEx
+    _CoInitializeEx.argtypes = [ctypes.c_void_p, wintypes.DWORD]
+    _CoInitializeEx.restype = ctypes.c_long
+
+    _SHCreateItemFromParsingName = _shell32.SHCreateItemFromParsingName
+    _SHCreateItemFromParsingName.argtypes = [
+        wintypes.LPCWSTR, ctypes.c_void_p, ctypes.POINTER(GUID), ctypes.POINTER(ctypes.c_void_p)
+    ]
+    _SHCreateItemFromParsingName.restype = ctypes.c_long
+
+    _GetImageProto = ctypes.WINFUNCTYPE(
+        ctypes.c_long, ctypes.c_void_p, SIZE, ctypes.c_int, ctypes.POINTER(wintypes.HBITMAP)
+    )
+    _ReleaseProto = ctypes.WINFUNCTYPE(ctypes.c_ulong, ctypes.c_void_p)
+
+    _GetObjectW = _gdi32.GetObjectW
+    _GetObjectW.argtypes = [wintypes.HANDLE, ctypes.c_int, ctypes.c_void_p]
+    _GetObjectW.restype = ctypes.c_int
+
+    _GetDIBits = _gdi32.GetDIBits
+    _GetDIBits.argtypes = [
+        wintypes.HDC, wintypes.HBITMAP, wintypes.UINT, wintypes.UINT,
+        ctypes.c_void_p, ctypes.c_void_p, wintypes.UINT,
+    ]
+    _GetDIBits.restype = ctypes.c_int
+
+    _DeleteObject = _gdi32.DeleteObject
+    _DeleteObject.argtypes = [wintypes.HGDIOBJ]
+    _DeleteObject.restype = wintypes.BOOL
+
+    _GetDC = _user32.GetDC
+    _GetDC.argtypes = [wintypes.HWND]
+    _GetDC.restype = wintypes.HDC
+
+    _ReleaseDC = _user32.ReleaseDC
+    _ReleaseDC.argtypes = [wintypes.HWND, wintypes.HDC]
+    _ReleaseDC.restype = ctypes.c_int
+
+    _SHGetKnownFolderPath = _shell32.SHGetKnownFolderPath
+    _SHGetKnownFolderPath.argtypes = [
+        ctypes.POINTER(GUID), wintypes.DWORD, wintypes.HANDLE, ctypes.POINTER(ctypes.c_wchar_p)
+    ]
+    _SHGetKnownFolderPath.restype = ctypes.c_long  # HRESULT, checked by the caller
+
+    _CoTaskMemFree = _ole32.CoTaskMemFree
+    _CoTaskMemFree.argtypes = [ctypes.c_void_p]
+    _CoTaskMemFree.restype = None
+
+
+def _shell_item_icon(path: str, size: int):
+    """
+    Render a file's icon at the requested size with IShellItemImageFactory.
+
+    Returns an RGBA PIL image, or None if the shell can't produce one.
+    """
+    if not getattr(_com_state, "initialized", False):
+        _CoInitializeEx(None, COINIT_APARTMENTTHREADED | COINIT_DISABLE_OLE1DDE)
+        _com_state.initialized = True
+
+    factory = ctypes.c_void_p()
+    iid = ctypes.byref(IID_IShellItemImageFactory)
+    if _SHCreateItemFromParsingName(path, None, iid, ctypes.byref(factory)) < 0:
+        return None
+
+    vtable = ctypes.cast(factory, ctypes.POINTER(ctypes.POINTER(ctypes.c_void_p)))[0]
+    hbitmap = wintypes.HBITMAP()
+    try:
+        # vtable: QueryInterface, AddRef, Release, GetImage
+        get_image = _GetImageProto(vtable[3])
+        if get_image(factory, SIZE(size, size), SIIGBF_ICONONLY, ctypes.byref(hbitmap)) < 0:
+            return None
+    finally:
+        _ReleaseProto(vtable[2])(factory)
+
+    try:
+        bm = BITMAP()
+        if not _GetObjectW(hbitmap, ctypes.sizeof(bm), ctypes.byref(bm)):
+            return None
+
+        width, height = bm.bmWidth, abs(bm.bmHeight)
+        header = BITMAPINFOHEADER(
+            biSize=ctypes.sizeof(BITMAPINFOHEADER),
+            biWidth=width,
+            biHeight=-height,  # top-down rows
+            biPlanes=1,
+            biBitCount=32,
+            biCompression=BI_RGB,
+        )
+        bits = ctypes.create_string_buffer(width * height * 4)
+
+        hdc = _GetDC(None)
+        try:
+            if not _GetDIBits(hdc, hbitmap, 0, height, bits, ctypes.byref(header), DIB_RGB_COLORS):
+                return None
+        finally:
+            _ReleaseDC(None, hdc)
+
+        # Shell bitmaps carry premultiplied alpha
+        return Image.frombuffer("RGBA", (width, height), bits.raw, "raw", "BGRa", 0, 1)
+
+    finally:
+        _DeleteObject(hbitmap)
+
+
 _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="shell_")
 
+
+@functools.cache
+def _get_thumbnail_executor() -> ProcessPoolExecutor:
+    """Process pool for thumbnail decode/resize/encode, which holds the GIL in PIL."""
+    return ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+
+
+def _generate_thumbnail_bytes(path: str, size: int) -> bytes:
+    """Generate PNG thumbnail bytes by file type. Runs in the thumbnail process pool."""
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext in IMAGE_EXTENSIONS:
+        return ShellService._generate_image_thumbnail_bytes(path, size)
+    if ext in VIDEO_EXTENSIONS:
+        return ShellService._generate_video_thumbnail_bytes(path, size)
+    if ext in AUDIO_EXTENSIONS:
+        return ShellService._generate_audio_thumbnail_bytes(path, size)
+    return b""
+
+
+def _submit_thumbnail(path: str, size: int) -> Future:
+    """Queue thumbnail generation on the process pool, or run it here if the pool is unusable."""
+    try:
+        return _get_thumbnail_executor().submit(_generate_thumbnail_bytes, path, size)
+    except (BrokenProcessPool, RuntimeError, OSError) as e:
+        logger.debug(f"Thumbnail process pool unavailable, generating in-thread: {e}")
+        future = Future()
+        future.set_result(_generate_thumbnail_bytes(path, size))
+        return future
+
+
+def _thumbnail_result(future: Future, path: str, size: int) -> bytes:
+    """Wait for a generation job, regenerating in-thread if its worker died."""
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        _get_thumbnail_executor.cache_clear()
+        return _generate_thumbnail_bytes(path, size)
+
 # Supported file extensions for thumbnails
 IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.ico', '.tiff', '.tif'}
 VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.wmv', '.webm', '.flv', '.m4v', '.mpg', '.mpeg'}
 AUDIO_EXTENSIONS = {'.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wma', '.wav', '.opus'}
+THUMBNAIL_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS | AUDIO_EXTENSIONS
 
 # Cache directory for thumbnails
 THUMBNAIL_CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA', ''), 'eX', 'ThumbnailCache')
+_CACHE_PATH_PREFIX = os.path.join(THUMBNAIL_CACHE_DIR, "")
+
+# Thumbnails are small and short-lived; fast deflate beats smaller files
+PNG_COMPRESS_LEVEL = 1
+
+# In-memory LRU of base64 thumbnails in front of the disk cache: (path, size, mtime_ns) -> str
+THUMBNAIL_MEMORY_CACHE_SIZE = 512
+_thumbnail_memory_cache: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_thumbnail_memory_lock = threading.Lock()
 
 # Windows Recent folder path
 RECENT_FOLDER = os.path.join(os.environ.get('APPDATA', ''), 'Microsoft', 'Windows', 'Recent')
 
+# Shell Link (.lnk) layout, see MS-SHLLINK
+LNK_HEADER_SIZE = 0x4C
+LNK_HAS_TARGET_ID_LIST = 0x1
+LNK_HAS_LINK_INFO = 0x2
+LNK_FORCE_NO_LINK_INFO = 0x100
+LNK_INFO_VOLUME_ID_AND_LOCAL_BASE_PATH = 0x1
+LNK_INFO_COMMON_NETWORK_RELATIVE_LINK = 0x2
+
+
+def _read_cstr(data: bytes, offset: int) -> str:
+    """Read a null-terminated ANSI (system code page) string."""
+    return data[offset:data.index(b"\0", offset)].decode("mbcs")
+
+
+def _read_wstr(data: bytes, offset: int) -> str:
+    """Read a null-terminated UTF-16LE string."""
+    end = offset
+    while True:
+        end = data.index(b"\0\0", end)
+        if (end - offset) % 2 == 0:
+            return data[offset:end].decode("utf-16-le")
+        end += 1
+
+
+def _parse_lnk_target(path: str) -> str | None:
+    """
+    Read a shortcut's target path straight from the .lnk file.
+
+    Returns None when the link has no LinkInfo path (e.g. it only carries
+    an IDList), in which case the shell has to resolve it.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if len(data) < LNK_HEADER_SIZE or struct.unpack_from('<I', data, 0)[0] != LNK_HEADER_SIZE:
+            return None
+
+        link_flags, = struct.unpack_from('<I', data, 20)
+        if not link_flags & LNK_HAS_LINK_INFO or link_flags & LNK_FORCE_NO_LINK_INFO:
+            return None
+
+        # LinkInfo follows the header and the optional IDList
+        info = LNK_HEADER_SIZE
+        if link_flags & LNK_HAS_TARGET_ID_LIST:
+            id_list_size, = struct.unpack_from('<H', data, info)
+            info += 2 + id_list_size
+
+        (_, header_size, info_flags, _, base_offset,
+         network_offset, suffix_offset) = struct.unpack_from('<7I', data, info)
+
+        # Unicode offsets are present when the header is extended
+        base_offset_unicode = suffix_offset_unicode = 0
+        if header_size >= 0x24:
+            base_offset_unicode, suffix_offset_unicode = struct.unpack_from('<2I', data, info + 28)
+
+        if suffix_offset_unicode:
+            suffix = _read_wstr(data, info + suffix_offset_unicode)
+        else:
+            suffix = _read_cstr(data, info + suffix_offset)
+
+        if info_flags & LNK_INFO_VOLUME_ID_AND_LOCAL_BASE_PATH:
+            if base_offset_unicode:
+                base = _read_wstr(data, info + base_offset_unicode)
+            else:
+                base = _read_cstr(data, info + base_offset)
+            return base + suffix
+
+        if info_flags & LNK_INFO_COMMON_NETWORK_RELATIVE_LINK:
+            network = info + network_offset
+            net_name_offset, = struct.unpack_from('<I', data, network + 8)
+            if net_name_offset > 0x14:
+                net_name_offset_unicode, = struct.unpack_from('<I', data, network + 20)
+                net_name = _read_wstr(data, network + net_name_offset_unicode)
+            else:
+                net_name = _read_cstr(data, network + net_name_offset)
+            return f"{net_name}\\{suffix}" if suffix else net_name
+
+    except (OSError, ValueError, struct.error):
+        pass
+
+    return None
+
 
 class ShellService:
     """Service for Windows Shell operations."""
 
     @staticmethod
-    def _get_cache_path(path: str, size: int) -> str:
+    def _get_cache_path(path: str, size: int, mtime_ns: int | None = None) -> str:
         """Get the cache file path for a thumbnail."""
         # Create a unique hash based on path and modification time
-        try:
-            mtime = os.path.getmtime(path)
-        except OSError:
-            mtime = 0
-        cache_key = f"{path}:{size}:{mtime}"
-        hash_name = hashlib.md5(cache_key.encode()).hexdigest()
-        return os.path.join(THUMBNAIL_CACHE_DIR, f"{hash_name}.png")
+        if mtime_ns is None:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime_ns = 0
+        cache_key = b"%b:%d:%d" % (os.fsencode(path), size, mtime_ns)
+        hash_name = _cache_hash(cache_key).hexdigest()[:32]
+        return _CACHE_PATH_PREFIX + hash_name + ".png"
 
     @staticmethod
-    def _generate_image_thumbnail(path: str, size: int) -> str:
-        """Generate thumbnail for an image file."""
-        try:
-            from PIL import Image
+    def _generate_image_thumbnail_bytes(path: str, size: int) -> bytes:
+        """Generate PNG thumbnail bytes for an image file."""
+        if HAS_PYVIPS:
+            try:
+                # Shrinks during decode (JPEG DCT scaling, WebP/TIFF subsampling)
+                img = pyvips.Image.thumbnail(path, size, height=size, size="down")
+                if img.hasalpha():
+                    img = img.flatten(background=[255, 255, 255])
+                return img.write_to_buffer(".png", compression=PNG_COMPRESS_LEVEL)
+            except pyvips.Error as e:
+                logger.debug(f"libvips could not thumbnail {path}, falling back to PIL: {e}")
 
+        try:
             # Open image and create thumbnail
             with Image.open(path) as img:
+                # JPEG only: have libjpeg decode at 1/2, 1/4 or 1/8 scale,
+                # keeping at least 2x the target for the Lanczos pass
+                img.draft('RGB', (size * 2, size * 2))
+
                 # Convert to RGB if needed (handles RGBA, P mode, etc.)
                 if img.mode in ('RGBA', 'LA', 'P'):
                     # Create white background
@@ -82,18 +511,23 @@ class ShellService:
 
                 # Save to buffer as PNG
                 buffer = BytesIO()
-                img.save(buffer, format="PNG", optimize=True)
-                return base64.b64encode(buffer.getvalue()).decode("ascii")
+                img.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+                return buffer.getvalue()
 
         except Exception as e:
             logger.debug(f"Failed to generate image thumbnail for {path}: {e}")
-            return ""
+            return b""
 
     @staticmethod
-    def _generate_video_thumbnail(path: str, size: int) -> str:
-        """Generate thumbnail for a video file using ffmpeg."""
-        import subprocess
-        import tempfile
+    def _generate_video_thumbnail_bytes(path: str, size: int) -> bytes:
+        """Generate PNG thumbnail bytes for a video file using PyAV or ffmpeg."""
+        if HAS_PYAV:
+            try:
+                png_bytes = ShellService._decode_video_frame(path, size)
+                if png_bytes:
+                    return png_bytes
+            except Exception as e:
+                logger.debug(f"PyAV could not thumbnail {path}, falling back to ffmpeg: {e}")
 
         try:
             # Create temp file for the frame
@@ -139,9 +573,7 @@ class ShellService:
                 )
 
                 if result.returncode == 0 and os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
-                    # Read the generated image and convert to base64
-                    from PIL import Image
-
+                    # Read the generated image and convert to PNG
                     with Image.open(tmp_path) as img:
                         # Ensure we have RGB
                         if img.mode != 'RGB':
@@ -151,8 +583,8 @@ class ShellService:
                         img.thumbnail((size, size), Image.Resampling.LANCZOS)
 
                         buffer = BytesIO()
-                        img.save(buffer, format="PNG", optimize=True)
-                        return base64.b64encode(buffer.getvalue()).decode("ascii")
+                        img.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+                        return buffer.getvalue()
 
             finally:
                 # Clean up temp file
@@ -168,25 +600,43 @@ class ShellService:
         except Exception as e:
             logger.debug(f"Failed to generate video thumbnail for {path}: {e}")
 
-        return ""
+        return b""
 
     @staticmethod
-    def _generate_audio_thumbnail(path: str, size: int) -> str:
-        """Extract album art from an audio file."""
-        try:
-            from PIL import Image
+    def _decode_video_frame(path: str, size: int) -> bytes:
+        """Decode one keyframe with PyAV and scale it with libswscale."""
+        with av.open(path) as container:
+            stream = container.streams.video[0]
+            # Only keyframes are needed, skip decoding everything in between
+            stream.codec_context.skip_frame = "NONKEY"
+
+            # Seek to 10% of video or 1 second, whichever is smaller
+            duration = container.duration / av.time_base if container.duration else 0
+            seek_time = min(duration * 0.1, 1.0) if duration > 0 else 1.0
+            container.seek(int(seek_time * av.time_base))
+
+            frame = next(container.decode(stream), None)
+            if frame is None:
+                return b""
+
+            scale = min(size / frame.width, size / frame.height, 1.0)
+            width = max(1, round(frame.width * scale))
+            height = max(1, round(frame.height * scale))
+            img = frame.reformat(width=width, height=height, format="rgb24").to_image()
+
+        buffer = BytesIO()
+        img.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return buffer.getvalue()
 
+    @staticmethod
+    def _generate_audio_thumbnail_bytes(path: str, size: int) -> bytes:
+        """Extract album art from an audio file as PNG thumbnail bytes."""
+        try:
             ext = os.path.splitext(path)[1].lower()
             image_data = None
 
             # Try mutagen for various formats
-            try:
-                from mutagen import File as MutagenFile
-                from mutagen.mp3 import MP3
-                from mutagen.id3 import ID3
-                from mutagen.flac import FLAC
-                from mutagen.mp4 import MP4
-
+            if HAS_MUTAGEN:
                 if ext == '.mp3':
                     try:
                         audio = ID3(path)
@@ -233,7 +683,7 @@ class ShellService:
                     except Exception:
                         pass
 
-            except ImportError:
+            else:
                 logger.debug("mutagen not available for audio thumbnails")
 
             if image_data:
@@ -256,67 +706,183 @@ class ShellService:
 
                 # Save to buffer
                 buffer = BytesIO()
-                img.save(buffer, format="PNG", optimize=True)
-                return base64.b64encode(buffer.getvalue()).decode("ascii")
+                img.save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+                return buffer.getvalue()
 
         except Exception as e:
             logger.debug(f"Failed to generate audio thumbnail for {path}: {e}")
 
-        return ""
+        return b""
+
+    @staticmethod
+    def _remember_thumbnail(key: tuple[str, int, int], data: str) -> str:
+        """Add a thumbnail to the memory cache, evicting the least recently used."""
+        with _thumbnail_memory_lock:
+            _thumbnail_memory_cache[key] = data
+            _thumbnail_memory_cache.move_to_end(key)
+            while len(_thumbnail_memory_cache) > THUMBNAIL_MEMORY_CACHE_SIZE:
+                _thumbnail_memory_cache.popitem(last=False)
+        return data
+
+    @staticmethod
+    def _lookup_thumbnail(path: str, size: int, mtime_ns: int | None = None):
+        """
+        Look a thumbnail up in the memory and disk caches.
+
+        Returns (memory key, disk cache path, cached base64 or None).
+        """
+        if mtime_ns is None:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime_ns = 0
+
+        memory_key = (path, size, mtime_ns)
+        with _thumbnail_memory_lock:
+            cached = _thumbnail_memory_cache.get(memory_key)
+            if cached is not None:
+                _thumbnail_memory_cache.move_to_end(memory_key)
+                return memory_key, None, cached
+
+        cache_path = ShellService._get_cache_path(path, size, mtime_ns)
+        if os.path.exists(cache_path):
+            try:
+                # Encode straight from the mapping instead of reading into a bytes copy
+                with open(cache_path, 'rb') as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        data = _b64encode(mm)
+                return memory_key, cache_path, ShellService._remember_thumbnail(memory_key, data)
+            except (OSError, ValueError):
+                # ValueError: empty (truncated) cache file, regenerate it
+                pass
+
+        return memory_key, cache_path, None
+
+    @staticmethod
+    def _store_thumbnail(
+        memory_key: tuple[str, int, int], cache_path: str, png_bytes: bytes
+    ) -> str:
+        """Cache generated PNG bytes on disk and in memory, returning the base64 form."""
+        if not png_bytes:
+            return ""
+
+        # Cache the raw PNG; base64 only at the API boundary
+        try:
+            with open(cache_path, 'wb') as f:
+                f.write(png_bytes)
+        except OSError as e:
+            logger.debug(f"Failed to cache thumbnail: {e}")
+
+        return ShellService._remember_thumbnail(memory_key, _b64encode(png_bytes))
+
+    @staticmethod
+    def _get_thumbnail_sync(path: str, size: int, mtime_ns: int | None = None) -> str:
+        """Get a thumbnail from the cache or generate it. The cache directory must exist."""
+        try:
+            if os.path.splitext(path)[1].lower() not in THUMBNAIL_EXTENSIONS:
+                return ""
+
+            memory_key, cache_path, cached = ShellService._lookup_thumbnail(path, size, mtime_ns)
+            if cached is not None:
+                return cached
+
+            png_bytes = _thumbnail_result(_submit_thumbnail(path, size), path, size)
+            return ShellService._store_thumbnail(memory_key, cache_path, png_bytes)
+
+        except Exception as e:
+            logger.error(f"Error getting thumbnail for {path}: {e}")
+            return ""
 
     @staticmethod
     async def get_thumbnail(path: str, size: int = 96) -> str:
         """Get file thumbnail as base64-encoded PNG."""
-        import asyncio
 
         def get_thumb():
+            # Ensure cache directory exists
             try:
-                # Check file extension
-                ext = os.path.splitext(path)[1].lower()
-
-                # Ensure cache directory exists
                 os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+            except OSError as e:
+                logger.error(f"Error getting thumbnail for {path}: {e}")
+                return ""
+
+            return ShellService._get_thumbnail_sync(path, size)
 
-                # Check cache first
-                cache_path = ShellService._get_cache_path(path, size)
-                if os.path.exists(cache_path):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(_executor, get_thumb)
+
+    @staticmethod
+    async def get_thumbnails_batch(paths: list[str], size: int = 96) -> dict[str, str]:
+        """
+        Get thumbnails for many files in one executor job.
+
+        Returns a mapping of path to base64-encoded PNG ("" when unavailable).
+        """
+
+        def get_thumbs():
+            try:
+                os.makedirs(THUMBNAIL_CACHE_DIR, exist_ok=True)
+            except OSError as e:
+                logger.error(f"Error creating thumbnail cache: {e}")
+                return dict.fromkeys(paths, "")
+
+            # Group by folder so each folder's mtimes come from one scandir
+            by_dir: dict[str, list[str]] = {}
+            for path in paths:
+                by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+            thumbnails = {}
+            pending = []
+            for directory, dir_paths in by_dir.items():
+                mtimes = {}
+                if len(dir_paths) > 1:
+                    wanted = {os.path.normcase(os.path.basename(path)) for path in dir_paths}
                     try:
-                        with open(cache_path, 'rb') as f:
-                            return base64.b64encode(f.read()).decode("ascii")
+                        with os.scandir(directory) as it:
+                            for entry in it:
+                                name = os.path.normcase(entry.name)
+                                if name in wanted:
+                                    mtimes[name] = entry.stat().st_mtime_ns
                     except OSError:
                         pass
 
-                thumbnail_data = ""
+                for path in dir_paths:
+                    thumbnails[path] = ""
+                    if os.path.splitext(path)[1].lower() not in THUMBNAIL_EXTENSIONS:
+                        continue
 
-                # Generate thumbnail based on file type
-                if ext in IMAGE_EXTENSIONS:
-                    thumbnail_data = ShellService._generate_image_thumbnail(path, size)
-                elif ext in VIDEO_EXTENSIONS:
-                    thumbnail_data = ShellService._generate_video_thumbnail(path, size)
-                elif ext in AUDIO_EXTENSIONS:
-                    thumbnail_data = ShellService._generate_audio_thumbnail(path, size)
-
-                # Cache the result if successful
-                if thumbnail_data:
+                    mtime_ns = mtimes.get(os.path.normcase(os.path.basename(path)))
                     try:
-                        with open(cache_path, 'wb') as f:
-                            f.write(base64.b64decode(thumbnail_data))
-                    except OSError as e:
-                        logger.debug(f"Failed to cache thumbnail: {e}")
+                        memory_key, cache_path, cached = ShellService._lookup_thumbnail(
+                            path, size, mtime_ns
+                        )
+                    except Exception as e:
+                        logger.error(f"Error getting thumbnail for {path}: {e}")
+                        continue
 
-                return thumbnail_data
+                    if cached is not None:
+                        thumbnails[path] = cached
+                    else:
+                        # Queue every miss first so the process pool decodes them in parallel
+                        future = _submit_thumbnail(path, size)
+                        pending.append((path, memory_key, cache_path, future))
 
-            except Exception as e:
-                logger.error(f"Error getting thumbnail for {path}: {e}")
-                return ""
+            for path, memory_key, cache_path, future in pending:
+                try:
+                    png_bytes = _thumbnail_result(future, path, size)
+                    thumbnails[path] = ShellService._store_thumbnail(
+                        memory_key, cache_path, png_bytes
+                    )
+                except Exception as e:
+                    logger.error(f"Error getting thumbnail for {path}: {e}")
+
+            return thumbnails
 
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(_executor, get_thumb)
+        return await loop.run_in_executor(_executor, get_thumbs)
 
     @staticmethod
     async def get_icon(path: str, size: int = 16) -> str:
         """Get file icon as base64-encoded PNG."""
-        import asyncio
 
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
@@ -327,24 +893,21 @@ class ShellService:
     def _get_icon_sync(path: str, size: int) -> str:
         """Get file icon synchronously."""
         try:
-            # Use SHGetFileInfo to get icon
-            class SHFILEINFO(ctypes.Structure):
-                _fields_ = [
-                    ("hIcon", wintypes.HICON),
-                    ("iIcon", ctypes.c_int),
-                    ("dwAttributes", wintypes.DWORD),
-                    ("szDisplayName", wintypes.WCHAR * 260),
-                    ("szTypeName", wintypes.WCHAR * 80),
-                ]
+            # The shell renders the icon at the exact size in one call
+            img = _shell_item_icon(path, size)
+            if img is not None:
+                if img.size != (size, size):
+                    img = img.resize((size, size), Image.Resampling.LANCZOS)
 
-            SHGFI_ICON = 0x100
-            SHGFI_SMALLICON = 0x1
-            SHGFI_LARGEICON = 0x0
+                buffer = BytesIO()
+                img.save(buffer, format="PNG")
+                return _b64encode(buffer.getvalue())
 
+            # Fall back to SHGetFileInfo + GDI for items the factory can't handle
             shfi = SHFILEINFO()
             flags = SHGFI_ICON | (SHGFI_SMALLICON if size <= 16 else SHGFI_LARGEICON)
 
-            result = ctypes.windll.shell32.SHGetFileInfoW(
+            result = _SHGetFileInfoW(
                 path,
                 0,
                 ctypes.byref(shfi),
@@ -354,11 +917,9 @@ class ShellService:
 
             if result and shfi.hIcon:
                 try:
-                    # Convert icon to PNG
-                    from PIL import Image
-                    import win32gui
-                    import win32ui
-                    import win32con
+                    # Convert icon to PNG (the icon is still destroyed below)
+                    if not HAS_PYWIN32:
+                        return ""
 
                     # Get icon info
                     icon_info = win32gui.GetIconInfo(shfi.hIcon)
@@ -406,14 +967,11 @@ class ShellService:
                     # Convert to base64 PNG
                     buffer = BytesIO()
                     img.save(buffer, format="PNG")
-                    return base64.b64encode(buffer.getvalue()).decode("ascii")
+                    return _b64encode(buffer.getvalue())
 
-                except ImportError:
-                    # If win32gui not available, return empty
-                    return ""
                 finally:
                     # Clean up
-                    ctypes.windll.user32.DestroyIcon(shfi.hIcon)
+                    _DestroyIcon(shfi.hIcon)
 
         except Exception as e:
             logger.error(f"Error getting icon for {path}: {e}")
@@ -462,16 +1020,15 @@ class ShellService:
     async def execute(path: str, verb: str = "open", args: str | None = None, directory: str | None = None) -> dict[str, Any]:
         """Execute a shell verb on a file."""
         try:
-            import asyncio
 
             def do_execute():
-                result = ctypes.windll.shell32.ShellExecuteW(
-                    None,       # hwnd
-                    verb,       # verb
-                    path,       # file
-                    args,       # params
-                    directory,  # directory
-                    1,          # SW_SHOWNORMAL
+                result = _ShellExecuteW(
+                    None,           # hwnd
+                    verb,           # verb
+                    path,           # file
+                    args,           # params
+                    directory,      # directory
+                    SW_SHOWNORMAL,
                 )
 
                 if result <= 32:
@@ -489,19 +1046,11 @@ class ShellService:
     @staticmethod
     async def show_properties(path: str) -> dict[str, Any]:
         """Show properties dialog for a file."""
-        import asyncio
 
         def do_show_properties():
             try:
-                # Use SHObjectProperties via ctypes
-                # SHOP_FILEPATH = 0x2
-                SHOP_FILEPATH = 0x2
-
-                # Load shell32 and call SHObjectProperties
-                shell32 = ctypes.windll.shell32
-
                 # SHObjectProperties(HWND hwnd, DWORD shopObjectType, LPCWSTR pszObjectName, LPCWSTR pszPropertyPage)
-                result = shell32.SHObjectProperties(
+                result = _SHObjectProperties(
                     None,           # hwnd
                     SHOP_FILEPATH,  # shopObjectType - file path
                     path,           # pszObjectName
@@ -528,13 +1077,13 @@ class ShellService:
     @staticmethod
     async def create_shortcut(target_path: str, shortcut_path: str) -> dict[str, Any]:
         """Create a Windows shortcut (.lnk) file."""
-        import asyncio
 
         def do_create():
-            try:
-                import win32com.client
-                import pythoncom
+            if not HAS_PYWIN32:
+                logger.warning("win32com not available for creating shortcuts")
+                return {"success": False, "error": "win32com not available"}
 
+            try:
                 pythoncom.CoInitialize()
                 try:
                     shell = win32com.client.Dispatch("WScript.Shell")
@@ -545,9 +1094,6 @@ class ShellService:
                     return {"success": True, "path": shortcut_path}
                 finally:
                     pythoncom.CoUninitialize()
-            except ImportError:
-                logger.warning("win32com not available for creating shortcuts")
-                return {"success": False, "error": "win32com not available"}
             except Exception as e:
                 logger.error(f"Error creating shortcut: {e}")
                 return {"success": False, "error": str(e)}
@@ -569,103 +1115,93 @@ class ShellService:
         Returns:
             List of recent file info dicts with path, name, and accessedAt
         """
-        import asyncio
-
-        def get_recent():
-            recent_files = []
 
+        def list_shortcuts():
             if not os.path.exists(RECENT_FOLDER):
                 logger.warning(f"Recent folder not found: {RECENT_FOLDER}")
-                return recent_files
-
-            try:
-                import win32com.client
-                import pythoncom
-
-                pythoncom.CoInitialize()
-                try:
-                    shell = win32com.client.Dispatch("WScript.Shell")
+                return []
+
+            # Get all .lnk files in Recent folder, sorted by modification time (newest first)
+            # Recent only holds files; DirEntry.stat() comes from the directory listing
+            lnk_files = []
+            with os.scandir(RECENT_FOLDER) as it:
+                for entry in it:
+                    if entry.name.endswith('.lnk'):
+                        try:
+                            lnk_files.append((entry.path, entry.stat().st_mtime))
+                        except OSError:
+                            continue
 
-                    # Get all .lnk files in Recent folder, sorted by modification time (newest first)
-                    lnk_files = []
-                    for entry in os.scandir(RECENT_FOLDER):
-                        if entry.name.endswith('.lnk') and entry.is_file():
-                            try:
-                                stat = entry.stat()
-                                lnk_files.append((entry.path, stat.st_mtime))
-                            except OSError:
-                                continue
+            # Sort by modification time, newest first
+            lnk_files.sort(key=lambda x: x[1], reverse=True)
+            return lnk_files[:limit * 2]  # Get extra in case some fail
 
-                    # Sort by modification time, newest first
-                    lnk_files.sort(key=lambda x: x[1], reverse=True)
+        def resolve_with_shell(lnk_paths):
+            # IDList-only links the .lnk parser can't read; let the shell resolve them
+            targets = {}
+            if not HAS_PYWIN32:
+                return targets
 
-                    for lnk_path, mtime in lnk_files[:limit * 2]:  # Get extra in case some fail
-                        if len(recent_files) >= limit:
-                            break
+            pythoncom.CoInitialize()
+            try:
+                shell = win32com.client.Dispatch("WScript.Shell")
+                for lnk_path in lnk_paths:
+                    try:
+                        targets[lnk_path] = shell.CreateShortCut(lnk_path).TargetPath
+                    except Exception as e:
+                        logger.debug(f"Failed to resolve shortcut {lnk_path}: {e}")
+            finally:
+                pythoncom.CoUninitialize()
 
-                        try:
-                            shortcut = shell.CreateShortCut(lnk_path)
-                            target_path = shortcut.TargetPath
-
-                            # Skip if target doesn't exist or is a directory
-                            if not target_path or not os.path.exists(target_path):
-                                continue
-
-                            # Skip directories - we only want files
-                            if os.path.isdir(target_path):
-                                continue
-
-                            # Get file name from target
-                            file_name = os.path.basename(target_path)
-
-                            # Convert mtime to milliseconds for JS
-                            accessed_at = int(mtime * 1000)
-
-                            recent_files.append({
-                                "path": target_path,
-                                "name": file_name,
-                                "accessedAt": accessed_at,
-                            })
-                        except Exception as e:
-                            logger.debug(f"Failed to resolve shortcut {lnk_path}: {e}")
-                            continue
+            return targets
 
-                finally:
-                    pythoncom.CoUninitialize()
+        def build(lnk_files, targets):
+            recent_files = []
+            for (lnk_path, mtime), target_path in zip(lnk_files, targets):
+                if len(recent_files) >= limit:
+                    break
 
-            except ImportError:
-                logger.warning("win32com not available, falling back to basic implementation")
-                # Fallback without shortcut resolution - just list the lnk files
-                try:
-                    lnk_files = []
-                    for entry in os.scandir(RECENT_FOLDER):
-                        if entry.name.endswith('.lnk') and entry.is_file():
-                            try:
-                                stat = entry.stat()
-                                lnk_files.append((entry, stat.st_mtime))
-                            except OSError:
-                                continue
-
-                    lnk_files.sort(key=lambda x: x[1], reverse=True)
-
-                    for entry, mtime in lnk_files[:limit]:
-                        # Remove .lnk extension to get original name
-                        name = entry.name[:-4] if entry.name.endswith('.lnk') else entry.name
-                        recent_files.append({
-                            "path": entry.path,  # Path to .lnk file
-                            "name": name,
-                            "accessedAt": int(mtime * 1000),
-                        })
-                except Exception as e:
-                    logger.error(f"Error reading recent folder: {e}")
+                # Skip if target doesn't exist or is a directory - we only want files
+                if not target_path or not os.path.isfile(target_path):
+                    continue
 
-            except Exception as e:
-                logger.error(f"Error getting recent files: {e}")
+                recent_files.append({
+                    "path": target_path,
+                    "name": os.path.basename(target_path),
+                    # Convert mtime to milliseconds for JS
+                    "accessedAt": int(mtime * 1000),
+                })
 
             return recent_files
 
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(_executor, get_recent)
+        try:
+            lnk_files = await loop.run_in_executor(_executor, list_shortcuts)
+
+            # Parse the shortcuts concurrently; fanned out from here rather than
+            # from inside a worker so the pool can't deadlock on itself
+            targets = await asyncio.gather(*(
+                loop.run_in_executor(_executor, _parse_lnk_target, lnk_path)
+                for lnk_path, _ in lnk_files
+            ))
+
+            unresolved = [
+                lnk_path for (lnk_path, _), target in zip(lnk_files, targets) if target is None
+            ]
+            if unresolved:
+                shell_targets = await loop.run_in_executor(
+                    _executor, resolve_with_shell, unresolved
+                )
+                targets = [
+                    shell_targets.get(lnk_path) if target is None else target
+                    for (lnk_path, _), target in zip(lnk_files, targets)
+                ]
+
+            return await loop.run_in_executor(_executor, build, lnk_files, targets)
+
+        except Exception as e:
+            logger.error(f"Error getting recent files: {e}")
+            return []
 
     @staticmethod
     async def get_known_folder_paths() -> dict[str, str]:
@@ -678,59 +1214,30 @@ class ShellService:
         Returns:
             Dictionary mapping folder names to their actual paths
         """
-        import asyncio
 
         def get_paths():
             paths = {}
 
-            try:
-                # GUID structure for SHGetKnownFolderPath
-                class GUID(ctypes.Structure):
-                    _fields_ = [
-                        ("Data1", ctypes.c_ulong),
-                        ("Data2", ctypes.c_ushort),
-                        ("Data3", ctypes.c_ushort),
-                        ("Data4", ctypes.c_ubyte * 8),
-                    ]
-
-                # Get SHGetKnownFolderPath function
-                shell32 = ctypes.windll.shell32
-                ole32 = ctypes.windll.ole32
-
-                for name, guid_str in KNOWN_FOLDER_GUIDS.items():
-                    try:
-                        # Parse GUID string to struct
-                        guid_uuid = uuid.UUID(guid_str)
-                        guid = GUID()
-                        guid.Data1 = guid_uuid.time_low
-                        guid.Data2 = guid_uuid.time_mid
-                        guid.Data3 = guid_uuid.time_hi_version
-                        for i, b in enumerate(guid_uuid.node.to_bytes(6, 'big')):
-                            guid.Data4[i + 2] = b
-                        guid.Data4[0] = (guid_uuid.clock_seq_hi_variant)
-                        guid.Data4[1] = (guid_uuid.clock_seq_low)
-
-                        # Call SHGetKnownFolderPath
-                        path_ptr = ctypes.c_wchar_p()
-                        result = shell32.SHGetKnownFolderPath(
-                            ctypes.byref(guid),
-                            0,  # dwFlags
-                            None,  # hToken (current user)
-                            ctypes.byref(path_ptr)
-                        )
-
-                        if result == 0 and path_ptr.value:  # S_OK
-                            paths[name] = path_ptr.value
-                            # Free the memory allocated by SHGetKnownFolderPath
-                            ole32.CoTaskMemFree(path_ptr)
-                        else:
-                            logger.debug(f"Failed to get path for {name}: HRESULT {result}")
+            for name, folder_id in KNOWN_FOLDER_IDS.items():
+                try:
+                    # Call SHGetKnownFolderPath
+                    path_ptr = ctypes.c_wchar_p()
+                    result = _SHGetKnownFolderPath(
+                        ctypes.byref(folder_id),
+                        0,  # dwFlags
+                        None,  # hToken (current user)
+                        ctypes.byref(path_ptr)
+                    )
 
-                    except Exception as e:
-                        logger.debug(f"Error getting path for {name}: {e}")
+                    if result == 0 and path_ptr.value:  # S_OK
+                        paths[name] = path_ptr.value
+                        # Free the memory allocated by SHGetKnownFolderPath
+                        _CoTaskMemFree(path_ptr)
+                    else:
+                        logger.debug(f"Failed to get path for {name}: HRESULT {result}")
 
-            except Exception as e:
-                logger.error(f"Error getting known folder paths: {e}")
+                except Exception as e:
+                    logger.debug(f"Error getting path for {name}: {e}")
 
             return paths
 
@@ -2,45 +2,177 @@
 Theme management service.
 """
 
-import json
 import os
+import sys
+import ctypes
+import threading
 from pathlib import Path
 from typing import Any
 import logging
 
+import msgspec
+
+from ..utils._win32 import (
+    INVALID_HANDLE_VALUE,
+    FindCloseChangeNotification,
+    FindFirstChangeNotificationW,
+    FindNextChangeNotification,
+    WaitForSingleObject,
+)
+
 logger = logging.getLogger(__name__)
 
+# Optional orjson for theme JSON; msgspec (already required) otherwise
+try:
+    import orjson
+
+    _jloads = orjson.loads
+
+    def _jdumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+except ImportError:
+    _jloads = msgspec.json.decode
+
+    def _jdumps(obj: Any) -> bytes:
+        return msgspec.json.format(msgspec.json.encode(obj), indent=2)
+
 # Theme storage directory
 THEME_DIR = Path(os.environ.get("APPDATA", "")) / "X-Plorer" / "themes"
 
+# Directory change notifications for the theme index
+INFINITE = 0xFFFFFFFF
+WAIT_OBJECT_0 = 0
+FILE_NOTIFY_CHANGE_FILE_NAME = 0x1
+FILE_NOTIFY_CHANGE_LAST_WRITE = 0x10
+
 
 class ThemeService:
     """Service for managing custom themes."""
 
     def __init__(self):
         THEME_DIR.mkdir(parents=True, exist_ok=True)
+        # (name, mtime_ns) of every theme file when the listing was built
+        self._themes_key: tuple[tuple[str, int], ...] | None = None
+        self._themes_cache: list[dict[str, Any]] = []
+        # Per-file summaries so only changed files are re-parsed
+        self._theme_entries: dict[str, tuple[int, dict[str, Any]]] = {}
+        # Set by the directory watcher; the listing is trusted while clear
+        self._themes_dirty = True
+        self._watch_thread: threading.Thread | None = None
+        self._watch_lock = threading.Lock()
+
+    def _invalidate_themes(self) -> None:
+        """Drop the cached listing after a save, delete or directory change."""
+        self._themes_dirty = True
+        self._themes_key = None
+
+    def _start_theme_watch(self) -> bool:
+        """
+        Start the thread that invalidates the listing on directory changes.
+
+        Returns True while the watch is armed.
+        """
+        with self._watch_lock:
+            if self._watch_thread is None:
+                armed = threading.Event()
+                self._watch_thread = threading.Thread(
+                    target=self._watch_theme_dir,
+                    args=(armed,),
+                    name="xplorer-theme-watch",
+                    daemon=True,
+                )
+                self._watch_thread.start()
+                armed.wait()
+
+        return self._watch_thread.is_alive()
+
+    def _watch_theme_dir(self, armed: threading.Event):
+        """Wait for theme files to be added, removed, renamed or written."""
+        handle = None
+        try:
+            handle = FindFirstChangeNotificationW(
+                str(THEME_DIR), False, FILE_NOTIFY_CHANGE_FILE_NAME | FILE_NOTIFY_CHANGE_LAST_WRITE
+            )
+            if not handle or handle == INVALID_HANDLE_VALUE:
+                handle = None
+                error = ctypes.WinError(ctypes.get_last_error())
+                logger.warning(f"Could not watch theme directory: {error}")
+                return
+
+            armed.set()
+            while WaitForSingleObject(handle, INFINITE) == WAIT_OBJECT_0:
+                self._invalidate_themes()
+                if not FindNextChangeNotification(handle):
+                    break
+
+        except Exception as e:
+            logger.warning(f"Theme directory watch stopped: {e}")
+
+        finally:
+            armed.set()
+            if handle is not None:
+                FindCloseChangeNotification(handle)
+            self._invalidate_themes()
+
+    @staticmethod
+    def _load_theme_entry(file_path: str, theme_id: str) -> dict[str, Any]:
+        """Read the id/name/base summary of one theme file."""
+        with open(file_path, "rb") as f:
+            theme = _jloads(f.read())
+        return {
+            "id": theme_id,
+            "name": theme.get("name", theme_id),
+            "base": theme.get("base", "dark"),
+        }
 
     async def list_themes(self) -> list[dict[str, Any]]:
-        """List all available custom themes."""
-        themes = []
+        """
+        List all available custom themes.
 
-        try:
-            for file in THEME_DIR.glob("*.json"):
-                try:
-                    with open(file, "r", encoding="utf-8") as f:
-                        theme = json.load(f)
-                        themes.append({
-                            "id": file.stem,
-                            "name": theme.get("name", file.stem),
-                            "base": theme.get("base", "dark"),
-                        })
-                except Exception as e:
-                    logger.error(f"Error loading theme {file}: {e}")
+        While the directory watch is running the cached listing is returned
+        without touching the file system.
+        """
+        if self._start_theme_watch() and not self._themes_dirty:
+            return list(self._themes_cache)
 
+        # Clear before scanning so a change during the scan re-marks it
+        self._themes_dirty = False
+        try:
+            # DirEntry.stat() comes from the directory read on Windows
+            with os.scandir(THEME_DIR) as it:
+                files = sorted(
+                    (entry.name, entry.stat().st_mtime_ns, entry.path)
+                    for entry in it
+                    if entry.name.lower().endswith(".json") and entry.is_file()
+                )
         except Exception as e:
             logger.error(f"Error listing themes: {e}")
+            self._themes_dirty = True
+            return []
+
+        key = tuple((name, mtime_ns) for name, mtime_ns, _ in files)
+        if key == self._themes_key:
+            return list(self._themes_cache)
+
+        themes = []
+        entries = {}
+        for name, mtime_ns, file_path in files:
+            cached = self._theme_entries.get(name)
+            if cached is not None and cached[0] == mtime_ns:
+                entry = cached[1]
+            else:
+                try:
+                    entry = self._load_theme_entry(file_path, name[:-5])
+                except Exception as e:
+                    logger.error(f"Error loading theme {file_path}: {e}")
+                    continue
+            entries[name] = (mtime_ns, entry)
+            themes.append(entry)
 
-        return themes
+        self._theme_entries = entries
+        self._themes_cache = themes
+        self._themes_key = key
+        return list(themes)
 
     async def get_theme(self, theme_id: str) -> dict[str, Any]:
         """Get a theme by ID."""
@@ -49,8 +181,7 @@ class ThemeService:
         if not theme_path.exists():
             raise FileNotFoundError(f"Theme not found: {theme_id}")
 
-        with open(theme_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _jloads(theme_path.read_bytes())
 
     async def save_theme(self, theme: dict[str, Any]) -> dict[str, Any]:
         """Save a custom theme."""
@@ -60,9 +191,9 @@ class ThemeService:
 
         theme_path = THEME_DIR / f"{theme_id}.json"
 
-        with open(theme_path, "w", encoding="utf-8") as f:
-            json.dump(theme, f, indent=2)
+        theme_path.write_bytes(_jdumps(theme))
 
+        self._invalidate_themes()
         return {"id": theme_id, "path": str(theme_path)}
 
     async def delete_theme(self, theme_id: str) -> dict[str, Any]:
@@ -73,4 +204,5 @@ class ThemeService:
             raise FileNotFoundError(f"Theme not found: {theme_id}")
 
         theme_path.unlink()
+        self._invalidate_themes()
         return {"deleted": theme_id}
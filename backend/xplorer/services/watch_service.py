@@ -5,15 +5,42 @@ File system watching service using ReadDirectoryChangesW.
 import asyncio
 import ctypes
 from ctypes import wintypes
+import itertools
 import logging
+import struct
+import sys
 from typing import Callable, Any
-from concurrent.futures import ThreadPoolExecutor
 import threading
 
 from ..protocol import XPEvent, FSEventType
+from ..utils._win32 import (
+    INVALID_HANDLE_VALUE,
+    MEM_COMMIT,
+    MEM_RELEASE,
+    MEM_RESERVE,
+    OVERLAPPED,
+    PAGE_READWRITE,
+    CancelIoEx,
+    CloseHandle,
+    CreateFileW,
+    CreateIoCompletionPort,
+    GetDriveTypeW,
+    GetQueuedCompletionStatus,
+    PostQueuedCompletionStatus,
+    ReadDirectoryChangesW,
+    VirtualAlloc,
+    VirtualFree,
+)
 
 logger = logging.getLogger(__name__)
 
+# Compiled notification parser, if built
+try:
+    from ..core import watch_parser
+    USE_CYTHON = True
+except ImportError:
+    USE_CYTHON = False
+
 # Windows constants
 FILE_NOTIFY_CHANGE_FILE_NAME = 0x1
 FILE_NOTIFY_CHANGE_DIR_NAME = 0x2
@@ -28,7 +55,47 @@ FILE_ACTION_MODIFIED = 0x3
 FILE_ACTION_RENAMED_OLD_NAME = 0x4
 FILE_ACTION_RENAMED_NEW_NAME = 0x5
 
-INVALID_HANDLE_VALUE = ctypes.c_void_p(-1).value
+INFINITE = 0xFFFFFFFF
+ERROR_INVALID_HANDLE = 6
+ERROR_OPERATION_ABORTED = 995
+ERROR_NOTIFY_ENUM_DIR = 1022
+WAIT_TIMEOUT = 258
+DRIVE_REMOTE = 4
+
+# Errors after which a watch's handle is gone; anything else is re-armed
+FATAL_WATCH_ERRORS = (ERROR_INVALID_HANDLE, ERROR_OPERATION_ABORTED)
+
+FILE_LIST_DIRECTORY = 0x1
+FILE_SHARE_ALL = 0x7  # FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE
+OPEN_EXISTING = 3
+FILE_FLAG_BACKUP_SEMANTICS = 0x02000000
+FILE_FLAG_OVERLAPPED = 0x40000000
+
+NOTIFY_FILTER = (
+    FILE_NOTIFY_CHANGE_FILE_NAME |
+    FILE_NOTIFY_CHANGE_DIR_NAME |
+    FILE_NOTIFY_CHANGE_ATTRIBUTES |
+    FILE_NOTIFY_CHANGE_SIZE |
+    FILE_NOTIFY_CHANGE_LAST_WRITE |
+    FILE_NOTIFY_CHANGE_CREATION
+)
+
+# Notification buffer per watch. Bursts (builds, checkouts) overflow small
+# buffers; remote volumes reject buffers over 64KB.
+DEFAULT_NOTIFY_BUFFER_SIZE = 1 << 20
+NETWORK_NOTIFY_BUFFER_SIZE = 64 * 1024
+
+# Flush queued events early when a single read yields this many
+EVENT_BATCH_SIZE = 256
+
+# Completion key reserved for waking the completion thread
+STOP_KEY = 0
+
+# How long stop() waits for cancelled reads to drain (ms)
+DRAIN_TIMEOUT_MS = 1000
+
+# Upper bound on waiting for the completion thread in stop() (seconds)
+STOP_JOIN_TIMEOUT = 2.0
 
 
 class FILE_NOTIFY_INFORMATION(ctypes.Structure):
@@ -40,43 +107,131 @@ class FILE_NOTIFY_INFORMATION(ctypes.Structure):
     ]
 
 
+# NextEntryOffset, Action, FileNameLength; the name follows the header
+_NOTIFY_HEADER = struct.Struct("<III")
+_FILENAME_OFFSET = FILE_NOTIFY_INFORMATION.FileName.offset
+
+# Actions that map straight to an event (renames pair old/new names)
+_ACTION_TO_EVENT = {
+    FILE_ACTION_ADDED: FSEventType.CREATED,
+    FILE_ACTION_REMOVED: FSEventType.DELETED,
+    FILE_ACTION_MODIFIED: FSEventType.MODIFIED,
+}
+
+
+def _parse_notifications(buffer, base: int, size: int, path_prefix: str) -> list[tuple[int, str]]:
+    """Pure-Python twin of core.watch_parser.parse: (action, full path) records."""
+    records = []
+    offset = 0
+    while offset < size:
+        next_offset, action, name_bytes = _NOTIFY_HEADER.unpack_from(buffer, offset)
+
+        # Wide file name straight out of the buffer in one call
+        records.append((
+            action,
+            path_prefix + ctypes.wstring_at(base + offset + _FILENAME_OFFSET, name_bytes // 2),
+        ))
+
+        if next_offset == 0:
+            break
+        offset += next_offset
+
+    return records
+
+
+def _is_remote_path(path: str) -> bool:
+    """True for UNC paths and mapped network drives."""
+    if path.startswith("\\\\?\\"):
+        path = path[4:]
+        if path[:4].upper() == "UNC\\":
+            return True
+    elif path.startswith("\\\\"):
+        return True
+    drive = path[:2]
+    return len(drive) == 2 and drive[1] == ":" and GetDriveTypeW(drive + "\\") == DRIVE_REMOTE
+
+
 class WatchService:
     """Service for watching file system changes."""
 
-    def __init__(self, event_callback: Callable[[XPEvent], Any]):
+    def __init__(
+        self,
+        event_callback: Callable[[list[XPEvent]], Any],
+        notify_buffer_size: int = DEFAULT_NOTIFY_BUFFER_SIZE,
+    ):
         self.event_callback = event_callback
+        self.notify_buffer_size = notify_buffer_size
         self.watches: dict[str, dict] = {}
         self.running = False
-        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="watch_")
-        self._stop_event = threading.Event()
+
+        # One completion port multiplexes every watch onto one thread
+        self._iocp = None
+        self._completion_thread: threading.Thread | None = None
+        # Watches by completion key, kept until their last read completes
+        self._watch_keys: dict[int, dict] = {}
+        self._next_key = itertools.count(STOP_KEY + 1)
+        self._lock = threading.Lock()
+
+        # Events gathered by the completion thread, delivered in batches
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: list[XPEvent] = []
 
     async def start(self):
-        """Start the watch service."""
+        """Start the watch service (a no-op off Windows, where watches are ignored)."""
+        if sys.platform != "win32":
+            logger.info("Directory watching is not available on this platform")
+            return
+
+        iocp = CreateIoCompletionPort(INVALID_HANDLE_VALUE, None, 0, 1)
+        if not iocp:
+            raise ctypes.WinError(ctypes.get_last_error())
+
+        self._iocp = iocp
+        self._loop = asyncio.get_running_loop()
         self.running = True
-        self._stop_event.clear()
+        self._completion_thread = threading.Thread(
+            target=self._completion_loop,
+            name="xplorer-watch",
+            daemon=True,
+        )
+        self._completion_thread.start()
         logger.info("Watch service started")
 
     async def stop(self):
         """Stop the watch service."""
         self.running = False
-        self._stop_event.set()
 
-        # Close all watch handles
-        for path, watch_info in list(self.watches.items()):
-            try:
-                handle = watch_info.get("handle")
-                if handle and handle != INVALID_HANDLE_VALUE:
-                    ctypes.windll.kernel32.CancelIo(handle)
-                    ctypes.windll.kernel32.CloseHandle(handle)
-            except Exception as e:
-                logger.error(f"Error closing watch handle for {path}: {e}")
+        # Cancel every outstanding read; their completions drain below
+        with self._lock:
+            for watch_info in self.watches.values():
+                self._close_watch(watch_info)
+            self.watches.clear()
+
+        if self._iocp:
+            PostQueuedCompletionStatus(self._iocp, 0, STOP_KEY, None)
+            if self._completion_thread is not None:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._completion_thread.join, STOP_JOIN_TIMEOUT
+                )
+                if self._completion_thread.is_alive():
+                    logger.warning("Watch completion thread did not stop in time")
+            CloseHandle(self._iocp)
+            self._iocp = None
 
-        self.watches.clear()
-        self._executor.shutdown(wait=False)
         logger.info("Watch service stopped")
 
-    async def watch(self, path: str, recursive: bool = True):
-        """Start watching a directory."""
+    async def watch(self, path: str, recursive: bool = True, buffer_size: int | None = None):
+        """
+        Start watching a directory.
+
+        buffer_size overrides the service's notification buffer size for this
+        watch; it is capped at 64KB on network paths.
+        """
+        if sys.platform != "win32":
+            logger.debug(f"Ignoring watch on {path}: not supported on this platform")
+            return
+
+        # Fast path only; start_watch re-checks under the lock
         if path in self.watches:
             logger.debug(f"Already watching: {path}")
             return
@@ -87,28 +242,70 @@ class WatchService:
 
         def start_watch():
             try:
-                # Open directory handle
-                handle = ctypes.windll.kernel32.CreateFileW(
+                # Open directory handle for overlapped reads
+                handle = CreateFileW(
                     path,
-                    0x1,  # FILE_LIST_DIRECTORY
-                    0x7,  # FILE_SHARE_READ | FILE_SHARE_WRITE | FILE_SHARE_DELETE
+                    FILE_LIST_DIRECTORY,
+                    FILE_SHARE_ALL,
                     None,
-                    3,    # OPEN_EXISTING
-                    0x02000000 | 0x40000000,  # FILE_FLAG_BACKUP_SEMANTICS | FILE_FLAG_OVERLAPPED
+                    OPEN_EXISTING,
+                    FILE_FLAG_BACKUP_SEMANTICS | FILE_FLAG_OVERLAPPED,
                     None,
                 )
 
-                if handle == INVALID_HANDLE_VALUE:
+                if not handle or handle == INVALID_HANDLE_VALUE:
                     error = ctypes.get_last_error()
                     raise OSError(f"CreateFileW failed with error {error}")
 
-                self.watches[path] = {
+                size = buffer_size or self.notify_buffer_size
+                if _is_remote_path(path):
+                    size = min(size, NETWORK_NOTIFY_BUFFER_SIZE)
+
+                # Page-aligned (so DWORD-aligned, as RDCW requires) and
+                # outside the Python heap; reused for the life of the watch
+                buffer = VirtualAlloc(None, size, MEM_COMMIT | MEM_RESERVE, PAGE_READWRITE)
+                if not buffer:
+                    error = ctypes.get_last_error()
+                    CloseHandle(handle)
+                    raise OSError(f"VirtualAlloc failed with error {error}")
+
+                key = next(self._next_key)
+                watch_info = {
                     "handle": handle,
                     "recursive": recursive,
+                    "path": path,
+                    "key": key,
+                    "buffer_size": size,
+                    "buffer": buffer,
+                    "view": (ctypes.c_char * size).from_address(buffer),
+                    "overlapped": OVERLAPPED(),
+                    "old_name": None,
+                    "closed": False,
                 }
 
-                # Start watching in a separate thread
-                self._executor.submit(self._watch_loop, path, handle, recursive)
+                if not CreateIoCompletionPort(handle, self._iocp, key, 0):
+                    error = ctypes.get_last_error()
+                    CloseHandle(handle)
+                    self._free_buffer(watch_info)
+                    raise OSError(f"CreateIoCompletionPort failed with error {error}")
+
+                # Check, register and issue the first read together, so a
+                # concurrent watch() of the same path can't arm a second handle
+                # and an unwatch can't close it before the read is queued
+                with self._lock:
+                    duplicate = path in self.watches
+                    if not duplicate and self._issue_read(watch_info):
+                        self._watch_keys[key] = watch_info
+                        self.watches[path] = watch_info
+                        return
+                    error = 0 if duplicate else ctypes.get_last_error()
+
+                CloseHandle(handle)
+                self._free_buffer(watch_info)
+                if duplicate:
+                    logger.debug(f"Already watching: {path}")
+                    return
+                raise OSError(f"ReadDirectoryChangesW failed with error {error}")
 
             except Exception as e:
                 logger.error(f"Failed to start watch on {path}: {e}")
@@ -118,117 +315,184 @@ class WatchService:
 
     async def unwatch(self, path: str):
         """Stop watching a directory."""
-        watch_info = self.watches.pop(path, None)
-        if watch_info:
-            handle = watch_info.get("handle")
-            if handle and handle != INVALID_HANDLE_VALUE:
-                try:
-                    ctypes.windll.kernel32.CancelIo(handle)
-                    ctypes.windll.kernel32.CloseHandle(handle)
-                except Exception as e:
-                    logger.error(f"Error closing watch handle: {e}")
+        with self._lock:
+            watch_info = self.watches.pop(path, None)
+            if watch_info:
+                self._close_watch(watch_info)
 
+        if watch_info:
             logger.info(f"Stopped watching: {path}")
 
-    def _watch_loop(self, path: str, handle: int, recursive: bool):
-        """Main watching loop (runs in thread)."""
-        buffer_size = 64 * 1024  # 64KB buffer
-        buffer = ctypes.create_string_buffer(buffer_size)
-        bytes_returned = wintypes.DWORD()
-
-        notify_filter = (
-            FILE_NOTIFY_CHANGE_FILE_NAME |
-            FILE_NOTIFY_CHANGE_DIR_NAME |
-            FILE_NOTIFY_CHANGE_ATTRIBUTES |
-            FILE_NOTIFY_CHANGE_SIZE |
-            FILE_NOTIFY_CHANGE_LAST_WRITE |
-            FILE_NOTIFY_CHANGE_CREATION
-        )
-
-        old_name = None  # For tracking renames
-
-        while self.running and path in self.watches:
+    @staticmethod
+    def _issue_read(watch_info: dict) -> bool:
+        """Queue an overlapped ReadDirectoryChangesW; it completes on the port."""
+        return bool(ReadDirectoryChangesW(
+            watch_info["handle"],
+            watch_info["buffer"],
+            watch_info["buffer_size"],
+            watch_info["recursive"],
+            NOTIFY_FILTER,
+            None,  # Result arrives with the completion packet
+            ctypes.byref(watch_info["overlapped"]),
+            None,
+        ))
+
+    @staticmethod
+    def _free_buffer(watch_info: dict):
+        """Release a watch's notification buffer once no read can be pending."""
+        buffer = watch_info.pop("buffer", None)
+        watch_info.pop("view", None)
+        if buffer:
+            VirtualFree(buffer, 0, MEM_RELEASE)
+
+    @staticmethod
+    def _close_watch(watch_info: dict):
+        """
+        Cancel a watch's pending read and close its handle.
+
+        The buffer and OVERLAPPED stay allocated until the aborted read
+        completes, since the kernel still owns them until then. Safe to call
+        more than once; only the first call closes the handle.
+        """
+        watch_info["closed"] = True
+        handle = watch_info.pop("handle", None)
+        if handle and handle != INVALID_HANDLE_VALUE:
             try:
-                result = ctypes.windll.kernel32.ReadDirectoryChangesW(
-                    handle,
-                    buffer,
-                    buffer_size,
-                    recursive,
-                    notify_filter,
-                    ctypes.byref(bytes_returned),
-                    None,  # Synchronous
-                    None,
-                )
+                CancelIoEx(handle, None)
+                CloseHandle(handle)
+            except Exception as e:
+                logger.error(f"Error closing watch handle for {watch_info['path']}: {e}")
 
-                if not result:
-                    error = ctypes.get_last_error()
-                    if error == 995:  # ERROR_OPERATION_ABORTED
-                        break
-                    logger.error(f"ReadDirectoryChangesW failed with error {error}")
-                    continue
-
-                if bytes_returned.value == 0:
-                    continue
-
-                # Parse notifications
-                offset = 0
-                while offset < bytes_returned.value:
-                    info = ctypes.cast(
-                        ctypes.byref(buffer, offset),
-                        ctypes.POINTER(FILE_NOTIFY_INFORMATION)
-                    ).contents
-
-                    # Get filename
-                    name_length = info.FileNameLength // 2
-                    filename_ptr = ctypes.cast(
-                        ctypes.byref(info.FileName),
-                        ctypes.POINTER(wintypes.WCHAR * name_length)
-                    ).contents
-                    filename = "".join(filename_ptr)
-                    full_path = f"{path}\\{filename}"
-
-                    # Map action to event type
-                    if info.Action == FILE_ACTION_ADDED:
-                        self._emit_event(FSEventType.CREATED, full_path)
-                    elif info.Action == FILE_ACTION_REMOVED:
-                        self._emit_event(FSEventType.DELETED, full_path)
-                    elif info.Action == FILE_ACTION_MODIFIED:
-                        self._emit_event(FSEventType.MODIFIED, full_path)
-                    elif info.Action == FILE_ACTION_RENAMED_OLD_NAME:
-                        old_name = full_path
-                    elif info.Action == FILE_ACTION_RENAMED_NEW_NAME:
-                        self._emit_event(FSEventType.RENAMED, full_path, {"oldPath": old_name})
-                        old_name = None
-
-                    if info.NextEntryOffset == 0:
+    def _completion_loop(self):
+        """Drain completed directory reads for every watch (runs in thread)."""
+        bytes_returned = wintypes.DWORD()
+        key = ctypes.c_size_t()
+        overlapped = ctypes.POINTER(OVERLAPPED)()
+        timeout = INFINITE
+
+        while True:
+            ok = GetQueuedCompletionStatus(
+                self._iocp, ctypes.byref(bytes_returned), ctypes.byref(key),
+                ctypes.byref(overlapped), timeout,
+            )
+            error = 0 if ok else ctypes.get_last_error()
+
+            if not overlapped:
+                if error == WAIT_TIMEOUT:
+                    # Cancelled reads never completed; give up on them
+                    break
+                if error:
+                    logger.error(f"GetQueuedCompletionStatus failed with error {error}")
+                    break
+
+                # Stop requested: keep going only until cancelled reads drain
+                timeout = DRAIN_TIMEOUT_MS
+                with self._lock:
+                    if not self._watch_keys:
                         break
-                    offset += info.NextEntryOffset
-
+                continue
+
+            with self._lock:
+                watch_info = self._watch_keys.get(key.value)
+            if watch_info is None:
+                continue
+
+            if watch_info["closed"] or error in FATAL_WATCH_ERRORS:
+                with self._lock:
+                    self._watch_keys.pop(key.value, None)
+                    done = timeout != INFINITE and not self._watch_keys
+                self._free_buffer(watch_info)
+                if done:
+                    break
+                continue
+
+            path = watch_info["path"]
+            try:
+                if bytes_returned.value and not error:
+                    self._dispatch_changes(watch_info, bytes_returned.value)
+                else:
+                    # Buffer overflowed (no records) or a transient failure:
+                    # changes were lost, so ask listeners to refresh
+                    if error and error != ERROR_NOTIFY_ENUM_DIR:
+                        logger.warning(
+                            f"ReadDirectoryChangesW failed for {path} with error {error}"
+                        )
+                    self._emit_event(FSEventType.OVERFLOW, path)
             except Exception as e:
-                if self.running:
-                    logger.error(f"Error in watch loop for {path}: {e}")
+                logger.error(f"Error in watch loop for {path}: {e}")
+
+            # Re-arm under the lock so unwatch can't close the handle in between.
+            # A watch closed meanwhile, or a failed re-issue, has no read pending
+            # and no completion will come, so it is dropped here.
+            with self._lock:
+                closed = watch_info["closed"]
+                rearmed = not closed and self._issue_read(watch_info)
+                error = 0 if rearmed or closed else ctypes.get_last_error()
+            if not rearmed:
+                if not closed and self.running and error not in FATAL_WATCH_ERRORS:
+                    logger.error(
+                        f"Error in watch loop for {path}: "
+                        f"ReadDirectoryChangesW failed with error {error}"
+                    )
                     # Emit overflow event to trigger refresh
                     self._emit_event(FSEventType.OVERFLOW, path)
-                break
+
+                with self._lock:
+                    if self.watches.get(path) is watch_info:
+                        del self.watches[path]
+                    self._watch_keys.pop(key.value, None)
+                self._close_watch(watch_info)
+                self._free_buffer(watch_info)
+
+            # One hop to the event loop per completed read
+            self._flush_events()
+
+    def _dispatch_changes(self, watch_info: dict, size: int):
+        """Parse a filled notification buffer and emit its events."""
+        path = watch_info["path"]
+        path_prefix = path if path.endswith("\\") else path + "\\"
+        emit = self._emit_event
+
+        if USE_CYTHON:
+            records = watch_parser.parse(watch_info["buffer"], size, path_prefix)
+        else:
+            records = _parse_notifications(
+                watch_info["view"], watch_info["buffer"], size, path_prefix
+            )
+
+        for action, full_path in records:
+            # Map action to event type
+            event_type = _ACTION_TO_EVENT.get(action)
+            if event_type is not None:
+                emit(event_type, full_path)
+            elif action == FILE_ACTION_RENAMED_OLD_NAME:
+                watch_info["old_name"] = full_path
+            elif action == FILE_ACTION_RENAMED_NEW_NAME:
+                emit(FSEventType.RENAMED, full_path, {"oldPath": watch_info["old_name"]})
+                watch_info["old_name"] = None
 
     def _emit_event(self, event_type: FSEventType, path: str, extra_data: dict = None):
-        """Emit a file system event."""
+        """Queue a file system event for the next batch."""
         data = {"eventType": event_type.value}
         if extra_data:
             data.update(extra_data)
 
-        event = XPEvent(
+        self._pending.append(XPEvent(
             type="fs.changed",
             path=path,
             data=data,
-        )
+        ))
+
+        if len(self._pending) >= EVENT_BATCH_SIZE:
+            self._flush_events()
+
+    def _flush_events(self):
+        """Hand the queued events to the callback on the event loop as one batch."""
+        if not self._pending or self._loop is None:
+            return
 
-        # Run callback in async context
+        batch, self._pending = self._pending, []
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                asyncio.run_coroutine_threadsafe(self.event_callback(event), loop)
-            else:
-                asyncio.run(self.event_callback(event))
+            asyncio.run_coroutine_threadsafe(self.event_callback(batch), self._loop)
         except Exception as e:
-            logger.error(f"Error emitting event: {e}")
+            logger.error(f"Error emitting events: {e}")
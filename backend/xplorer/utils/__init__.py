@@ -3,6 +3,6 @@ Utility modules for X-Plorer backend.
 """
 
 from .icons import get_system_icon
-from .permissions import get_file_permissions
+from .permissions import get_file_permissions, get_file_permissions_bulk
 
-__all__ = ["get_system_icon", "get_file_permissions"]
+__all__ = ["get_system_icon", "get_file_permissions", "get_file_permissions_bulk"]
@@ -0,0 +1,172 @@
+"""
+Shared Win32 bindings with explicit argtypes/restype.
+
+Functions are resolved once here so callers skip the ctypes.windll attribute
+walk and per-call argument inference. Errors are read with
+ctypes.get_last_error().
+"""
+
+import ctypes
+from ctypes import wintypes
+import sys
+
+INVALID_HANDLE_VALUE = wintypes.HANDLE(-1).value
+INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+MEM_COMMIT = 0x1000
+MEM_RESERVE = 0x2000
+MEM_RELEASE = 0x8000
+PAGE_READWRITE = 0x04
+
+
+class OVERLAPPED(ctypes.Structure):
+    _fields_ = [
+        ("Internal", ctypes.c_size_t),
+        ("InternalHigh", ctypes.c_size_t),
+        ("Offset", wintypes.DWORD),
+        ("OffsetHigh", wintypes.DWORD),
+        ("hEvent", wintypes.HANDLE),
+    ]
+
+
+class SHFILEINFO(ctypes.Structure):
+    _fields_ = [
+        ("hIcon", wintypes.HICON),
+        ("iIcon", ctypes.c_int),
+        ("dwAttributes", wintypes.DWORD),
+        ("szDisplayName", wintypes.WCHAR * 260),
+        ("szTypeName", wintypes.WCHAR * 80),
+    ]
+
+
+if sys.platform == "win32":
+    _kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _shell32 = ctypes.WinDLL("shell32", use_last_error=True)
+    _user32 = ctypes.WinDLL("user32", use_last_error=True)
+
+    # Handles and overlapped I/O
+    CreateFileW = _kernel32.CreateFileW
+    CreateFileW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD, wintypes.LPVOID,
+        wintypes.DWORD, wintypes.DWORD, wintypes.HANDLE,
+    ]
+    CreateFileW.restype = wintypes.HANDLE
+
+    CloseHandle = _kernel32.CloseHandle
+    CloseHandle.argtypes = [wintypes.HANDLE]
+    CloseHandle.restype = wintypes.BOOL
+
+    CancelIoEx = _kernel32.CancelIoEx
+    CancelIoEx.argtypes = [wintypes.HANDLE, ctypes.POINTER(OVERLAPPED)]
+    CancelIoEx.restype = wintypes.BOOL
+
+    ReadDirectoryChangesW = _kernel32.ReadDirectoryChangesW
+    ReadDirectoryChangesW.argtypes = [
+        wintypes.HANDLE, wintypes.LPVOID, wintypes.DWORD, wintypes.BOOL, wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(OVERLAPPED), wintypes.LPVOID,
+    ]
+    ReadDirectoryChangesW.restype = wintypes.BOOL
+
+    CreateIoCompletionPort = _kernel32.CreateIoCompletionPort
+    CreateIoCompletionPort.argtypes = [
+        wintypes.HANDLE, wintypes.HANDLE, ctypes.c_size_t, wintypes.DWORD,
+    ]
+    CreateIoCompletionPort.restype = wintypes.HANDLE
+
+    GetQueuedCompletionStatus = _kernel32.GetQueuedCompletionStatus
+    GetQueuedCompletionStatus.argtypes = [
+        wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(ctypes.c_size_t),
+        ctypes.POINTER(ctypes.POINTER(OVERLAPPED)), wintypes.DWORD,
+    ]
+    GetQueuedCompletionStatus.restype = wintypes.BOOL
+
+    PostQueuedCompletionStatus = _kernel32.PostQueuedCompletionStatus
+    PostQueuedCompletionStatus.argtypes = [
+        wintypes.HANDLE, wintypes.DWORD, ctypes.c_size_t, ctypes.POINTER(OVERLAPPED),
+    ]
+    PostQueuedCompletionStatus.restype = wintypes.BOOL
+
+    # Waits and change notifications
+    CreateEventW = _kernel32.CreateEventW
+    CreateEventW.argtypes = [wintypes.LPVOID, wintypes.BOOL, wintypes.BOOL, wintypes.LPCWSTR]
+    CreateEventW.restype = wintypes.HANDLE
+
+    WaitForSingleObject = _kernel32.WaitForSingleObject
+    WaitForSingleObject.argtypes = [wintypes.HANDLE, wintypes.DWORD]
+    WaitForSingleObject.restype = wintypes.DWORD
+
+    FindFirstChangeNotificationW = _kernel32.FindFirstChangeNotificationW
+    FindFirstChangeNotificationW.argtypes = [wintypes.LPCWSTR, wintypes.BOOL, wintypes.DWORD]
+    FindFirstChangeNotificationW.restype = wintypes.HANDLE
+
+    FindNextChangeNotification = _kernel32.FindNextChangeNotification
+    FindNextChangeNotification.argtypes = [wintypes.HANDLE]
+    FindNextChangeNotification.restype = wintypes.BOOL
+
+    FindCloseChangeNotification = _kernel32.FindCloseChangeNotification
+    FindCloseChangeNotification.argtypes = [wintypes.HANDLE]
+    FindCloseChangeNotification.restype = wintypes.BOOL
+
+    # Memory
+    VirtualAlloc = _kernel32.VirtualAlloc
+    VirtualAlloc.argtypes = [wintypes.LPVOID, ctypes.c_size_t, wintypes.DWORD, wintypes.DWORD]
+    VirtualAlloc.restype = wintypes.LPVOID
+
+    VirtualFree = _kernel32.VirtualFree
+    VirtualFree.argtypes = [wintypes.LPVOID, ctypes.c_size_t, wintypes.DWORD]
+    VirtualFree.restype = wintypes.BOOL
+
+    # Volumes, attributes and directory enumeration
+    GetDriveTypeW = _kernel32.GetDriveTypeW
+    GetDriveTypeW.argtypes = [wintypes.LPCWSTR]
+    GetDriveTypeW.restype = wintypes.UINT
+
+    GetFileAttributesW = _kernel32.GetFileAttributesW
+    GetFileAttributesW.argtypes = [wintypes.LPCWSTR]
+    GetFileAttributesW.restype = wintypes.DWORD
+
+    SetFileAttributesW = _kernel32.SetFileAttributesW
+    SetFileAttributesW.argtypes = [wintypes.LPCWSTR, wintypes.DWORD]
+    SetFileAttributesW.restype = wintypes.BOOL
+
+    FindFirstFileExW = _kernel32.FindFirstFileExW
+    FindFirstFileExW.argtypes = [
+        wintypes.LPCWSTR, ctypes.c_int, ctypes.POINTER(wintypes.WIN32_FIND_DATAW),
+        ctypes.c_int, wintypes.LPVOID, wintypes.DWORD,
+    ]
+    FindFirstFileExW.restype = wintypes.HANDLE
+
+    FindNextFileW = _kernel32.FindNextFileW
+    FindNextFileW.argtypes = [wintypes.HANDLE, ctypes.POINTER(wintypes.WIN32_FIND_DATAW)]
+    FindNextFileW.restype = wintypes.BOOL
+
+    FindClose = _kernel32.FindClose
+    FindClose.argtypes = [wintypes.HANDLE]
+    FindClose.restype = wintypes.BOOL
+
+    # Shell icons
+    SHGetFileInfoW = _shell32.SHGetFileInfoW
+    SHGetFileInfoW.argtypes = [
+        wintypes.LPCWSTR, wintypes.DWORD, ctypes.POINTER(SHFILEINFO), wintypes.UINT, wintypes.UINT,
+    ]
+    SHGetFileInfoW.restype = ctypes.c_size_t
+
+    DestroyIcon = _user32.DestroyIcon
+    DestroyIcon.argtypes = [wintypes.HICON]
+    DestroyIcon.restype = wintypes.BOOL
+
+else:
+    # Importable off Windows (tooling, tests, the POSIX dev server); any
+    # actual call fails the way a failed Win32 call would
+    def _unavailable(*args, **kwargs):
+        raise OSError("Win32 API is not available on this platform")
+
+    CreateFileW = CloseHandle = CancelIoEx = ReadDirectoryChangesW = _unavailable
+    CreateIoCompletionPort = GetQueuedCompletionStatus = PostQueuedCompletionStatus = _unavailable
+    CreateEventW = WaitForSingleObject = _unavailable
+    FindFirstChangeNotificationW = FindNextChangeNotification = _unavailable
+    FindCloseChangeNotification = _unavailable
+    VirtualAlloc = VirtualFree = _unavailable
+    GetDriveTypeW = GetFileAttributesW = SetFileAttributesW = _unavailable
+    FindFirstFileExW = FindNextFileW = FindClose = _unavailable
+    SHGetFileInfoW = DestroyIcon = _unavailable
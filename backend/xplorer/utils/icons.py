@@ -3,18 +3,92 @@ Icon extraction utilities.
 """
 
 import ctypes
-from ctypes import wintypes
 import base64
+import os
+import struct
+import zlib
+from functools import lru_cache
 from io import BytesIO
 import logging
 
+from ._win32 import (
+    INVALID_FILE_ATTRIBUTES,
+    SHFILEINFO,
+    DestroyIcon,
+    GetFileAttributesW,
+    SHGetFileInfoW,
+)
+
 logger = logging.getLogger(__name__)
 
+SHGFI_ICON = 0x100
+SHGFI_SMALLICON = 0x1
+SHGFI_LARGEICON = 0x0
+SHGFI_USEFILEATTRIBUTES = 0x10
+
+FILE_ATTRIBUTE_DIRECTORY = 0x10
+FILE_ATTRIBUTE_NORMAL = 0x80
+
+# Encode icon bitmaps as PNG directly instead of through PIL
+DIRECT_PNG_ENCODER = True
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Files that carry their own icon; everything else shares its extension's icon
+PER_FILE_ICON_EXTENSIONS = frozenset(
+    {".exe", ".lnk", ".ico", ".url", ".cur", ".ani", ".scr", ".dll"}
+)
+
+
+def _shell_icon(path: str, attributes: int, flags: int, size: int) -> str | None:
+    """Ask the shell for an icon and convert it to base64 PNG."""
+    shfi = SHFILEINFO()
+    flags |= SHGFI_ICON | (SHGFI_SMALLICON if size <= 16 else SHGFI_LARGEICON)
+
+    result = SHGetFileInfoW(
+        path,
+        attributes,
+        ctypes.byref(shfi),
+        ctypes.sizeof(shfi),
+        flags,
+    )
+
+    if not result or not shfi.hIcon:
+        return None
+
+    try:
+        # Try to convert icon to PNG using PIL and win32gui
+        return _icon_to_base64(shfi.hIcon, size)
+    finally:
+        DestroyIcon(shfi.hIcon)
+
+
+class _IconUnavailable(Exception):
+    """Raised instead of returning None so lru_cache doesn't keep failures."""
+
+
+@lru_cache(maxsize=4096)
+def _get_icon_for_ext(ext: str, size: int) -> str:
+    """
+    Generic icon for a file extension.
+
+    SHGFI_USEFILEATTRIBUTES makes the shell answer from the name alone,
+    so the synthetic path never touches the disk.
+    """
+    icon = _shell_icon("x" + ext, FILE_ATTRIBUTE_NORMAL, SHGFI_USEFILEATTRIBUTES, size)
+    if icon is None:
+        raise _IconUnavailable(ext)
+    return icon
+
 
 def get_system_icon(path: str, size: int = 16) -> str | None:
     """
     Get system icon for a file as base64-encoded PNG.
 
+    Icons are cached per extension, except for directories (drive roots,
+    customized and special folders have their own) and file types that
+    carry their own icon (executables, shortcuts, icon files).
+
     Args:
         path: File path
         size: Icon size (16 or 32)
@@ -23,52 +97,58 @@ def get_system_icon(path: str, size: int = 16) -> str | None:
         Base64-encoded PNG string or None if failed
     """
     try:
-        # Define SHFILEINFO structure
-        class SHFILEINFO(ctypes.Structure):
-            _fields_ = [
-                ("hIcon", wintypes.HICON),
-                ("iIcon", ctypes.c_int),
-                ("dwAttributes", wintypes.DWORD),
-                ("szDisplayName", wintypes.WCHAR * 260),
-                ("szTypeName", wintypes.WCHAR * 80),
-            ]
-
-        SHGFI_ICON = 0x100
-        SHGFI_SMALLICON = 0x1
-        SHGFI_LARGEICON = 0x0
-
-        shfi = SHFILEINFO()
-        flags = SHGFI_ICON | (SHGFI_SMALLICON if size <= 16 else SHGFI_LARGEICON)
-
-        result = ctypes.windll.shell32.SHGetFileInfoW(
-            path,
-            0,
-            ctypes.byref(shfi),
-            ctypes.sizeof(shfi),
-            flags,
-        )
-
-        if not result or not shfi.hIcon:
-            return None
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in PER_FILE_ICON_EXTENSIONS:
+            attributes = GetFileAttributesW(path)
+            if attributes != INVALID_FILE_ATTRIBUTES and not attributes & FILE_ATTRIBUTE_DIRECTORY:
+                try:
+                    return _get_icon_for_ext(ext, size)
+                except _IconUnavailable:
+                    return None
 
-        try:
-            # Try to convert icon to PNG using PIL and win32gui
-            return _icon_to_base64(shfi.hIcon, size)
-        finally:
-            ctypes.windll.user32.DestroyIcon(shfi.hIcon)
+        return _shell_icon(path, 0, 0, size)
 
     except Exception as e:
         logger.error(f"Error getting system icon for {path}: {e}")
         return None
 
 
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    """One PNG chunk: length, tag, data, CRC over tag and data."""
+    crc = zlib.crc32(data, zlib.crc32(tag))
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def _encode_png_bgra(width: int, height: int, bits: bytes) -> bytes:
+    """
+    Encode top-down 32-bit BGRA rows as an 8-bit RGBA PNG.
+
+    Icons are tiny, so unfiltered rows and fast deflate are enough.
+    """
+    # Swap B and R in one pass of extended slicing
+    rgba = bytearray(bits)
+    rgba[0::4] = bits[2::4]
+    rgba[2::4] = bits[0::4]
+
+    # Each scanline gets a leading filter-type byte (0 = none)
+    stride = width * 4
+    raw = b"".join(b"\x00" + rgba[i:i + stride] for i in range(0, stride * height, stride))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        PNG_SIGNATURE
+        + _png_chunk(b"IHDR", ihdr)
+        + _png_chunk(b"IDAT", zlib.compress(raw, 1))
+        + _png_chunk(b"IEND", b"")
+    )
+
+
 def _icon_to_base64(hicon: int, size: int) -> str | None:
     """Convert HICON to base64 PNG."""
     try:
         import win32gui
         import win32ui
         import win32con
-        from PIL import Image
 
         # Get icon info
         icon_info = win32gui.GetIconInfo(hicon)
@@ -105,11 +185,18 @@ def _icon_to_base64(hicon: int, size: int) -> str | None:
         # Get bitmap bits
         bmp_info = bmp.GetInfo()
         bmp_bits = bmp.GetBitmapBits(True)
+        width, height = bmp_info["bmWidth"], bmp_info["bmHeight"]
+
+        # Already the requested size: write the PNG ourselves
+        if DIRECT_PNG_ENCODER and width == size and height == size:
+            return base64.b64encode(_encode_png_bgra(width, height, bmp_bits)).decode("ascii")
+
+        from PIL import Image
 
         # Create PIL image
         img = Image.frombuffer(
             "RGBA",
-            (bmp_info["bmWidth"], bmp_info["bmHeight"]),
+            (width, height),
             bmp_bits,
             "raw",
             "BGRA",
@@ -124,7 +211,7 @@ def _icon_to_base64(hicon: int, size: int) -> str | None:
         # Convert to base64 PNG
         buffer = BytesIO()
         img.save(buffer, format="PNG")
-        return base64.b64encode(buffer.getvalue()).decode("ascii")
+        return base64.b64encode(buffer.getbuffer()).decode("ascii")
 
     except ImportError:
         logger.warning("win32gui/PIL not available for icon conversion")
@@ -5,10 +5,47 @@ File permission utilities for Windows.
 import ctypes
 from ctypes import wintypes
 import logging
-from typing import Any
+import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from ._win32 import (
+    INVALID_FILE_ATTRIBUTES,
+    INVALID_HANDLE_VALUE,
+    FindClose,
+    FindFirstFileExW,
+    FindNextFileW,
+    GetFileAttributesW,
+    SetFileAttributesW,
+)
 
 logger = logging.getLogger(__name__)
 
+# FindFirstFileExW: skip the 8.3 name, use larger directory buffers
+FIND_EX_INFO_BASIC = 1
+FIND_EX_SEARCH_NAME_MATCH = 0
+FIND_FIRST_EX_LARGE_FETCH = 0x2
+
+
+@lru_cache(maxsize=1024)
+def _permissions_from_attrs(attrs: int) -> Mapping[str, bool]:
+    """
+    Decode a FILE_ATTRIBUTE_* mask.
+
+    Directories hold only a handful of distinct masks, so each decoded
+    mask is built once and shared read-only.
+    """
+    return MappingProxyType({
+        "readonly": bool(attrs & 0x1),    # FILE_ATTRIBUTE_READONLY
+        "hidden": bool(attrs & 0x2),      # FILE_ATTRIBUTE_HIDDEN
+        "system": bool(attrs & 0x4),      # FILE_ATTRIBUTE_SYSTEM
+        "directory": bool(attrs & 0x10),  # FILE_ATTRIBUTE_DIRECTORY
+        "archive": bool(attrs & 0x20),    # FILE_ATTRIBUTE_ARCHIVE
+        "encrypted": bool(attrs & 0x4000),  # FILE_ATTRIBUTE_ENCRYPTED
+        "compressed": bool(attrs & 0x800),  # FILE_ATTRIBUTE_COMPRESSED
+    })
+
 
 def get_file_permissions(path: str) -> dict[str, Any]:
     """
@@ -21,82 +58,136 @@ def get_file_permissions(path: str) -> dict[str, Any]:
         Dictionary with permission information
     """
     try:
-        attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
+        attrs = GetFileAttributesW(path)
 
-        if attrs == 0xFFFFFFFF:  # INVALID_FILE_ATTRIBUTES
+        if attrs == INVALID_FILE_ATTRIBUTES:
             return {"error": "Failed to get attributes"}
 
-        return {
-            "readonly": bool(attrs & 0x1),    # FILE_ATTRIBUTE_READONLY
-            "hidden": bool(attrs & 0x2),      # FILE_ATTRIBUTE_HIDDEN
-            "system": bool(attrs & 0x4),      # FILE_ATTRIBUTE_SYSTEM
-            "directory": bool(attrs & 0x10),  # FILE_ATTRIBUTE_DIRECTORY
-            "archive": bool(attrs & 0x20),    # FILE_ATTRIBUTE_ARCHIVE
-            "encrypted": bool(attrs & 0x4000),  # FILE_ATTRIBUTE_ENCRYPTED
-            "compressed": bool(attrs & 0x800),  # FILE_ATTRIBUTE_COMPRESSED
-        }
+        return dict(_permissions_from_attrs(attrs))
 
     except Exception as e:
         logger.error(f"Error getting permissions for {path}: {e}")
         return {"error": str(e)}
 
 
-def set_file_readonly(path: str, readonly: bool) -> bool:
+def iter_file_attributes(dir_path: str):
     """
-    Set or clear the readonly attribute.
+    Yield (name, FILE_ATTRIBUTE_* mask) for every entry in a directory.
+
+    One FindFirstFileExW enumeration returns the attributes of many entries
+    per kernel call, instead of a GetFileAttributesW call per file.
+    """
+    find_data = wintypes.WIN32_FIND_DATAW()
+    handle = FindFirstFileExW(
+        os.path.join(dir_path, "*"),
+        FIND_EX_INFO_BASIC,
+        ctypes.byref(find_data),
+        FIND_EX_SEARCH_NAME_MATCH,
+        None,
+        FIND_FIRST_EX_LARGE_FETCH,
+    )
+    if not handle or handle == INVALID_HANDLE_VALUE:
+        raise ctypes.WinError(ctypes.get_last_error())
+
+    try:
+        while True:
+            name = find_data.cFileName
+            if name != "." and name != "..":
+                yield name, find_data.dwFileAttributes
+            if not FindNextFileW(handle, ctypes.byref(find_data)):
+                break
+    finally:
+        FindClose(handle)
+
+
+def get_file_permissions_bulk(dir_path: str) -> dict[str, dict[str, bool]]:
+    """
+    Get permissions/attributes for every entry in a directory.
+
+    Args:
+        dir_path: Directory path
+
+    Returns:
+        Dictionary mapping entry name to permission information
+    """
+    try:
+        # Plain dict copies: the wire encoder can't serialize mappingproxy
+        return {
+            name: dict(_permissions_from_attrs(attrs))
+            for name, attrs in iter_file_attributes(dir_path)
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting permissions for {dir_path}: {e}")
+        return {}
+
+
+def set_file_attributes(
+    path: str, set_mask: int = 0, clear_mask: int = 0, *, current: int | None = None
+) -> bool:
+    """
+    Set and clear FILE_ATTRIBUTE_* bits in one update.
 
     Args:
         path: File path
-        readonly: True to set, False to clear
+        set_mask: Bits to set
+        clear_mask: Bits to clear
+        current: The path's current attributes, if already known (e.g. from
+            iter_file_attributes), to skip reading them again
 
     Returns:
         True if successful
     """
     try:
-        attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
+        if current is None:
+            current = GetFileAttributesW(path)
 
-        if attrs == 0xFFFFFFFF:
-            return False
+            if current == INVALID_FILE_ATTRIBUTES:
+                return False
 
-        if readonly:
-            new_attrs = attrs | 0x1
-        else:
-            new_attrs = attrs & ~0x1
+        new_attrs = (current | set_mask) & ~clear_mask
+        if new_attrs == current:
+            return True
 
-        return bool(ctypes.windll.kernel32.SetFileAttributesW(path, new_attrs))
+        return bool(SetFileAttributesW(path, new_attrs))
 
     except Exception as e:
-        logger.error(f"Error setting readonly for {path}: {e}")
+        logger.error(f"Error setting attributes for {path}: {e}")
         return False
 
 
-def set_file_hidden(path: str, hidden: bool) -> bool:
+def set_file_readonly(path: str, readonly: bool, *, current: int | None = None) -> bool:
     """
-    Set or clear the hidden attribute.
+    Set or clear the readonly attribute.
 
     Args:
         path: File path
-        hidden: True to set, False to clear
+        readonly: True to set, False to clear
+        current: The path's current attributes, if already known
 
     Returns:
         True if successful
     """
-    try:
-        attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
+    if readonly:
+        return set_file_attributes(path, set_mask=0x1, current=current)
+    return set_file_attributes(path, clear_mask=0x1, current=current)
 
-        if attrs == 0xFFFFFFFF:
-            return False
 
-        if hidden:
-            new_attrs = attrs | 0x2
-        else:
-            new_attrs = attrs & ~0x2
+def set_file_hidden(path: str, hidden: bool, *, current: int | None = None) -> bool:
+    """
+    Set or clear the hidden attribute.
 
-        return bool(ctypes.windll.kernel32.SetFileAttributesW(path, new_attrs))
+    Args:
+        path: File path
+        hidden: True to set, False to clear
+        current: The path's current attributes, if already known
 
-    except Exception as e:
-        logger.error(f"Error setting hidden for {path}: {e}")
-        return False
+    Returns:
+        True if successful
+    """
+    if hidden:
+        return set_file_attributes(path, set_mask=0x2, current=current)
+    return set_file_attributes(path, clear_mask=0x2, current=current)
 
 
 def get_owner(path: str) -> str | None:
@@ -52,10 +52,13 @@ def build_with_nuitka():
     except Exception as e:
         print(f"Could not check Nuitka version: {e}")
 
+    # Only the packaged output is cleared; main.build is kept so Nuitka can
+    # reuse its compiled objects on the next build
     dist_dir = BACKEND_DIR / "dist"
-    if dist_dir.exists():
-        shutil.rmtree(dist_dir)
-    dist_dir.mkdir(parents=True)
+    server_dist = dist_dir / "main.dist"
+    if server_dist.exists():
+        shutil.rmtree(server_dist)
+    dist_dir.mkdir(parents=True, exist_ok=True)
 
     # Build with Nuitka
     # Note: PIL and ZMQ have Cython components that don't compile well with Nuitka
@@ -67,7 +70,7 @@ def build_with_nuitka():
         "--assume-yes-for-downloads",
         # Our packages - compile these
         "--include-package=xplorer",
-        "--include-package=msgpack",
+        "--include-package=msgspec",
         "--include-package=win32com",
         # Packages with Cython extensions - exclude and copy manually
         "--nofollow-import-to=PIL",
@@ -78,22 +81,18 @@ def build_with_nuitka():
         "--nofollow-import-to=setuptools",
         "--nofollow-import-to=distutils",
         "--nofollow-import-to=win32com.test",
-        "--nofollow-import-to=numpy",
-        "--nofollow-import-to=scipy",
-        "--nofollow-import-to=pandas",
-        "--nofollow-import-to=pytest",
-        "--nofollow-import-to=unittest",
+        # Smaller binary, no site.py walk at startup
+        "--lto=yes",
+        "--python-flag=no_site",
         # Output settings
         "--output-dir=dist",
         "--output-filename=xplorer-server",
-        "--remove-output",
         "main.py"
     ], cwd=BACKEND_DIR)
 
     # If Nuitka succeeded, copy packages that we excluded from compilation
     if result == 0:
         print("\nCopying excluded packages to dist folder...")
-        server_dist = dist_dir / "main.dist"
 
         # Copy PIL
         try:
@@ -147,7 +146,7 @@ def build_with_pyinstaller():
         "--hidden-import=xplorer.services.clipboard_service",
         "--hidden-import=xplorer.services.theme_service",
         "--hidden-import=zmq",
-        "--hidden-import=msgpack",
+        "--hidden-import=msgspec",
         "--hidden-import=PIL",
         "--hidden-import=PIL.Image",
         "--hidden-import=win32com",
@@ -157,7 +156,7 @@ def build_with_pyinstaller():
         "--hidden-import=win32con",
         "--hidden-import=pythoncom",
         "--collect-all=zmq",
-        "--collect-all=msgpack",
+        "--collect-all=msgspec",
         "xplorer/server.py"
     ], cwd=BACKEND_DIR)
 
@@ -17,10 +17,9 @@ def generate_tray_icon_base64(input_path: str, size: int = 32) -> str:
     # Save to bytes buffer as PNG
     buffer = io.BytesIO()
     img.save(buffer, format='PNG')
-    buffer.seek(0)
 
-    # Convert to base64
-    base64_data = base64.b64encode(buffer.read()).decode('utf-8')
+    # Convert to base64 straight from the buffer, without copying it out
+    base64_data = base64.b64encode(buffer.getbuffer()).decode('utf-8')
     return f"data:image/png;base64,{base64_data}"
 
 if __name__ == "__main__":
@@ -4,11 +4,13 @@
 const { spawn } = require('child_process');
 const net = require('net');
 
-const BACKEND_PORT = 5555;
+// Matches the backend's DEALER endpoint: ipc:// socket on POSIX, TCP port on Windows
+const BACKEND_ENDPOINT = process.env.XPLORER_DEALER
+  ?? (process.platform === 'win32' ? 'tcp://127.0.0.1:5555' : 'ipc:///tmp/xplorer.dealer');
 const MAX_RETRIES = 30;
 const RETRY_INTERVAL = 1000;
 
-function checkPort(port) {
+function checkEndpoint(endpoint) {
   return new Promise((resolve) => {
     const socket = new net.Socket();
     socket.setTimeout(500);
@@ -28,7 +30,12 @@ function checkPort(port) {
       resolve(false);
     });
 
-    socket.connect(port, '127.0.0.1');
+    if (endpoint.startsWith('ipc://')) {
+      socket.connect(endpoint.slice('ipc://'.length));
+    } else {
+      const url = new URL(endpoint);
+      socket.connect(Number(url.port), url.hostname);
+    }
   });
 }
 
@@ -36,7 +43,7 @@ async function waitForBackend() {
   console.log('[frontend] Waiting for backend to start...');
 
   for (let i = 0; i < MAX_RETRIES; i++) {
-    const isReady = await checkPort(BACKEND_PORT);
+    const isReady = await checkEndpoint(BACKEND_ENDPOINT);
     if (isReady) {
       console.log('[frontend] Backend is ready!');
       return true;
@@ -4,8 +4,10 @@
 
 export const PROTOCOL = {
   // Endpoints
-  DEALER_ENDPOINT: 'tcp://127.0.0.1:5555',
-  PUB_ENDPOINT: 'tcp://127.0.0.1:5556',
+  DEALER_ENDPOINT: process.env.XPLORER_DEALER
+    ?? (process.platform === 'win32' ? 'tcp://127.0.0.1:5555' : 'ipc:///tmp/xplorer.dealer'),
+  PUB_ENDPOINT: process.env.XPLORER_PUB
+    ?? (process.platform === 'win32' ? 'tcp://127.0.0.1:5556' : 'ipc:///tmp/xplorer.pub'),
 
   // Timeouts
   REQUEST_TIMEOUT: 30000,
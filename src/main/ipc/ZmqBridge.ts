@@ -3,8 +3,12 @@ import * as msgpack from 'msgpack-lite';
 import { v4 as uuidv4 } from 'uuid';
 import type { XPRequest, XPResponse, XPEvent } from '@shared/types';
 
-const ZMQ_ENDPOINT = 'tcp://127.0.0.1:5555';
-const ZMQ_SUB_ENDPOINT = 'tcp://127.0.0.1:5556';
+// Must match the backend: ipc:// on POSIX, loopback TCP on Windows
+const IS_WINDOWS = process.platform === 'win32';
+const ZMQ_ENDPOINT = process.env.XPLORER_DEALER
+  ?? (IS_WINDOWS ? 'tcp://127.0.0.1:5555' : 'ipc:///tmp/xplorer.dealer');
+const ZMQ_SUB_ENDPOINT = process.env.XPLORER_PUB
+  ?? (IS_WINDOWS ? 'tcp://127.0.0.1:5556' : 'ipc:///tmp/xplorer.pub');
 const REQUEST_TIMEOUT = 30000; // 30 seconds
 
 type EventCallback = (event: XPEvent) => void;
@@ -16,6 +16,46 @@ const VIDEO_EXTENSIONS = new Set(['.mp4', '.mkv', '.avi', '.mov', '.wmv', '.webm
 const AUDIO_EXTENSIONS = new Set(['.mp3', '.flac', '.m4a', '.aac', '.ogg', '.wma', '.wav', '.opus']);
 const thumbnailCache = new Map<string, string>();
 
+// Thumbnail requests made in the same tick go to the backend in batches per size,
+// capped so one large folder doesn't hold every thumbnail behind a single reply
+const THUMBNAIL_BATCH_SIZE = 32;
+const pendingThumbnails = new Map<number, Map<string, ((data: string) => void)[]>>();
+let thumbnailFlushScheduled = false;
+
+const flushThumbnailRequests = () => {
+  thumbnailFlushScheduled = false;
+  for (const [size, waiters] of pendingThumbnails) {
+    const paths = [...waiters.keys()];
+    for (let i = 0; i < paths.length; i += THUMBNAIL_BATCH_SIZE) {
+      const batch = paths.slice(i, i + THUMBNAIL_BATCH_SIZE);
+      const resolveAll = (data: Record<string, string>) => {
+        for (const path of batch) {
+          for (const resolve of waiters.get(path)!) resolve(data[path] || '');
+        }
+      };
+      window.xplorer.request('shell.thumbnails', { paths: batch, size })
+        .then((response) => resolveAll(response.success && response.data ? response.data as Record<string, string> : {}))
+        .catch(() => resolveAll({}));
+    }
+  }
+  pendingThumbnails.clear();
+};
+
+const requestThumbnail = (path: string, size: number): Promise<string> => new Promise((resolve) => {
+  let waiters = pendingThumbnails.get(size);
+  if (!waiters) {
+    waiters = new Map();
+    pendingThumbnails.set(size, waiters);
+  }
+  const resolvers = waiters.get(path);
+  if (resolvers) resolvers.push(resolve);
+  else waiters.set(path, [resolve]);
+  if (!thumbnailFlushScheduled) {
+    thumbnailFlushScheduled = true;
+    setTimeout(flushThumbnailRequests, 0);
+  }
+});
+
 interface FileThumbnailProps {
   file: FileInfo;
   size: number;
@@ -37,16 +77,11 @@ const FileThumbnail: React.FC<FileThumbnailProps> = memo(({ file, size, fallback
     }
     setLoading(true);
     setError(false);
-    window.xplorer.request('shell.thumbnail', { path: file.path, size })
-      .then((response) => {
-        if (response.success && response.data) {
-          const base64Data = response.data as string;
-          if (base64Data) {
-            thumbnailCache.set(cacheKey, base64Data);
-            setThumbnail(base64Data);
-          } else {
-            setError(true);
-          }
+    requestThumbnail(file.path, size)
+      .then((base64Data) => {
+        if (base64Data) {
+          thumbnailCache.set(cacheKey, base64Data);
+          setThumbnail(base64Data);
         } else {
           setError(true);
         }
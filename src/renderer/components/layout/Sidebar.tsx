@@ -30,6 +30,9 @@ import type { DriveInfo } from '@shared/types';
 import { HOME_PATH } from '@shared/types';
 import './Sidebar.css';
 
+// Removable (2), network (4) and CD-ROM (5) drives are only probed on request
+const SLOW_DRIVE_TYPES = new Set([2, 4, 5]);
+
 // Icon mapping
 const iconMap: Record<string, React.ReactNode> = {
   Home: <Home size={16} />,
@@ -102,7 +105,18 @@ export const Sidebar: React.FC = () => {
       try {
         const response = await window.xplorer.request('fs.drives');
         if (response.success && response.data) {
-          setDrives(response.data as DriveInfo[]);
+          const fastDrives = response.data as DriveInfo[];
+          setDrives(fastDrives);
+
+          // Removable, network and optical drives come back unprobed; fill them in
+          // with a second, slower pass so they don't hold up the first paint
+          if (fastDrives.some((drive) => SLOW_DRIVE_TYPES.has(drive.type))) {
+            const detailed = await window.xplorer.request('fs.drives', { details: true });
+            if (detailed.success && detailed.data) {
+              const byLetter = new Map((detailed.data as DriveInfo[]).map((drive) => [drive.letter, drive]));
+              setDrives((current) => current.map((drive) => byLetter.get(drive.letter) ?? drive));
+            }
+          }
         }
       } catch (error) {
         console.error('Failed to fetch drives:', error);
@@ -54,6 +54,7 @@ export type ClipboardAction =
 // Shell Actions
 export type ShellAction =
   | 'shell.thumbnail'
+  | 'shell.thumbnails'
   | 'shell.icon'
   | 'shell.contextmenu'
   | 'shell.execute'